@@ -44,6 +44,7 @@ async def root():
 async def health_check():
     """Detailed health check"""
     from config.database import db
+    from nlp_engine.resources import registry
     
     try:
         # Test database connection
@@ -55,6 +56,7 @@ async def health_check():
     return {
         "status": "ok",
         "database": db_status,
+        "models": registry.status(),
         "timestamp": "2026-01-26T12:00:00Z"
     }
 
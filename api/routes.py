@@ -1,4 +1,6 @@
 from fastapi import APIRouter, Query, HTTPException
+from fastapi.responses import PlainTextResponse
+from datetime import datetime
 from typing import Optional, List
 from database.operations import (
     get_posts,
@@ -6,9 +8,61 @@ from database.operations import (
     get_statistics,
     search_posts
 )
+from api.schemas import TopicAssignRequest
 
 router = APIRouter()
 
+_topic_registry = None
+
+
+def get_topic_registry():
+    """Registry is created on first use; loaded versions stay cached"""
+    global _topic_registry
+    if _topic_registry is None:
+        from config.settings import settings
+        from nlp_engine.topic_registry import TopicModelRegistry
+        _topic_registry = TopicModelRegistry(settings.topic_registry_path)
+    return _topic_registry
+
+
+_vector_index = None
+
+
+def get_vector_index():
+    """Index is loaded on first use and reloaded after the pipeline updates it"""
+    global _vector_index
+    if _vector_index is None or _vector_index.is_stale():
+        from config.settings import settings
+        from nlp_engine.vector_index import VectorIndex
+        _vector_index = VectorIndex(
+            settings.vector_index_path,
+            dtype=settings.embedding_store_dtype,
+            nprobe=settings.vector_index_nprobe
+        )
+    return _vector_index
+
+
+def get_opportunity_snapshots():
+    from config.database import db
+    from nlp_engine.opportunity_snapshots import SNAPSHOTS_COLLECTION, OpportunitySnapshots
+    return OpportunitySnapshots(db[SNAPSHOTS_COLLECTION])
+
+
+def _fetch_posts_by_id(post_ids: List[str]) -> dict:
+    from bson import ObjectId
+    from config.database import db
+    
+    keys = [ObjectId(i) if ObjectId.is_valid(i) else i for i in post_ids]
+    cursor = db["posts"].find(
+        {"_id": {"$in": keys}},
+        {
+            "post_id": 1, "subreddit": 1, "title": 1, "url": 1,
+            "score": 1, "num_comments": 1, "created_utc": 1,
+            "sentiment": 1, "topic_id": 1
+        }
+    )
+    return {str(doc.pop("_id")): doc for doc in cursor}
+
 
 @router.get("/posts")
 async def get_all_posts(
@@ -92,7 +146,7 @@ async def get_top_pain_points(
     
     # Sort by engagement score
     for point in pain_points:
-        point['engagement_score'] = point['score'] + (point['num_comments'] * 2)
+        point['engagement_score'] = point.get('score', 0) + (point.get('num_comments', 0) * 2)
     
     sorted_points = sorted(pain_points, key=lambda x: x['engagement_score'], reverse=True)
     
@@ -134,6 +188,73 @@ async def search(
     }
 
 
+@router.get("/search/semantic")
+def semantic_search(
+    q: str = Query(..., min_length=3, description="Pain statement to match"),
+    k: int = Query(10, ge=1, le=100),
+    subreddit: Optional[str] = Query(None, description="Filter by subreddit"),
+    since: Optional[datetime] = Query(None, description="Posts created at/after (UTC)"),
+    until: Optional[datetime] = Query(None, description="Posts created before (UTC)"),
+):
+    """
+    Find posts semantically similar to a query (MiniLM embeddings)
+    
+    Example:
+        GET /api/v1/search/semantic?q=no%20callbacks%20after%20applying&subreddit=developersIndia
+    """
+    from nlp_engine.topic_model import encode_documents
+    
+    index = get_vector_index()
+    hits = index.search(
+        encode_documents([q])[0],
+        k=k,
+        subreddit=subreddit,
+        since=since,
+        until=until
+    )
+    
+    posts = _fetch_posts_by_id([post_id for post_id, _ in hits])
+    
+    return {
+        "query": q,
+        "count": len(hits),
+        "results": [
+            {"id": post_id, "similarity": similarity, **posts.get(post_id, {})}
+            for post_id, similarity in hits
+        ]
+    }
+
+
+@router.get("/trends/bursts")
+def get_trend_bursts(
+    version: Optional[str] = Query(None, description="Topic model version (default: latest)"),
+    z_threshold: float = Query(3.0, ge=0),
+    min_count: int = Query(5, ge=1),
+):
+    """
+    Topics spiking in the newest time bucket, read from the trend counters
+    
+    Example:
+        GET /api/v1/trends/bursts?z_threshold=2.5
+    """
+    from config.database import db
+    from config.settings import settings
+    from nlp_engine.trend_counters import COUNTERS_COLLECTION, TopicTrendCounters
+    
+    version = version or settings.topic_model_version or get_topic_registry().latest_version()
+    if version is None:
+        raise HTTPException(status_code=404, detail="No topic model has been registered yet")
+    
+    counters = TopicTrendCounters(db[COUNTERS_COLLECTION], bucket=settings.trend_bucket)
+    bursts = counters.bursts(version, z_threshold=z_threshold, min_count=min_count)
+    
+    return {
+        "version": version,
+        "count": len(bursts),
+        "bursts": bursts
+    }
+
+
 @router.get("/subreddits")
 async def get_subreddits():
     """Get list of tracked subreddits"""
@@ -146,50 +267,160 @@ async def get_subreddits():
 
 
 @router.get("/opportunities")
-async def get_opportunities(
-    limit: int = Query(20, ge=1, le=100)
+def get_opportunities(
+    snapshot: Optional[str] = Query(None, description="Snapshot id (default: latest)"),
+    limit: int = Query(20, ge=1, le=100),
+    min_score: Optional[float] = Query(None, ge=0, le=1)
 ):
     """
-    Get business opportunities based on pain points
-    (Aggregated view of high-frequency pain points)
+    Ranked topic opportunities from the latest pipeline snapshot,
+    or from a named one
+    
+    Example:
+        GET /api/v1/opportunities?limit=10
+        GET /api/v1/opportunities?snapshot=s20260126-120000-1a2b3c4d
     """
-    pain_points = get_pain_points(limit=200, min_score=5)
+    snapshots = get_opportunity_snapshots()
+    result = snapshots.load(snapshot, limit=limit, min_score=min_score)
+    if result is None:
+        detail = f"Snapshot {snapshot} not found" if snapshot else "No opportunity snapshot stored yet"
+        raise HTTPException(status_code=404, detail=detail)
     
-    # Group by category
-    category_counts = {}
-    for point in pain_points:
-        cat = point.get('category', 'Other')
-        if cat not in category_counts:
-            category_counts[cat] = {
-                'category': cat,
-                'count': 0,
-                'total_score': 0,
-                'sample_posts': []
-            }
-        category_counts[cat]['count'] += 1
-        category_counts[cat]['total_score'] += point['score']
-        if len(category_counts[cat]['sample_posts']) < 3:
-            category_counts[cat]['sample_posts'].append({
-                'title': point['title'],
-                'score': point['score'],
-                'url': point['url']
-            })
-    
-    # Calculate opportunity score
-    opportunities = []
-    for cat, data in category_counts.items():
-        opportunities.append({
-            'category': cat,
-            'pain_points_count': data['count'],
-            'average_score': round(data['total_score'] / data['count'], 2),
-            'opportunity_score': round((data['count'] * data['total_score']) / 100, 2),
-            'sample_posts': data['sample_posts']
-        })
-    
-    # Sort by opportunity score
-    opportunities = sorted(opportunities, key=lambda x: x['opportunity_score'], reverse=True)
+    result["count"] = len(result["opportunities"])
+    return result
+
+
+@router.get("/opportunities/snapshots")
+def get_opportunity_snapshot_ids():
+    """List stored opportunity snapshots, newest first"""
+    snapshots = get_opportunity_snapshots().list_ids()
     
     return {
-        "count": len(opportunities[:limit]),
-        "opportunities": opportunities[:limit]
-    }
\ No newline at end of file
+        "latest": snapshots[0] if snapshots else None,
+        "snapshots": snapshots
+    }
+
+
+@router.get("/opportunities/cube")
+def get_opportunity_cube(
+    profile: str = Query("default", description="Weight profile"),
+    slice_type: str = Query("all", description="all | subreddit | category | window"),
+    slice_value: str = Query("", alias="slice", description="Slice value, e.g. developersIndia or 30d"),
+    limit: int = Query(10, ge=1, le=100)
+):
+    """
+    Precomputed top opportunities for one slice, as stored by the pipeline
+    
+    Example:
+        GET /api/v1/opportunities/cube?profile=emerging&slice_type=subreddit&slice=developersIndia
+    """
+    from config.database import db
+    from nlp_engine.opportunity_cube import CUBE_COLLECTION, load_ranking
+    
+    ranking = load_ranking(db[CUBE_COLLECTION], profile, slice_type, slice_value)
+    if ranking is None:
+        raise HTTPException(status_code=404, detail="No ranking stored for this slice")
+    
+    ranking.pop("_id", None)
+    ranking["topics"] = ranking["topics"][:limit]
+    return ranking
+
+
+@router.get("/opportunities/cube/slices")
+def get_opportunity_slices():
+    """List the profiles and slices with stored rankings"""
+    from config.database import db
+    from nlp_engine.opportunity_cube import CUBE_COLLECTION, list_slices
+    from nlp_engine.scoring import WEIGHT_PROFILES
+    
+    return {
+        "profiles": WEIGHT_PROFILES,
+        "slices": list_slices(db[CUBE_COLLECTION])
+    }
+
+
+@router.get("/pipeline/runs")
+def get_pipeline_runs(limit: int = Query(10, ge=1, le=100)):
+    """Latest pipeline run reports, per-stage totals only"""
+    from config.database import db
+    from nlp_engine.instrumentation import RUNS_COLLECTION
+    
+    runs = list(
+        db[RUNS_COLLECTION]
+        .find({}, {"chunks": 0})
+        .sort("started_at", -1)
+        .limit(limit)
+    )
+    
+    return {"runs": runs, "count": len(runs)}
+
+
+@router.get("/pipeline/runs/{run_id}")
+def get_pipeline_run(run_id: str):
+    """Full report of one run, including per-chunk records"""
+    from config.database import db
+    from nlp_engine.instrumentation import RUNS_COLLECTION
+    
+    run = db[RUNS_COLLECTION].find_one({"_id": run_id})
+    if run is None:
+        raise HTTPException(status_code=404, detail="Pipeline run not found")
+    return run
+
+
+@router.get("/pipeline/metrics", response_class=PlainTextResponse)
+def get_pipeline_metrics():
+    """
+    Latest run in the Prometheus text format
+    
+    Example:
+        GET /api/v1/pipeline/metrics
+    """
+    from config.database import db
+    from nlp_engine.instrumentation import RUNS_COLLECTION, to_prometheus
+    
+    run = db[RUNS_COLLECTION].find_one({}, sort=[("started_at", -1)])
+    if run is None:
+        raise HTTPException(status_code=404, detail="No pipeline run recorded yet")
+    return to_prometheus(run)
+
+
+@router.get("/topics/models")
+async def get_topic_models():
+    """List registered topic model versions"""
+    registry = get_topic_registry()
+    
+    return {
+        "latest": registry.latest_version(),
+        "versions": registry.list_versions()
+    }
+
+
+@router.post("/topics/assign")
+def assign_topics(request: TopicAssignRequest):
+    """
+    Assign texts to topics of a registered model (default: latest)
+    
+    Example:
+        POST /api/v1/topics/assign
+        {"texts": ["no response after 200 applications"], "version": "v20260126-120000"}
+    """
+    from nlp_engine.topic_model import encode_documents
+    
+    try:
+        model_version = get_topic_registry().load(request.version)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    topics = model_version.assign(encode_documents(request.texts))
+    
+    return {
+        "version": model_version.version,
+        "results": [
+            {
+                "text": text,
+                "topic": topic,
+                "keywords": model_version.keywords.get(topic, [])[:5]
+            }
+            for text, topic in zip(request.texts, topics)
+        ]
+    }
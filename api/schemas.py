@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class TopicAssignRequest(BaseModel):
+    """Texts to assign to topics of a registered topic model"""
+    texts: List[str] = Field(..., min_length=1, max_length=500)
+    version: Optional[str] = None
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "texts": ["Applied to 200 companies and got no response"],
+                "version": "v20260126-120000"
+            }
+        }
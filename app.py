@@ -1,5 +1,13 @@
-from fastapi import FastAPI
-from run_pipeline import main as run_pipeline
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException, Query
+from nlp_engine.resources import registry
+from pipeline_jobs import launch, open_jobs
+
+# Register the sentiment and embedding loaders with this process's
+# registry; run_pipeline used to do it before runs moved to the worker
+import nlp_engine.sentiment  # noqa: F401
+import nlp_engine.topic_model  # noqa: F401
 
 app = FastAPI(title="Opportunity Discovery API")
 
@@ -9,10 +17,89 @@ def root():
     return {"status": "API is running"}
 
 
-@app.post("/run-pipeline")
-def run_nlp_pipeline():
+@app.get("/health")
+def health():
+    """
+    Reports whether each model is loaded (warm) or not yet (cold)
+    """
+    models = registry.status()
+    return {
+        "status": "ok",
+        "warm": all(m["state"] == "warm" for m in models.values()),
+        "models": models
+    }
+
+
+@app.post("/warmup")
+def warmup():
     """
-    Runs the full NLP pipeline and stores results in MongoDB
+    Loads every registered model so the first pipeline run doesn't pay for it
     """
-    run_pipeline()
-    return {"message": "Pipeline executed successfully"}
+    load_seconds = registry.warmup()
+    return {"message": "Models loaded", "load_seconds": load_seconds}
+
+
+@app.post("/run-pipeline", status_code=202)
+def run_nlp_pipeline(
+    refit: bool = Query(False, description="Force a full topic refit"),
+    limit: Optional[int] = Query(None, ge=0, description="Max posts (0 = whole corpus)"),
+    incremental: Optional[bool] = Query(None, description="Only posts since the last run")
+):
+    """
+    Queues a pipeline run in a background worker process and returns its
+    job id at once. While a run is queued or running, further requests
+    get that job back instead of starting another one.
+    """
+    jobs = open_jobs()
+    job, created = jobs.submit({
+        "force_refit": refit,
+        "limit": limit,
+        "incremental": incremental
+    })
+
+    if created:
+        try:
+            launch(job["_id"])
+        except Exception as e:
+            jobs.finish(job["_id"], "failed", {"error": repr(e)})
+            raise HTTPException(status_code=500, detail="Could not start pipeline worker")
+
+    return {
+        "job_id": job["_id"],
+        "status": job["status"],
+        "deduplicated": not created,
+        "status_url": f"/jobs/{job['_id']}"
+    }
+
+
+@app.get("/jobs")
+def list_jobs(limit: int = Query(20, ge=1, le=100)):
+    """Recent pipeline jobs, newest first"""
+    jobs = open_jobs().list(limit)
+    return {"count": len(jobs), "jobs": jobs}
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """
+    Status, progress (posts and chunks written) and per-stage timings of a job
+    """
+    job = open_jobs().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    """
+    Cancels a queued job, or asks a running one to stop after its current chunk
+    """
+    jobs = open_jobs()
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] not in ("queued", "running"):
+        raise HTTPException(status_code=409, detail=f"Job already {job['status']}")
+
+    return jobs.cancel(job_id)
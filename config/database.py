@@ -47,5 +47,25 @@ class Database:
         return cls.client[settings.mongodb_database]
 
 
-# Create database instance
-db = Database.get_database()
\ No newline at end of file
+class LazyCollection:
+    """Collection handle that resolves the connection on first use"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(Database.get_database()[self.name], attr)
+
+
+class LazyDatabase:
+    """Database handle that connects on first use instead of at import"""
+
+    def __getitem__(self, name: str) -> LazyCollection:
+        return LazyCollection(name)
+
+    def __getattr__(self, attr):
+        return getattr(Database.get_database(), attr)
+
+
+# Create database instance (connects lazily)
+db = LazyDatabase()
@@ -22,6 +22,74 @@ class Settings(BaseSettings):
     max_posts_per_subreddit: int = 200
     scrape_time_filter: str = "month"
 
+    # Pipeline
+    pipeline_limit: int = 500          # 0 = whole corpus
+    pipeline_chunk_size: int = 1000    # posts held in memory at a time
+    write_batch_size: int = 1000       # operations per bulk_write
+    write_max_retries: int = 3
+    pipeline_incremental: bool = False   # only posts since the watermark
+    pipeline_checkpoint_every: int = 5   # chunks between checkpoints
+    pipeline_until_lag_seconds: int = 300   # leave in-flight preprocessing to the next run
+    pipeline_concurrent: bool = True     # overlap stages across chunks
+    pipeline_queue_size: int = 2         # chunks buffered between stages
+    job_stale_seconds: int = 1800        # running job without heartbeat = lost
+    job_queued_stale_seconds: int = 120  # queued job its worker never started = lost
+    job_heartbeat_seconds: int = 60      # worker heartbeat interval
+
+    # Post storage
+    storage_backend: str = "mongo"      # mongo | parquet
+    storage_path: str = "post_store"    # parquet root (posts/, results/, topics/)
+
+    # Run metrics
+    metrics_memory: str = "rss"            # rss | tracemalloc | off
+    metrics_profile_stage: str = ""        # stage to cProfile, e.g. "sentiment"
+    metrics_profile_dir: str = "profiles"
+    metrics_report_path: str = ""          # JSON report file, "-" = stdout
+    metrics_prometheus_path: str = ""      # textfile collector output
+
+    # Sentiment
+    sentiment_backend: str = "torch"   # torch | torch_int8 | onnx
+    sentiment_mode: str = "transformer"   # transformer | cascade
+    sentiment_cascade_band: float = 0.6
+    sentiment_onnx_path: str = "models/sentiment.onnx"
+    sentiment_batch_size: int = 32
+    sentiment_max_tokens: int = 8192
+    sentiment_cache_enabled: bool = True
+    sentiment_cache_path: str = "sentiment_cache.sqlite3"
+    sentiment_cache_max_entries: int = 200000
+    sentiment_workers: int = 0              # 0 = score in-process
+    sentiment_threads_per_worker: int = 0   # 0 = split cores evenly
+
+    # Topic modeling
+    embedding_store_path: str = "embeddings"
+    embedding_store_dtype: str = "float32"   # float32 | float16
+    topic_mode: str = "batch"   # batch | incremental
+    topic_n_topics: int = 12
+    topic_state_path: str = "topic_state"
+    topic_drift_threshold: float = 0.25
+    topic_registry_path: str = "topic_models"
+    topic_registry_keep: int = 10
+    topic_model_version: str = ""   # pin a registered version, skip fitting
+    topic_fit_sample_size: int = 20000   # batch mode fits on a sample of the run
+
+    # Trends
+    trend_bucket: str = "week"   # hour | day | week
+    trend_window: int = 0        # 0 = all buckets, else the last N
+    trend_burst_z_threshold: float = 3.0
+    trend_burst_min_count: int = 5
+
+    # Opportunity scoring
+    opportunity_top_k: int = 10
+    opportunity_snapshot_keep: int = 0   # 0 = keep every snapshot
+
+    # Near-duplicate detection
+    dedup_enabled: bool = True
+    dedup_threshold: float = 0.8   # estimated Jaccard over word 3-grams
+
+    # Semantic search
+    vector_index_path: str = "vector_index"
+    vector_index_nprobe: int = 16
+
     class Config:
         env_file = ".env"
         case_sensitive = False
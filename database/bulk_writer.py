@@ -0,0 +1,147 @@
+import time
+from typing import List
+
+from pymongo.errors import BulkWriteError, ConnectionFailure, OperationFailure
+
+
+# Server error codes worth retrying (network blips, elections, timeouts)
+RETRYABLE_CODES = {
+    6,      # HostUnreachable
+    7,      # HostNotFound
+    50,     # MaxTimeMSExpired
+    89,     # NetworkTimeout
+    91,     # ShutdownInProgress
+    189,    # PrimarySteppedDown
+    262,    # ExceededTimeLimit
+    9001,   # SocketException
+    10107,  # NotWritablePrimary
+    11600,  # InterruptedAtShutdown
+    11602,  # InterruptedDueToReplStateChange
+    13435,  # NotPrimaryNoSecondaryOk
+    13436,  # NotPrimaryOrSecondary
+}
+
+
+def _is_transient(error: Exception) -> bool:
+    if isinstance(error, ConnectionFailure):
+        return True
+    if isinstance(error, OperationFailure):
+        return (
+            error.code in RETRYABLE_CODES or
+            error.has_error_label("RetryableWriteError")
+        )
+    return False
+
+
+class BulkWriter:
+    """
+    Buffers write operations and sends them as unordered bulk_write
+    batches instead of one round trip per document.
+
+    Transient failures are retried with exponential backoff: the whole
+    batch on connection errors, only the affected operations on per-op
+    write errors. Operations must therefore be idempotent ($set, not $inc).
+    report() returns written / failed / skipped counts for the run.
+    """
+
+    def __init__(
+        self,
+        collection,
+        batch_size: int = 1000,
+        max_retries: int = 3,
+        backoff: float = 0.5
+    ):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        self._ops: List = []
+        self.written = 0
+        self.failed = 0
+        self.skipped = 0
+        self.batches = 0
+        self.retries = 0
+        self.seconds = 0.0
+        self.errors: List[dict] = []
+
+    def add(self, operation):
+        self._ops.append(operation)
+        if len(self._ops) >= self.batch_size:
+            self.flush()
+
+    def skip(self, count: int = 1):
+        """Records documents deliberately left unwritten."""
+        self.skipped += count
+
+    def flush(self):
+        if not self._ops:
+            return
+
+        ops, self._ops = self._ops, []
+        start = time.perf_counter()
+        self._write(ops)
+        self.seconds += time.perf_counter() - start
+        self.batches += 1
+
+    def _write(self, ops: List):
+        attempt = 0
+
+        while ops:
+            try:
+                result = self.collection.bulk_write(ops, ordered=False)
+                self.written += len(ops)
+                return result
+
+            except BulkWriteError as e:
+                details = e.details
+                failed_ops = []
+
+                for error in details.get("writeErrors", []):
+                    if (
+                        error.get("code") in RETRYABLE_CODES and
+                        attempt < self.max_retries
+                    ):
+                        failed_ops.append(ops[error["index"]])
+                    else:
+                        self.failed += 1
+                        if len(self.errors) < 20:
+                            self.errors.append({
+                                "code": error.get("code"),
+                                "message": error.get("errmsg")
+                            })
+
+                errored = len(details.get("writeErrors", []))
+                self.written += len(ops) - errored
+                ops = failed_ops
+
+            except Exception as e:
+                if not _is_transient(e) or attempt >= self.max_retries:
+                    self.failed += len(ops)
+                    if len(self.errors) < 20:
+                        self.errors.append({"code": None, "message": str(e)})
+                    return None
+
+            if ops:
+                attempt += 1
+                self.retries += 1
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+
+        return None
+
+    def report(self) -> dict:
+        return {
+            "written": self.written,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "batches": self.batches,
+            "retries": self.retries,
+            "seconds": round(self.seconds, 3),
+            "errors": self.errors
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
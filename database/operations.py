@@ -1,13 +1,31 @@
-from pymongo import MongoClient
-from config.settings import settings
+import re
+from typing import List, Optional
 
-# Use settings.mongodb_uri and settings.mongodb_database
-client = MongoClient(settings.mongodb_uri, tls=True)
-db = client[settings.mongodb_database]
+from config.database import db
 
+# Resolved on first use (config.database connects lazily)
 posts_collection = db["posts"]
 pain_points_collection = db["pain_points"]
 
+# Raw Reddit fields the API returns; pipeline results stay internal
+POST_FIELDS = {
+    "_id": 0,
+    "post_id": 1,
+    "subreddit": 1,
+    "title": 1,
+    "content": 1,
+    "author": 1,
+    "score": 1,
+    "num_comments": 1,
+    "created_utc": 1,
+    "url": 1,
+    "category": 1,
+    "is_pain_point": 1,
+    "is_opportunity": 1,
+    "sentiment": 1,
+    "topic_id": 1
+}
+
 def save_posts(posts):
     if posts:
         try:
@@ -22,3 +40,71 @@ def save_pain_point(pain_point):
         print(f"✅ Saved pain point {pain_point.get('post_id', '')}")
     except Exception as e:
         print(f"❌ Error saving pain point: {e}")
+
+def get_posts(
+    limit: int = 100,
+    skip: int = 0,
+    subreddit: Optional[str] = None,
+    category: Optional[str] = None,
+    pain_points_only: bool = False
+) -> List[dict]:
+    """Newest posts first, optionally filtered"""
+    query = {}
+    if subreddit:
+        query["subreddit"] = subreddit
+    if category:
+        query["category"] = category
+    if pain_points_only:
+        query["is_pain_point"] = True
+
+    cursor = (
+        posts_collection.find(query, POST_FIELDS)
+        .sort("created_utc", -1)
+        .skip(skip)
+        .limit(limit)
+    )
+    return list(cursor)
+
+def get_pain_points(
+    limit: int = 100,
+    category: Optional[str] = None,
+    min_score: int = 0
+) -> List[dict]:
+    """Pain points with at least min_score upvotes, highest score first"""
+    query = {"score": {"$gte": min_score}}
+    if category:
+        query["category"] = category
+
+    cursor = (
+        pain_points_collection.find(query, {"_id": 0})
+        .sort("score", -1)
+        .limit(limit)
+    )
+    return list(cursor)
+
+def search_posts(query: str, limit: int = 50) -> List[dict]:
+    """Case-insensitive substring search over titles and content"""
+    pattern = {"$regex": re.escape(query), "$options": "i"}
+    cursor = posts_collection.find(
+        {"$or": [{"title": pattern}, {"content": pattern}]},
+        POST_FIELDS
+    ).limit(limit)
+    return list(cursor)
+
+def get_statistics() -> dict:
+    """Post and pain point totals, with post counts per subreddit and category"""
+    def counts_by(field: str) -> dict:
+        rows = posts_collection.aggregate([
+            {"$match": {field: {"$ne": None}}},
+            {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1}}
+        ])
+        return {row["_id"]: row["count"] for row in rows}
+
+    return {
+        "total_posts": posts_collection.count_documents({}),
+        "preprocessed_posts": posts_collection.count_documents({"preprocessed": True}),
+        "total_pain_points": pain_points_collection.count_documents({}),
+        "posts_by_subreddit": counts_by("subreddit"),
+        "posts_by_category": counts_by("category")
+    }
@@ -0,0 +1,117 @@
+from datetime import datetime
+from typing import Optional
+
+
+STATE_COLLECTION = "pipeline_state"
+
+
+def after_position(position: Optional[dict]) -> dict:
+    """
+    Query for posts strictly after a (preprocessed_at, _id) position in
+    the pipeline's scan order. Posts preprocessed before preprocessed_at
+    was recorded have it missing and sort first.
+    """
+
+    if position is None:
+        return {}
+
+    stamp, last_id = position["preprocessed_at"], position["_id"]
+
+    if stamp is None:
+        return {"$or": [
+            {"preprocessed_at": None, "_id": {"$gt": last_id}},
+            {"preprocessed_at": {"$ne": None}}
+        ]}
+
+    return {"$or": [
+        {"preprocessed_at": {"$gt": stamp}},
+        {"preprocessed_at": stamp, "_id": {"$gt": last_id}}
+    ]}
+
+
+def post_position(post: dict) -> dict:
+    return {"preprocessed_at": post.get("preprocessed_at"), "_id": post["_id"]}
+
+
+class PipelineState:
+    """
+    Watermark and checkpoint of the incremental pipeline, one document
+    per pipeline version (bumping the version starts from scratch).
+
+    The watermark is the last (preprocessed_at, _id) of a completed run.
+    While a run is in progress, the checkpoint records how far its
+    written-back chunks got, the upper bound it was started with, the
+    topic model it assigned to and the change its chunks made to the
+    aggregates so far, so a crashed run can pick up from there.
+
+    The aggregates are the per-topic and per-slice accumulators over
+    every processed post, as of the watermark; a run folds its delta
+    into them when it completes instead of re-reading stored results.
+    """
+
+    def __init__(self, collection, pipeline_version: str, name: str = "posts"):
+        self.collection = collection
+        self.pipeline_version = pipeline_version
+        self.state_id = f"{name}|{pipeline_version}"
+
+    def load(self) -> dict:
+        return self.collection.find_one({"_id": self.state_id}) or {}
+
+    def watermark(self) -> Optional[dict]:
+        return self.load().get("watermark")
+
+    def checkpoint(self) -> Optional[dict]:
+        return self.load().get("checkpoint")
+
+    def aggregates(self) -> Optional[dict]:
+        return self.load().get("aggregates")
+
+    def start(self, until: datetime) -> dict:
+        checkpoint = {
+            "started_at": datetime.utcnow(),
+            "until": until,
+            "position": self.watermark(),
+            "processed": 0,
+            "topic_model_version": None
+        }
+        self._set({"checkpoint": checkpoint})
+        return checkpoint
+
+    def save_checkpoint(
+        self,
+        position: dict,
+        processed: int,
+        topic_model_version: Optional[str],
+        delta: Optional[dict] = None
+    ):
+        self._set({
+            "checkpoint.position": position,
+            "checkpoint.processed": processed,
+            "checkpoint.topic_model_version": topic_model_version,
+            "checkpoint.delta": delta,
+            "checkpoint.saved_at": datetime.utcnow()
+        })
+
+    def complete(self, position: Optional[dict], aggregates: Optional[dict] = None):
+        """
+        Moves the watermark to the run's last position and stores the
+        aggregates as of it (if given), drops the checkpoint.
+        """
+        update = {"checkpoint": None, "completed_at": datetime.utcnow()}
+        if position is not None:
+            update["watermark"] = position
+        if aggregates is not None:
+            update["aggregates"] = aggregates
+        self._set(update)
+
+    def reset(self):
+        self.collection.delete_one({"_id": self.state_id})
+
+    def _set(self, fields: dict):
+        self.collection.update_one(
+            {"_id": self.state_id},
+            {
+                "$set": dict(fields, pipeline_version=self.pipeline_version)
+            },
+            upsert=True
+        )
@@ -0,0 +1,938 @@
+import os
+import time
+import uuid
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Iterator, List, Optional
+
+from pymongo import ReplaceOne, UpdateOne
+
+from database.bulk_writer import BulkWriter
+from database.pipeline_state import after_position
+
+
+STORAGE_BACKENDS = ("mongo", "parquet")
+
+# Topic-level results (trend, score), one document per topic and version
+TOPICS_COLLECTION = "topic_results"
+
+# Posts the pipeline processes
+POST_QUERY = {
+    "preprocessed": True,
+    "is_candidate": True,
+    "processed_text": {"$exists": True, "$ne": ""}
+}
+
+# Only what the pipeline reads; full documents carry the raw Reddit text
+POST_PROJECTION = {
+    "_id": 1,
+    "preprocessed_at": 1,
+    "processed_text": 1,
+    "created_utc": 1,
+    "subreddit": 1,
+    "category": 1,
+    "trend_counter": 1,
+    "sentiment": 1,
+    "title": 1,
+    "selftext": 1
+}
+
+# Earlier results read along with the posts, from results/ in Parquet
+RESULT_COLUMNS = ("trend_counter", "sentiment")
+
+# Per-post fields aggregate runs read back
+RESULT_FIELDS = ("topic_id", "sentiment", "created_utc", "subreddit", "category")
+
+
+# -----------------------------------------------------
+# MongoDB
+# -----------------------------------------------------
+
+class MongoResultWriter(BulkWriter):
+    """
+    Per-post results as $set updates on the posts themselves; topic-level
+    fields go to the topics collection instead of being copied onto
+    every post.
+    """
+
+    def __init__(self, collection, topics=None, **kwargs):
+        super().__init__(collection, **kwargs)
+        self.topics = BulkWriter(
+            topics if topics is not None else collection.database[TOPICS_COLLECTION],
+            **kwargs
+        )
+
+    def set(self, post: dict, fields: dict):
+        self.add(UpdateOne({"_id": post["_id"]}, {"$set": fields}))
+
+    def set_topics(self, topic_model_version: str, topics: Dict[int, dict]):
+        """Topic-level fields (trend, score), one document per topic."""
+        for topic, fields in topics.items():
+            self.topics.add(ReplaceOne(
+                {"_id": f"{topic_model_version}|{topic}"},
+                dict(
+                    fields,
+                    topic_model_version=topic_model_version,
+                    topic_id=topic,
+                    updated_at=datetime.utcnow()
+                ),
+                upsert=True
+            ))
+
+    def flush(self):
+        super().flush()
+        self.topics.flush()
+
+    def report(self) -> dict:
+        posts, topics = super().report(), self.topics.report()
+        report = {
+            key: posts[key] + topics[key]
+            for key in ("written", "failed", "skipped", "batches", "retries")
+        }
+        report["seconds"] = round(posts["seconds"] + topics["seconds"], 3)
+        report["errors"] = (posts["errors"] + topics["errors"])[:20]
+        return report
+
+
+class MongoPostStore:
+    """
+    The pipeline's input posts and per-post results, read from and
+    written back to the posts collection.
+
+    Every store offers the same methods: iter_chunks() streams the
+    projected posts to process, sample() draws a random subset of them,
+    writer() collects results (set, skip,
+    set_topics, flush, report), iter_results() reads them back and
+    counter_markers() reads the trend_counter of given posts.
+    """
+
+    name = "posts"
+
+    def __init__(
+        self,
+        collection,
+        write_batch_size: int = 1000,
+        max_retries: int = 3,
+        topics=None
+    ):
+        self.collection = collection
+        self.topics = (
+            topics if topics is not None else collection.database[TOPICS_COLLECTION]
+        )
+        self.write_batch_size = write_batch_size
+        self.max_retries = max_retries
+
+    def iter_chunks(
+        self,
+        chunk_size: int,
+        limit: Optional[int] = None,
+        after: Optional[dict] = None,
+        until: Optional[datetime] = None
+    ) -> Iterator[List[dict]]:
+        """
+        Streams projected posts in fixed-size chunks. Sorting on _id keeps
+        the order stable while earlier chunks are being written back.
+
+        With until set (incremental runs), only posts preprocessed after the
+        `after` position and no later than until are read, in
+        (preprocessed_at, _id) order so positions can be checkpointed.
+        """
+
+        query, sort = self._selection(after, until)
+
+        # Chunks are written back between reads, which can leave the
+        # cursor idle past the server's 10 minute timeout
+        cursor = (
+            self.collection.find(query, POST_PROJECTION, no_cursor_timeout=True)
+            .sort(sort)
+            .batch_size(chunk_size)
+        )
+        if limit:
+            cursor = cursor.limit(limit)
+
+        try:
+            while True:
+                chunk = list(islice(cursor, chunk_size))
+                if not chunk:
+                    return
+                yield chunk
+        finally:
+            cursor.close()
+
+    def _selection(self, after: Optional[dict], until: Optional[datetime]):
+        query = POST_QUERY
+        sort = [("_id", 1)]
+
+        if until is not None:
+            query = {"$and": [
+                POST_QUERY,
+                {"$or": [
+                    {"preprocessed_at": None},
+                    {"preprocessed_at": {"$lte": until}}
+                ]}
+            ]}
+            if after is not None:
+                query["$and"].append(after_position(after))
+            sort = [("preprocessed_at", 1), ("_id", 1)]
+
+        return query, sort
+
+    def sample(
+        self,
+        size: int,
+        limit: Optional[int] = None,
+        after: Optional[dict] = None,
+        until: Optional[datetime] = None
+    ) -> List[dict]:
+        """
+        Up to size posts drawn uniformly from what iter_chunks would
+        stream with the same arguments ({_id, processed_text, created_utc}).
+        """
+
+        query, sort = self._selection(after, until)
+
+        pipeline = [{"$match": query}]
+        if limit:
+            pipeline += [{"$sort": dict(sort)}, {"$limit": limit}]
+        pipeline += [
+            {"$sample": {"size": size}},
+            {"$project": {"_id": 1, "processed_text": 1, "created_utc": 1}}
+        ]
+        return list(self.collection.aggregate(pipeline, allowDiskUse=True))
+
+    def counter_markers(self, post_ids: List) -> Dict:
+        """post id -> stored trend_counter (None if uncounted)."""
+        return {
+            doc["_id"]: doc.get("trend_counter")
+            for doc in self.collection.find(
+                {"_id": {"$in": post_ids}}, {"trend_counter": 1}
+            )
+        }
+
+    def writer(self) -> MongoResultWriter:
+        return MongoResultWriter(
+            self.collection,
+            self.topics,
+            batch_size=self.write_batch_size,
+            max_retries=self.max_retries
+        )
+
+    def iter_results(
+        self,
+        pipeline_version: str,
+        topic_model_version: str,
+        chunk_size: int
+    ) -> Iterator[List[dict]]:
+        """Written-back canonical posts of one topic model version."""
+        cursor = self.collection.find(
+            {
+                "pipeline_version": pipeline_version,
+                "topic_model_version": topic_model_version,
+                "is_duplicate": False
+            },
+            {"_id": 0, **{field: 1 for field in RESULT_FIELDS}}
+        ).batch_size(chunk_size)
+
+        while True:
+            chunk = list(islice(cursor, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+
+# -----------------------------------------------------
+# Parquet / Arrow
+# -----------------------------------------------------
+
+def _posts_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("_id", pa.string()),
+        ("post_id", pa.string()),
+        ("title", pa.string()),
+        ("content", pa.string()),
+        ("selftext", pa.string()),
+        ("processed_text", pa.string()),
+        ("category", pa.string()),
+        ("created_utc", pa.timestamp("us")),
+        ("preprocessed_at", pa.timestamp("us")),
+        ("preprocessed", pa.bool_()),
+        ("is_candidate", pa.bool_()),
+        ("trend_counter", _counter_type()),
+        # Partition columns, stored in the directory names
+        ("subreddit", pa.string()),
+        ("date", pa.string())
+    ])
+
+
+def _counter_type():
+    import pyarrow as pa
+
+    return pa.struct([
+        ("topic_model_version", pa.string()),
+        ("bucket", pa.string()),
+        ("topic_id", pa.int64()),
+        ("key", pa.int64()),
+        ("ordinal", pa.int64())
+    ])
+
+
+def _results_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("_id", pa.string()),
+        ("seq", pa.int64()),
+        ("created_utc", pa.timestamp("us")),
+        ("subreddit", pa.string()),
+        ("category", pa.string()),
+        ("sentiment", pa.struct([
+            ("label", pa.string()),
+            ("compound", pa.float64())
+        ])),
+        ("topic_id", pa.int64()),
+        ("pipeline_version", pa.string()),
+        ("topic_model_version", pa.string()),
+        ("canonical_id", pa.string()),
+        ("is_duplicate", pa.bool_()),
+        ("trend_counter", _counter_type()),
+        ("updated_at", pa.timestamp("us"))
+    ])
+
+
+def _topics_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("topic_model_version", pa.string()),
+        ("topic_id", pa.int64()),
+        ("seq", pa.int64()),
+        ("trend", pa.float64()),
+        ("score", pa.float64()),
+        ("updated_at", pa.timestamp("us"))
+    ])
+
+
+def _write_part(table, directory: str, seq: int):
+    """One immutable part file, renamed into place once complete."""
+    import pyarrow.parquet as pq
+
+    os.makedirs(directory, exist_ok=True)
+    name = f"part-{seq:020d}.parquet"
+    # Datasets skip files starting with "_", so a crash leaves no half part
+    tmp_path = os.path.join(directory, f"_{name}.tmp")
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, os.path.join(directory, name))
+
+
+def latest_rows(table, keys: List[str]):
+    """
+    Last written row per key. Result parts are append-only, so a post
+    written twice has two rows; the higher seq wins.
+    """
+
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if table.num_rows == 0:
+        return table
+
+    order = pc.sort_indices(
+        table,
+        sort_keys=[(key, "ascending") for key in keys] + [("seq", "descending")]
+    )
+    table = table.take(order)
+
+    # Rows are grouped by key, newest first; keep each group's first row
+    repeated = np.ones(table.num_rows - 1, dtype=bool)
+    for key in keys:
+        values = table[key].to_numpy(zero_copy_only=False)
+        repeated &= values[1:] == values[:-1]
+    return table.filter(pa.array(np.concatenate([[True], ~repeated])))
+
+
+class ResultIndex:
+    """
+    The latest trend_counter and sentiment of every post with results,
+    kept compact: post ids as one fixed-width bytes array for binary
+    search, the struct fields as flat columns with their strings
+    dictionary-encoded. A few dozen bytes per post, where the results
+    table carries every row ever written.
+    """
+
+    def __init__(self, table):
+        import numpy as np
+        import pyarrow as pa
+
+        if table is None or table.num_rows == 0:
+            self.ids = np.empty(0, "S1")
+            self.table = None
+            return
+
+        ids = table["_id"].cast(pa.binary()).to_pylist()
+        self.ids = np.array(ids, dtype=f"S{max(len(i) for i in ids)}")
+        self.table = table.drop_columns(["_id", "seq"]).combine_chunks()
+
+    @staticmethod
+    def flatten(table):
+        """A results batch with its struct columns flattened, strings encoded."""
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        table = table.flatten()
+        for i, field in enumerate(table.schema):
+            if field.name != "_id" and pa.types.is_string(field.type):
+                table = table.set_column(
+                    i, field.name, pc.dictionary_encode(table[field.name])
+                )
+        return table
+
+    def attach(self, posts: List[dict]) -> List[dict]:
+        """Sets trend_counter and sentiment on posts (None without results)."""
+        import numpy as np
+
+        if self.table is None or not posts:
+            for post in posts:
+                post.update(dict.fromkeys(RESULT_COLUMNS))
+            return posts
+
+        width = self.ids.dtype.itemsize
+        keys = [str(post["_id"]).encode() for post in posts]
+        wanted = np.array(keys, dtype=self.ids.dtype)
+        rows = np.minimum(np.searchsorted(self.ids, wanted), len(self.ids) - 1)
+        found = (self.ids[rows] == wanted) & np.array([len(k) <= width for k in keys])
+
+        values = self.table.take(rows[found]).to_pylist()
+        for post, row in zip((p for p, f in zip(posts, found) if f), values):
+            for name in RESULT_COLUMNS:
+                fields = {
+                    key.split(".", 1)[1]: value
+                    for key, value in row.items()
+                    if key.startswith(name + ".")
+                }
+                post[name] = (
+                    fields if any(v is not None for v in fields.values()) else None
+                )
+        for post, f in zip(posts, found):
+            if not f:
+                post.update(dict.fromkeys(RESULT_COLUMNS))
+        return posts
+
+
+class ParquetResultWriter:
+    """
+    Buffers per-post results and writes each batch as a Parquet part
+    under results/; topic-level fields go to topics/ instead of being
+    copied onto every post. Same report() shape as BulkWriter.
+    """
+
+    def __init__(self, root: str, batch_size: int = 1000):
+        self.results_dir = os.path.join(root, "results")
+        self.topics_dir = os.path.join(root, "topics")
+        self.batch_size = batch_size
+
+        self._rows: List[dict] = []
+        self.written = 0
+        self.skipped = 0
+        self.batches = 0
+        self.seconds = 0.0
+
+    def set(self, post: dict, fields: dict):
+        row = dict(
+            fields,
+            _id=str(post["_id"]),
+            created_utc=post.get("created_utc"),
+            subreddit=post.get("subreddit"),
+            category=post.get("category")
+        )
+        if "canonical_id" in row:
+            row["canonical_id"] = str(row["canonical_id"])
+        self._rows.append(row)
+
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def skip(self, count: int = 1):
+        self.skipped += count
+
+    def set_topics(self, topic_model_version: str, topics: Dict[int, dict]):
+        import pyarrow as pa
+
+        if not topics:
+            return
+
+        seq = time.time_ns()
+        table = pa.Table.from_pylist(
+            [
+                dict(
+                    fields,
+                    topic_model_version=topic_model_version,
+                    topic_id=topic,
+                    seq=seq,
+                    updated_at=datetime.utcnow()
+                )
+                for topic, fields in topics.items()
+            ],
+            schema=_topics_schema()
+        )
+        _write_part(table, self.topics_dir, seq)
+        self.written += len(topics)
+        self.batches += 1
+
+    def flush(self):
+        import pyarrow as pa
+
+        if not self._rows:
+            return
+
+        start = time.perf_counter()
+        seq = time.time_ns()
+        for row in self._rows:
+            row["seq"] = seq
+
+        _write_part(
+            pa.Table.from_pylist(self._rows, schema=_results_schema()),
+            self.results_dir,
+            seq
+        )
+        self.written += len(self._rows)
+        self.batches += 1
+        self.seconds += time.perf_counter() - start
+        self._rows = []
+
+    def report(self) -> dict:
+        return {
+            "written": self.written,
+            "failed": 0,
+            "skipped": self.skipped,
+            "batches": self.batches,
+            "retries": 0,
+            "seconds": round(self.seconds, 3),
+            "errors": []
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+
+
+class ParquetPostStore:
+    """
+    Posts and results as Parquet on local disk, for backfills and
+    experiments that should not touch the cluster.
+
+    posts/ is partitioned by subreddit and day (hive layout), so filters
+    on either skip whole directories. Files are memory-mapped: column
+    reads (read_columns) hand out Arrow buffers straight from the page
+    cache, posts are scanned with the filter pushed down, and only the
+    chunk being processed is turned into dicts.
+    Results are append-only parts; the latest row per post wins, which
+    gives the same re-run semantics as the $set write-back.
+    """
+
+    name = "parquet"
+
+    def __init__(self, root: str, write_batch_size: int = 1000):
+        self.root = root
+        self.posts_dir = os.path.join(root, "posts")
+        self.results_dir = os.path.join(root, "results")
+        self.topics_dir = os.path.join(root, "topics")
+        self.write_batch_size = write_batch_size
+
+    def _dataset(self, directory: str, schema=None):
+        import pyarrow.dataset as ds
+        from pyarrow import fs
+
+        return ds.dataset(
+            directory,
+            schema=schema,
+            format="parquet",
+            partitioning="hive" if directory == self.posts_dir else None,
+            filesystem=fs.LocalFileSystem(use_mmap=True)
+        )
+
+    def _table(self, directory: str, schema, columns=None, filter=None):
+        if not os.path.isdir(directory):
+            return schema.empty_table().select(columns or schema.names)
+        return self._dataset(directory, schema).to_table(
+            columns=columns, filter=filter
+        )
+
+    def read_columns(self, columns: List[str], filter=None):
+        """
+        Arrow table of a few post columns, e.g. processed_text and
+        created_utc; numeric and timestamp columns convert to numpy
+        without copying (column.to_numpy(zero_copy_only=True) per chunk).
+        """
+        return self._table(self.posts_dir, _posts_schema(), columns, filter)
+
+    def iter_chunks(
+        self,
+        chunk_size: int,
+        limit: Optional[int] = None,
+        after: Optional[dict] = None,
+        until: Optional[datetime] = None
+    ) -> Iterator[List[dict]]:
+        """
+        Same posts as MongoPostStore.iter_chunks, streamed with the filter
+        pushed down into the scan, so only a chunk of posts is in memory.
+
+        Full runs come in file order: nothing is checkpointed there, and
+        results do not go back into the files being read. Incremental
+        runs (until set) come in (preprocessed_at, _id) order with the
+        same positions as Mongo: a first pass reads the key columns of
+        the matching posts and sorts (fragment, row) pairs, then every
+        chunk reads its rows from the few files they are in.
+
+        trend_counter and sentiment come from a ResultIndex of the
+        latest results, built once per stream.
+        """
+        import pyarrow as pa
+
+        if not os.path.isdir(self.posts_dir):
+            return
+
+        dataset = self._dataset(self.posts_dir, _posts_schema())
+        condition, sort = self._selection(after, until)
+        columns = [name for name in POST_PROJECTION if name not in RESULT_COLUMNS]
+        results = self._result_index()
+
+        if until is None:
+            buffered, rows = [], 0
+            scanner = dataset.scanner(
+                columns=columns, filter=condition, batch_size=chunk_size
+            )
+            for batch in scanner.to_batches():
+                if limit:
+                    batch = batch.slice(0, limit - rows)
+                buffered.append(batch)
+                rows += batch.num_rows
+
+                while sum(b.num_rows for b in buffered) >= chunk_size:
+                    table = pa.Table.from_batches(buffered)
+                    yield results.attach(table.slice(0, chunk_size).to_pylist())
+                    buffered = table.slice(chunk_size).to_batches()
+
+                if limit and rows >= limit:
+                    break
+
+            if buffered and sum(b.num_rows for b in buffered):
+                yield results.attach(pa.Table.from_batches(buffered).to_pylist())
+            return
+
+        fragments, fragment_ids, row_ids = self._ordered_rows(
+            dataset, condition, sort, limit
+        )
+        for offset in range(0, len(row_ids), chunk_size):
+            chunk = self._fetch(
+                dataset,
+                fragments,
+                fragment_ids[offset:offset + chunk_size],
+                row_ids[offset:offset + chunk_size],
+                columns
+            )
+            yield results.attach(chunk.to_pylist())
+
+    def _ordered_rows(self, dataset, condition, sort, limit: Optional[int] = None):
+        """
+        (fragments, fragment ids, row ids) of the posts matching condition,
+        in sort order; the sort keys are only held while sorting.
+        """
+        import numpy as np
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        fragments = list(dataset.get_fragments(filter=condition))
+        filter_columns = [
+            "_id", "preprocessed", "is_candidate", "processed_text", "preprocessed_at"
+        ]
+
+        keys = []
+        for number, fragment in enumerate(fragments):
+            table = fragment.to_table(schema=dataset.schema, columns=filter_columns)
+            table = table.append_column(
+                "row", pa.array(np.arange(table.num_rows, dtype=np.int32))
+            )
+            table = table.filter(condition).select(["_id", "preprocessed_at", "row"])
+            keys.append(table.append_column(
+                "fragment", pa.array(np.full(table.num_rows, number, np.int32))
+            ))
+
+        if not keys:
+            empty = np.empty(0, np.int32)
+            return fragments, empty, empty
+
+        keys = pa.concat_tables(keys)
+        order = pc.sort_indices(keys, sort_keys=sort, null_placement="at_start")
+        if limit:
+            order = order[:limit]
+        keys = keys.select(["fragment", "row"]).take(order)
+
+        return (
+            fragments,
+            keys["fragment"].to_numpy(),
+            keys["row"].to_numpy()
+        )
+
+    def _fetch(self, dataset, fragments, fragment_ids, row_ids, columns):
+        """Rows by (fragment, row), in the order given."""
+        import numpy as np
+        import pyarrow as pa
+
+        parts = []
+        positions = np.empty(len(row_ids), np.int64)
+        offset = 0
+        for number in np.unique(fragment_ids):
+            members = np.flatnonzero(fragment_ids == number)
+            table = fragments[number].to_table(schema=dataset.schema, columns=columns)
+            parts.append(table.take(pa.array(row_ids[members])))
+            positions[members] = offset + np.arange(len(members))
+            offset += len(members)
+
+        if not parts:
+            return _posts_schema().empty_table().select(columns)
+        return pa.concat_tables(parts).take(pa.array(positions))
+
+    def _selection(self, after: Optional[dict], until: Optional[datetime]):
+        import pyarrow.dataset as ds
+
+        condition = (
+            (ds.field("preprocessed") == True)   # noqa: E712
+            & (ds.field("is_candidate") == True)   # noqa: E712
+            & ds.field("processed_text").is_valid()
+            & (ds.field("processed_text") != "")
+        )
+        sort = [("_id", "ascending")]
+
+        if until is not None:
+            stamp = ds.field("preprocessed_at")
+            condition &= ~stamp.is_valid() | (stamp <= until)
+            if after is not None:
+                condition &= self._after(after)
+            sort = [("preprocessed_at", "ascending"), ("_id", "ascending")]
+
+        return condition, sort
+
+    def sample(
+        self,
+        size: int,
+        limit: Optional[int] = None,
+        after: Optional[dict] = None,
+        until: Optional[datetime] = None
+    ) -> List[dict]:
+        """
+        Same as MongoPostStore.sample, over the posts iter_chunks would
+        stream; only the sampled rows are kept.
+        """
+        import numpy as np
+        import pyarrow as pa
+
+        columns = ["_id", "processed_text", "created_utc"]
+        if not os.path.isdir(self.posts_dir):
+            return []
+
+        dataset = self._dataset(self.posts_dir, _posts_schema())
+        condition, sort = self._selection(after, until)
+        rng = np.random.default_rng()
+
+        if until is not None:
+            fragments, fragment_ids, row_ids = self._ordered_rows(
+                dataset, condition, sort, limit
+            )
+            picked = np.sort(rng.choice(len(row_ids), min(size, len(row_ids)), replace=False))
+            return self._fetch(
+                dataset, fragments, fragment_ids[picked], row_ids[picked], columns
+            ).to_pylist()
+
+        total = dataset.count_rows(filter=condition)
+        if limit:
+            total = min(total, limit)
+        picked = np.sort(rng.choice(total, min(size, total), replace=False))
+
+        sampled, offset = [], 0
+        for batch in dataset.scanner(columns=columns, filter=condition).to_batches():
+            if offset >= total:
+                break
+            rows = picked[(picked >= offset) & (picked < offset + batch.num_rows)]
+            if len(rows):
+                sampled.append(batch.take(pa.array(rows - offset)))
+            offset += batch.num_rows
+
+        return pa.Table.from_batches(sampled).to_pylist() if sampled else []
+
+    def _after(self, position: dict):
+        import pyarrow.dataset as ds
+
+        stamp, last_id = position["preprocessed_at"], str(position["_id"])
+        field = ds.field("preprocessed_at")
+        later_id = ds.field("_id") > last_id
+
+        if stamp is None:
+            return (~field.is_valid() & later_id) | field.is_valid()
+        return (field > stamp) | ((field == stamp) & later_id)
+
+    def _result_index(self) -> "ResultIndex":
+        """Latest trend_counter and sentiment per post, scanned batch by batch."""
+        import pyarrow as pa
+
+        if not os.path.isdir(self.results_dir):
+            return ResultIndex(None)
+
+        scanner = self._dataset(self.results_dir, _results_schema()).scanner(
+            columns=["_id", "seq", *RESULT_COLUMNS]
+        )
+        parts = [
+            ResultIndex.flatten(pa.Table.from_batches([batch]))
+            for batch in scanner.to_batches()
+        ]
+        if not parts:
+            return ResultIndex(None)
+        return ResultIndex(latest_rows(pa.concat_tables(parts), ["_id"]))
+
+    def counter_markers(self, post_ids: List) -> Dict:
+        """post id -> trend_counter of its latest result (None if uncounted)."""
+        import pyarrow.dataset as ds
+
+        results = latest_rows(
+            self._table(
+                self.results_dir,
+                _results_schema(),
+                ["_id", "seq", "trend_counter"],
+                ds.field("_id").isin([str(post_id) for post_id in post_ids])
+            ),
+            ["_id"]
+        )
+        return dict(zip(
+            results["_id"].to_pylist(), results["trend_counter"].to_pylist()
+        ))
+
+    def writer(self) -> ParquetResultWriter:
+        return ParquetResultWriter(self.root, batch_size=self.write_batch_size)
+
+    def iter_results(
+        self,
+        pipeline_version: str,
+        topic_model_version: str,
+        chunk_size: int
+    ) -> Iterator[List[dict]]:
+        import pyarrow.compute as pc
+
+        results = latest_rows(
+            self._table(self.results_dir, _results_schema()), ["_id"]
+        )
+        results = results.filter(
+            (pc.field("pipeline_version") == pipeline_version)
+            & (pc.field("topic_model_version") == topic_model_version)
+            & (pc.field("is_duplicate") == False)   # noqa: E712
+        ).select(list(RESULT_FIELDS))
+
+        for batch in results.to_batches(max_chunksize=chunk_size):
+            yield batch.to_pylist()
+
+    def topic_results(self):
+        """Latest (topic_model_version, topic_id, trend, score) rows."""
+        return latest_rows(
+            self._table(self.topics_dir, _topics_schema()),
+            ["topic_model_version", "topic_id"]
+        )
+
+
+# -----------------------------------------------------
+# Mongo <-> Parquet
+# -----------------------------------------------------
+
+def export_posts(
+    collection,
+    root: str,
+    query: Optional[dict] = None,
+    batch_size: int = 10000
+) -> int:
+    """Copies posts from Mongo into root/posts, partitioned by subreddit and day."""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    schema = _posts_schema()
+    fields = [name for name in schema.names if name != "date"]
+    partitioning = ds.partitioning(
+        pa.schema([("subreddit", pa.string()), ("date", pa.string())]),
+        flavor="hive"
+    )
+    token = uuid.uuid4().hex[:8]
+
+    cursor = collection.find(
+        query or {}, {name: 1 for name in fields}
+    ).batch_size(batch_size)
+
+    exported = 0
+    part = 0
+    while True:
+        docs = list(islice(cursor, batch_size))
+        if not docs:
+            return exported
+
+        rows = []
+        for doc in docs:
+            row = {name: doc.get(name) for name in fields}
+            row["_id"] = str(doc["_id"])
+            created = row["created_utc"]
+            row["date"] = created.strftime("%Y-%m-%d") if isinstance(created, datetime) else None
+            rows.append(row)
+
+        ds.write_dataset(
+            pa.Table.from_pylist(rows, schema=schema),
+            os.path.join(root, "posts"),
+            format="parquet",
+            partitioning=partitioning,
+            basename_template=f"part-{token}-{part}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore"
+        )
+        exported += len(rows)
+        part += 1
+
+
+def _mongo_id(value: str):
+    from bson import ObjectId
+
+    return ObjectId(value) if ObjectId.is_valid(value) else value
+
+
+def import_results(
+    root: str,
+    collection,
+    batch_size: int = 1000,
+    max_retries: int = 3
+) -> dict:
+    """Writes the latest per-post and per-topic results back into Mongo."""
+    store = ParquetPostStore(root)
+    results = latest_rows(
+        store._table(store.results_dir, _results_schema()), ["_id"]
+    ).drop_columns(["seq", "created_utc", "subreddit", "category"])
+    topics = store.topic_results()
+
+    with MongoResultWriter(
+        collection, batch_size=batch_size, max_retries=max_retries
+    ) as writer:
+        for batch in results.to_batches(max_chunksize=batch_size):
+            for row in batch.to_pylist():
+                post_id = _mongo_id(row.pop("_id"))
+                if row.get("canonical_id") is not None:
+                    row["canonical_id"] = _mongo_id(row["canonical_id"])
+                # Posts dropped to topic -1 only had their counter cleared
+                if row["topic_id"] is None:
+                    row = {"trend_counter": None}
+                writer.set({"_id": post_id}, row)
+
+        by_version: Dict[str, Dict[int, dict]] = {}
+        for row in topics.to_pylist():
+            by_version.setdefault(row["topic_model_version"], {})[row["topic_id"]] = {
+                "trend": row["trend"],
+                "score": row["score"]
+            }
+        for version, version_topics in by_version.items():
+            writer.set_topics(version, version_topics)
+
+    return writer.report()
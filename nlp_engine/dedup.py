@@ -0,0 +1,321 @@
+import threading
+import zlib
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+# -----------------------------------------------------
+# MinHash Configuration
+# -----------------------------------------------------
+
+SHINGLE_SIZE = 3
+NUM_PERM = 128
+NUM_BANDS = 16          # 16 bands x 8 rows: candidate threshold ~0.71
+THRESHOLD = 0.8
+
+# Universal hashing (a * x + b) mod p with p < 2**32, so a * x + b fits
+# in uint64 without overflow
+_PRIME = np.uint64(4294967291)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+
+
+def _permutations(num_perm: int, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, int(_PRIME), num_perm, dtype=np.uint64)
+    b = rng.integers(0, int(_PRIME), num_perm, dtype=np.uint64)
+    return a, b
+
+
+def shingle_hashes(text: str, size: int = SHINGLE_SIZE) -> np.ndarray:
+    """Stable 32-bit hashes of the word `size`-grams of a text."""
+    tokens = text.split()
+    if not tokens:
+        return np.empty(0, np.uint64)
+
+    token_hashes = np.fromiter(
+        (zlib.crc32(t.encode("utf-8")) for t in tokens),
+        dtype=np.uint64,
+        count=len(tokens)
+    )
+
+    # Texts shorter than one shingle are hashed as a single shingle
+    if len(tokens) < size:
+        size = len(tokens)
+
+    # Polynomial combine of consecutive token hashes, kept below 2**32
+    combined = np.zeros(len(tokens) - size + 1, np.uint64)
+    for offset in range(size):
+        combined = (combined * np.uint64(1000003) +
+                    token_hashes[offset:len(tokens) - size + 1 + offset]) & _MAX_HASH
+
+    return np.unique(combined)
+
+
+def _order_key(value) -> float:
+    """
+    Seconds since the epoch for an order value: naive datetimes are UTC,
+    aware ones are converted, numbers are taken as epoch seconds.
+    Anything else (missing) sorts after every dated value.
+    """
+
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return float("inf")
+
+
+# -----------------------------------------------------
+# Near-Duplicate Detection
+# -----------------------------------------------------
+
+class MinHashDeduplicator:
+    """
+    Groups near-duplicate texts with MinHash signatures and LSH banding.
+
+    Each text's word shingles are reduced to a NUM_PERM-value signature.
+    Signatures are split into bands; texts sharing any band bucket become
+    candidates, and candidates whose estimated Jaccard similarity reaches
+    the threshold are merged (union-find) into one cluster.
+    """
+
+    def __init__(
+        self,
+        threshold: float = THRESHOLD,
+        num_perm: int = NUM_PERM,
+        bands: int = NUM_BANDS,
+        shingle_size: int = SHINGLE_SIZE
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self._a, self._b = _permutations(num_perm)
+
+    def signature(self, text: str) -> np.ndarray:
+        shingles = shingle_hashes(text, self.shingle_size)
+        if len(shingles) == 0:
+            return np.full(self.num_perm, _MAX_HASH, np.uint64)
+
+        hashed = (np.outer(shingles, self._a) + self._b) % _PRIME
+        return hashed.min(axis=0)
+
+    def signatures(self, texts: List[str]) -> np.ndarray:
+        return np.vstack([self.signature(t) for t in texts]) if texts else (
+            np.empty((0, self.num_perm), np.uint64)
+        )
+
+    def canonical_indices(
+        self,
+        texts: List[str],
+        order: Optional[List] = None
+    ) -> List[int]:
+        """
+        For each text, the index of its cluster's canonical text.
+
+        The canonical member is the one with the smallest `order` key
+        (e.g. created_utc; datetimes and epoch numbers may be mixed),
+        falling back to the first occurrence when keys tie or are
+        missing. Empty texts are never merged.
+        """
+
+        return self._canonical(texts, self.signatures(texts), order)
+
+    def _canonical(
+        self,
+        texts: List[str],
+        signatures: np.ndarray,
+        order: Optional[List] = None
+    ) -> List[int]:
+        n = len(texts)
+        parent = list(range(n))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        non_empty = [i for i, t in enumerate(texts) if t.strip()]
+
+        for band in range(self.bands):
+            band_slice = signatures[:, band * self.rows:(band + 1) * self.rows]
+            buckets = defaultdict(list)
+            for i in non_empty:
+                buckets[band_slice[i].tobytes()].append(i)
+
+            for members in buckets.values():
+                if len(members) < 2:
+                    continue
+
+                # Compare against one representative per cluster already
+                # seen in this bucket rather than every pair
+                reps = [members[0]]
+                for other in members[1:]:
+                    for rep in reps:
+                        root_a, root_b = find(rep), find(other)
+                        if root_a == root_b:
+                            break
+                        similarity = np.mean(signatures[rep] == signatures[other])
+                        if similarity >= self.threshold:
+                            parent[root_b] = root_a
+                            break
+                    else:
+                        reps.append(other)
+
+        keys = (
+            [_order_key(value) for value in order]
+            if order is not None else [0.0] * n
+        )
+        canonical = {}
+        for i in range(n):
+            root = find(i)
+            best = canonical.get(root)
+            if best is None or (keys[i], i) < (keys[best], best):
+                canonical[root] = i
+
+        return [canonical[find(i)] for i in range(n)]
+
+
+# -----------------------------------------------------
+# Near-Duplicates Across Chunks
+# -----------------------------------------------------
+
+class StreamingDeduplicator:
+    """
+    Near-duplicate detection over a corpus streamed in chunks.
+
+    Within a chunk, texts are grouped as by MinHashDeduplicator. The
+    canonical text of every group is then looked up in an LSH index of
+    the canonical texts of earlier chunks; a match makes the whole group
+    a duplicate of that earlier post, which was already processed. Groups
+    without a match are indexed under a new row.
+
+    The index keeps, per canonical post, its band keys, its signature
+    (uint32) and, once record() is called, its topic and sentiment, so a
+    later duplicate can inherit them: about 4 * (num_perm + 6 * bands)
+    bytes per post, never the texts. add() and record() may run in
+    different threads.
+    """
+
+    def __init__(
+        self,
+        threshold: float = THRESHOLD,
+        num_perm: int = NUM_PERM,
+        bands: int = NUM_BANDS,
+        shingle_size: int = SHINGLE_SIZE
+    ):
+        self.minhash = MinHashDeduplicator(threshold, num_perm, bands, shingle_size)
+        self.ids: List = []
+
+        self._buckets = [dict() for _ in range(bands)]
+        self._signatures = np.empty((1024, num_perm), np.uint32)
+        self._topics = np.full(1024, -1, np.int64)
+        self._compounds = np.zeros(1024, np.float64)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _band_keys(self, signature: np.ndarray) -> List[int]:
+        rows = self.minhash.rows
+        return [
+            hash(signature[band * rows:(band + 1) * rows].tobytes())
+            for band in range(self.minhash.bands)
+        ]
+
+    def _grow(self, needed: int):
+        capacity = len(self._topics)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+
+        signatures = np.empty((capacity, self.minhash.num_perm), np.uint32)
+        signatures[:len(self.ids)] = self._signatures[:len(self.ids)]
+        topics = np.full(capacity, -1, np.int64)
+        topics[:len(self.ids)] = self._topics[:len(self.ids)]
+        compounds = np.zeros(capacity, np.float64)
+        compounds[:len(self.ids)] = self._compounds[:len(self.ids)]
+
+        self._signatures, self._topics, self._compounds = signatures, topics, compounds
+
+    def _lookup(self, signature: np.ndarray, band_keys: List[int]) -> Optional[int]:
+        """Earliest indexed row similar enough to the signature."""
+        candidates = sorted({
+            row
+            for band, key in enumerate(band_keys)
+            for row in [self._buckets[band].get(key)]
+            if row is not None
+        })
+        for row in candidates:
+            similarity = np.mean(self._signatures[row] == signature)
+            if similarity >= self.minhash.threshold:
+                return row
+        return None
+
+    def add(
+        self,
+        ids: List,
+        texts: List[str],
+        order: Optional[List] = None
+    ) -> Tuple[List[int], Dict[int, int], Dict[int, int]]:
+        """
+        Deduplicates one chunk. Returns (canonical, earlier, rows):
+        canonical[i] is the index of post i's canonical post within the
+        chunk; earlier maps posts whose group duplicates an earlier chunk
+        to that post's row; rows maps each newly indexed canonical post
+        to its row, for record().
+        """
+
+        signatures = self.minhash.signatures(texts)
+        canonical = self.minhash._canonical(texts, signatures, order)
+
+        with self._lock:
+            matched: Dict[int, Optional[int]] = {}
+            rows: Dict[int, int] = {}
+
+            for c in sorted(set(canonical)):
+                if not texts[c].strip():
+                    continue
+
+                signature = signatures[c].astype(np.uint32)
+                band_keys = self._band_keys(signature)
+                row = self._lookup(signature, band_keys)
+                if row is not None:
+                    matched[c] = row
+                    continue
+
+                row = len(self.ids)
+                self._grow(row + 1)
+                self._signatures[row] = signature
+                self.ids.append(ids[c])
+                for band, key in enumerate(band_keys):
+                    self._buckets[band].setdefault(key, row)
+                rows[c] = row
+
+        earlier = {
+            i: matched[c] for i, c in enumerate(canonical) if c in matched
+        }
+        return canonical, earlier, rows
+
+    def record(self, rows: Dict[int, int], topics: Dict[int, int], compounds: Dict[int, float]):
+        """Stores the results of newly indexed canonical posts (by chunk index)."""
+        with self._lock:
+            for i, row in rows.items():
+                self._topics[row] = topics[i]
+                self._compounds[row] = compounds[i]
+
+    def result(self, row: int) -> Tuple[object, int, float]:
+        """(post id, topic, sentiment compound) of an indexed post."""
+        with self._lock:
+            return self.ids[row], int(self._topics[row]), float(self._compounds[row])
@@ -0,0 +1,250 @@
+import hashlib
+import json
+import os
+from typing import Callable, List
+
+import numpy as np
+
+
+# -----------------------------------------------------
+# Store Configuration
+# -----------------------------------------------------
+
+DEFAULT_STORE_DIR = "embeddings"
+DEFAULT_MODEL_NAME = "all-MiniLM-L6-v2"
+EMBEDDING_DIM = 384
+INITIAL_CAPACITY = 1024
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+# -----------------------------------------------------
+# Memory-Mapped Embedding Store
+# -----------------------------------------------------
+
+class EmbeddingStore:
+    """
+    Persistent post embeddings in one contiguous memory-mapped matrix.
+
+    vectors.npy holds a (capacity, dim) float32/float16 matrix; ids.log
+    is an append-only log of [post id, row, text hash] lines, replayed
+    into the id -> row map on open (the last line per id wins). A post is
+    only re-encoded when it is new or its text hash changed, in which
+    case its row is overwritten. The file grows by doubling, so appends
+    stay amortised O(1), and a flush only appends the lines added since
+    the previous one. index.json is a small header recording how much of
+    the log is committed; a torn tail left by a crash is ignored on open
+    and overwritten by the next flush.
+    """
+
+    def __init__(
+        self,
+        directory: str = DEFAULT_STORE_DIR,
+        model_name: str = DEFAULT_MODEL_NAME,
+        dim: int = EMBEDDING_DIM,
+        dtype: str = "float32"
+    ):
+        self.directory = directory
+        self.model_name = model_name
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+
+        self.vectors_path = os.path.join(directory, "vectors.npy")
+        self.index_path = os.path.join(directory, "index.json")
+        self.log_path = os.path.join(directory, "ids.log")
+
+        os.makedirs(directory, exist_ok=True)
+
+        self.index = {}
+        self.count = 0
+        self._log_size = 0
+        self._pending: List[list] = []
+
+        if os.path.exists(self.index_path) and os.path.exists(self.vectors_path):
+            self._load()
+        else:
+            self.vectors = self._create(INITIAL_CAPACITY)
+
+    def _load(self):
+        with open(self.index_path, encoding="utf-8") as f:
+            meta = json.load(f)
+
+        self.vectors = np.load(self.vectors_path, mmap_mode="r+")
+
+        if (
+            meta["model"] != self.model_name or
+            meta["dim"] != self.dim or
+            meta["dtype"] != self.dtype.name or
+            self.vectors.shape[1] != self.dim
+        ):
+            # Different model or precision: nothing in here is reusable
+            print("Embedding store layout changed, rebuilding")
+            del self.vectors
+            self.vectors = self._create(INITIAL_CAPACITY)
+            self._log_size = 0
+            return
+
+        self.count = meta["count"]
+
+        if "index" in meta:
+            # Written before ids moved to the log: migrate on next flush
+            self.index = meta["index"]
+            self._pending = [
+                [post_id, row, digest]
+                for post_id, (row, digest) in self.index.items()
+            ]
+            return
+
+        self._log_size = meta["log_size"]
+        # Later lines for an id (its text changed) win
+        self.index = {
+            post_id: [row, digest]
+            for post_id, row, digest in read_log(self.log_path, self._log_size)
+        }
+
+    def _create(self, capacity: int) -> np.memmap:
+        return np.lib.format.open_memmap(
+            self.vectors_path,
+            mode="w+",
+            dtype=self.dtype,
+            shape=(capacity, self.dim)
+        )
+
+    def _ensure_capacity(self, needed: int):
+        capacity = self.vectors.shape[0]
+        if needed <= capacity:
+            return
+
+        while capacity < needed:
+            capacity *= 2
+
+        tmp_path = self.vectors_path + ".tmp"
+        grown = np.lib.format.open_memmap(
+            tmp_path,
+            mode="w+",
+            dtype=self.dtype,
+            shape=(capacity, self.dim)
+        )
+        grown[:self.count] = self.vectors[:self.count]
+        grown.flush()
+
+        del self.vectors
+        del grown
+        os.replace(tmp_path, self.vectors_path)
+        self.vectors = np.load(self.vectors_path, mmap_mode="r+")
+
+    def stale(self, ids: List[str], texts: List[str]) -> List[int]:
+        """Positions whose post is unknown or whose text changed."""
+        return [
+            i for i, (post_id, text) in enumerate(zip(ids, texts))
+            if self.index.get(post_id, [None, None])[1] != text_hash(text)
+        ]
+
+    def embed(
+        self,
+        ids: List,
+        texts: List[str],
+        encode: Callable[[List[str]], np.ndarray],
+        flush: bool = True
+    ) -> np.ndarray:
+        """
+        Returns a (len(ids), dim) float32 matrix in input order, encoding
+        only new or changed posts. `encode` maps texts -> 2-D array.
+        Streaming callers pass flush=False and flush() once at the end.
+        """
+
+        ids = [str(post_id) for post_id in ids]
+        todo = self.stale(ids, texts)
+
+        if todo:
+            fresh = np.asarray(encode([texts[i] for i in todo]))
+            self._ensure_capacity(self.count + len(todo))
+
+            for vector, i in zip(fresh, todo):
+                post_id = ids[i]
+                entry = self.index.get(post_id)
+
+                if entry is None:
+                    row = self.count
+                    self.count += 1
+                else:
+                    row = entry[0]
+
+                self.vectors[row] = vector
+                self.index[post_id] = [row, text_hash(texts[i])]
+                self._pending.append([post_id, row, self.index[post_id][1]])
+
+            if flush:
+                self.flush()
+
+        print(f"Embeddings: {len(ids) - len(todo)} reused, {len(todo)} encoded")
+
+        rows = np.fromiter(
+            (self.index[post_id][0] for post_id in ids),
+            dtype=np.int64,
+            count=len(ids)
+        )
+        return np.asarray(self.vectors[rows], dtype=np.float32)
+
+    def get(self, ids: List) -> np.ndarray:
+        """Stored vectors for known ids, in input order."""
+        rows = [self.index[str(post_id)][0] for post_id in ids]
+        return np.asarray(self.vectors[rows], dtype=np.float32)
+
+    def __contains__(self, post_id) -> bool:
+        return str(post_id) in self.index
+
+    def __len__(self) -> int:
+        return self.count
+
+    def flush(self):
+        self.vectors.flush()
+        self._log_size = append_log(self.log_path, self._log_size, self._pending)
+        self._pending = []
+
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "model": self.model_name,
+                "dim": self.dim,
+                "dtype": self.dtype.name,
+                "count": self.count,
+                "log_size": self._log_size
+            }, f)
+        os.replace(tmp_path, self.index_path)
+
+
+# -----------------------------------------------------
+# Append-Only Id Log
+# -----------------------------------------------------
+
+def append_log(path: str, committed: int, entries: list) -> int:
+    """
+    Appends JSON lines after the committed prefix of the log and returns
+    the new committed size. Anything past the prefix is an unfinished
+    append from a crashed flush and is overwritten.
+    """
+
+    with open(path, "ab") as f:
+        if f.tell() != committed:
+            f.truncate(committed)
+            f.seek(committed)
+        if entries:
+            f.write("".join(
+                json.dumps(entry) + "\n" for entry in entries
+            ).encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        return f.tell()
+
+
+def read_log(path: str, committed: int) -> list:
+    """The entries in the committed prefix of the log, oldest first."""
+    if committed == 0 or not os.path.exists(path):
+        return []
+
+    with open(path, "rb") as f:
+        data = f.read(committed)
+    return [json.loads(line) for line in data.decode("utf-8").splitlines()]
@@ -0,0 +1,312 @@
+import cProfile
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+
+RUNS_COLLECTION = "pipeline_runs"
+
+# Per-chunk records kept in a stored report; stage totals cover every chunk
+MAX_CHUNK_RECORDS = 2000
+
+MEMORY_MODES = ("rss", "tracemalloc", "off")
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process, in MB."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+# -----------------------------------------------------
+# Run Metrics
+# -----------------------------------------------------
+
+class PipelineMetrics:
+    """
+    Wall time, CPU time, throughput and memory per stage and per chunk
+    of one pipeline run.
+
+    CPU time is the stage thread's own (time.thread_time), so it stays
+    meaningful when stages overlap. memory="rss" records the process RSS
+    after each stage; memory="tracemalloc" records each stage's Python
+    allocation delta and its peak above the allocation it started with.
+    Both are process-wide (the peak is reset when a stage starts), so
+    they blur across concurrently running stages. profile_stage names a
+    stage whose calls are collected into one cProfile dump under
+    profile_dir.
+    """
+
+    def __init__(
+        self,
+        memory: str = "rss",
+        profile_stage: Optional[str] = None,
+        profile_dir: str = "profiles"
+    ):
+        if memory not in MEMORY_MODES:
+            raise ValueError(f"memory must be one of {MEMORY_MODES}")
+
+        self.run_id = uuid.uuid4().hex
+        self.memory = memory
+        self.profile_stage = profile_stage or None
+        self.profile_dir = profile_dir
+
+        self.started_at = datetime.utcnow()
+        self._start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        self._lock = threading.Lock()
+        self._chunk_counts: Dict[str, int] = {}
+        self._profiler: Optional[cProfile.Profile] = None
+        self._alloc_peak = 0
+
+        self.stages: Dict[str, dict] = {}
+        self.chunks: List[dict] = []
+        self.extra: dict = {}
+
+        if memory == "tracemalloc" and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name: str, items: int = 0, chunk: Optional[int] = None):
+        """
+        Times one call of a stage. Calls without a chunk index are
+        numbered per stage, which matches chunk order for stages that
+        see every chunk once. Yields a dict whose "items" can be set
+        once the count is known.
+        """
+
+        with self._lock:
+            if chunk is None:
+                chunk = self._chunk_counts.get(name, 0)
+                self._chunk_counts[name] = chunk + 1
+
+        profiler = self._profile_start(name)
+        alloc_before = 0
+        if self.memory == "tracemalloc":
+            tracemalloc.reset_peak()
+            alloc_before = tracemalloc.get_traced_memory()[0]
+
+        call = {"items": items}
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield call
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.thread_time() - cpu_start
+
+            if profiler is not None:
+                profiler.disable()
+
+            record = {
+                "stage": name,
+                "chunk": chunk,
+                "items": call["items"],
+                "wall_seconds": round(wall, 4),
+                "cpu_seconds": round(cpu, 4)
+            }
+            if self.memory == "rss":
+                record["rss_mb"] = round(current_rss_mb(), 1)
+            elif self.memory == "tracemalloc":
+                current, peak = tracemalloc.get_traced_memory()
+                with self._lock:
+                    self._alloc_peak = max(self._alloc_peak, peak)
+                record["alloc_delta_mb"] = round((current - alloc_before) / 2 ** 20, 2)
+                record["alloc_peak_mb"] = round((peak - alloc_before) / 2 ** 20, 2)
+
+            self._record(record)
+
+    def _profile_start(self, name: str) -> Optional[cProfile.Profile]:
+        if name != self.profile_stage:
+            return None
+        if self._profiler is None:
+            self._profiler = cProfile.Profile()
+        self._profiler.enable()
+        return self._profiler
+
+    def _record(self, record: dict):
+        with self._lock:
+            if len(self.chunks) < MAX_CHUNK_RECORDS:
+                self.chunks.append(record)
+
+            totals = self.stages.setdefault(record["stage"], {
+                "calls": 0,
+                "items": 0,
+                "wall_seconds": 0.0,
+                "cpu_seconds": 0.0,
+                "max_wall_seconds": 0.0
+            })
+            totals["calls"] += 1
+            totals["items"] += record["items"]
+            totals["wall_seconds"] += record["wall_seconds"]
+            totals["cpu_seconds"] += record["cpu_seconds"]
+            totals["max_wall_seconds"] = max(
+                totals["max_wall_seconds"], record["wall_seconds"]
+            )
+            for field in ("rss_mb", "alloc_peak_mb"):
+                if field in record:
+                    totals[f"max_{field}"] = max(
+                        totals.get(f"max_{field}", 0.0), record[field]
+                    )
+
+    def dump_profile(self) -> Optional[str]:
+        """Writes the collected cProfile stats; returns the file path."""
+        if self._profiler is None:
+            return None
+
+        os.makedirs(self.profile_dir, exist_ok=True)
+        path = os.path.join(
+            self.profile_dir, f"{self.run_id}-{self.profile_stage}.prof"
+        )
+        self._profiler.dump_stats(path)
+        return path
+
+    def stage_totals(self) -> Dict[str, dict]:
+        """Per-stage totals so far, with throughput."""
+        with self._lock:
+            stages = {}
+            for name, totals in self.stages.items():
+                stage = {
+                    key: round(value, 4) if isinstance(value, float) else value
+                    for key, value in totals.items()
+                }
+                stage["items_per_second"] = (
+                    round(totals["items"] / totals["wall_seconds"], 2)
+                    if totals["wall_seconds"] > 0 else None
+                )
+                stages[name] = stage
+        return stages
+
+    def report(self, status: str = "completed") -> dict:
+        """JSON-ready summary of the run."""
+        wall = time.perf_counter() - self._start
+        stages = self.stage_totals()
+
+        with self._lock:
+            chunks = list(self.chunks)
+
+        report = {
+            "_id": self.run_id,
+            "status": status,
+            "started_at": self.started_at,
+            "finished_at": datetime.utcnow(),
+            "wall_seconds": round(wall, 3),
+            "cpu_seconds": round(time.process_time() - self._cpu_start, 3),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "memory_mode": self.memory,
+            "stages": stages,
+            "chunks": chunks
+        }
+        if self.memory == "tracemalloc":
+            # Stages reset the tracemalloc peak; keep the highest one seen
+            peak = max(self._alloc_peak, tracemalloc.get_traced_memory()[1])
+            report["alloc_peak_mb"] = round(peak / 2 ** 20, 2)
+
+        report.update(self.extra)
+        return report
+
+
+# -----------------------------------------------------
+# Output Formats
+# -----------------------------------------------------
+
+def format_summary(report: dict) -> str:
+    """One line per stage, slowest first, for the console."""
+    lines = [
+        f"Run {report['_id']} {report['status']} in {report['wall_seconds']}s "
+        f"(cpu {report['cpu_seconds']}s, peak RSS {report['peak_rss_mb']} MB)"
+    ]
+    stages = sorted(
+        report["stages"].items(),
+        key=lambda item: item[1]["wall_seconds"],
+        reverse=True
+    )
+    for name, stage in stages:
+        rate = stage["items_per_second"]
+        lines.append(
+            f"  {name:<15} {stage['wall_seconds']:>9.3f}s wall "
+            f"{stage['cpu_seconds']:>9.3f}s cpu "
+            f"{stage['calls']:>5} calls "
+            + (f"{rate:>10.1f} items/s" if rate and stage["items"] else "")
+        )
+    return "\n".join(lines)
+
+
+def report_json(report: dict) -> str:
+    return json.dumps(report, default=str, indent=2)
+
+
+def to_prometheus(report: dict, prefix: str = "pipeline") -> str:
+    """Run report in the Prometheus text exposition format."""
+    lines = []
+
+    def metric(name: str, help_text: str, samples: List[tuple]):
+        lines.append(f"# HELP {prefix}_{name} {help_text}")
+        lines.append(f"# TYPE {prefix}_{name} gauge")
+        for labels, value in samples:
+            if value is None:
+                continue
+            label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+            suffix = f"{{{label_text}}}" if label_text else ""
+            lines.append(f"{prefix}_{name}{suffix} {value}")
+
+    finished = report.get("finished_at")
+    metric("last_run_timestamp_seconds", "End of the last pipeline run.", [
+        # Stored datetimes are naive UTC
+        ({}, finished.replace(tzinfo=timezone.utc).timestamp()
+         if isinstance(finished, datetime) else None)
+    ])
+    metric("last_run_success", "1 if the last run completed.", [
+        ({}, int(report.get("status") == "completed"))
+    ])
+    metric("run_wall_seconds", "Wall time of the last run.", [
+        ({}, report.get("wall_seconds"))
+    ])
+    metric("run_peak_rss_megabytes", "Peak resident memory of the last run.", [
+        ({}, report.get("peak_rss_mb"))
+    ])
+    metric("run_processed_posts", "Posts processed by the last run.", [
+        ({}, report.get("processed"))
+    ])
+
+    stages = report.get("stages", {})
+    for field, name, help_text in (
+        ("wall_seconds", "stage_wall_seconds", "Wall time spent in a stage."),
+        ("cpu_seconds", "stage_cpu_seconds", "CPU time spent in a stage."),
+        ("items", "stage_items", "Items handled by a stage."),
+        ("items_per_second", "stage_items_per_second", "Stage throughput."),
+        ("max_wall_seconds", "stage_max_chunk_seconds", "Slowest chunk of a stage."),
+        ("max_rss_mb", "stage_max_rss_megabytes", "Highest RSS seen after a stage.")
+    ):
+        metric(name, help_text, [
+            ({"stage": stage}, totals.get(field))
+            for stage, totals in stages.items()
+        ])
+
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(report: dict, path: str):
+    """Atomic write, for node_exporter's textfile collector."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(to_prometheus(report))
+    os.replace(tmp_path, path)
@@ -0,0 +1,142 @@
+import re
+from collections import namedtuple
+from typing import Dict, Iterable, Iterator, List
+
+
+Match = namedtuple("Match", ["lexicon", "keyword", "start", "end"])
+
+_WORD_CHAR = re.compile(r"\w")
+
+
+def _lower(text: str) -> str:
+    """
+    Lowercases without changing the length, so match offsets index the
+    original text. A few characters lowercase to two ("İ" -> "i̇");
+    those are kept as they are.
+    """
+
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(
+        low if len(low) == 1 else ch
+        for ch, low in ((ch, ch.lower()) for ch in text)
+    )
+
+
+def _trie_pattern(node: dict) -> str:
+    """
+    Renders a keyword trie as a regex. Shared prefixes are factored out,
+    so the regex engine walks the trie instead of trying every keyword.
+    Optional suffixes are greedy, so the longest keyword wins.
+    """
+
+    branches = [
+        re.escape(ch) + _trie_pattern(child)
+        for ch, child in sorted(node.items())
+        if ch != ""
+    ]
+
+    if not branches:
+        return ""
+
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+    if "" in node:
+        body = "(?:" + body + ")?"
+
+    return body
+
+
+class KeywordMatcher:
+    """
+    Multi-pattern matcher over one or more named lexicons.
+
+    Every keyword of every lexicon is compiled into a single trie-shaped
+    regex, run as one automaton in C. One left-to-right pass over the text
+    reports every hit for every lexicon, so cost scales with the length of
+    the text rather than text length x number of keywords.
+
+    Matching is case-insensitive. With word_boundary=True a hit must not be
+    glued to a word character on either side ("lag" does not match inside
+    "flag"). With word_boundary=False it behaves like a plain substring
+    search, i.e. the same hits as str.count / the `in` operator.
+    Repeated hits of one keyword never overlap, mirroring str.count.
+    """
+
+    def __init__(
+        self,
+        lexicons: Dict[str, Iterable[str]],
+        word_boundary: bool = True
+    ):
+        self.word_boundary = word_boundary
+        self.lexicons = list(lexicons)
+
+        # Trie nodes map a character to the child node; the "" key holds
+        # the (keyword, lexicon) pairs that end at that node
+        self._trie = {}
+
+        for lexicon, words in lexicons.items():
+            for word in words:
+                word = word.lower()
+                if not word:
+                    continue
+
+                node = self._trie
+                for ch in word:
+                    node = node.setdefault(ch, {})
+
+                terminals = node.setdefault("", [])
+                if (word, lexicon) not in terminals:
+                    terminals.append((word, lexicon))
+
+        # The lookahead makes matches zero-width, so the scan advances one
+        # character at a time and overlapping keywords are all seen
+        pattern = "(?=(" + _trie_pattern(self._trie) + "))"
+        if word_boundary:
+            pattern = r"(?<!\w)" + pattern
+
+        self._regex = re.compile(pattern) if self._trie else None
+
+    def _iter_matches(self, text: str) -> Iterator[Match]:
+        if self._regex is None:
+            return
+
+        last_end = {}
+
+        for m in self._regex.finditer(text):
+            start = m.start()
+            node = self._trie
+
+            # Every keyword starting here is a prefix of the longest one
+            for offset, ch in enumerate(m.group(1), start + 1):
+                node = node[ch]
+                if "" not in node:
+                    continue
+
+                if self.word_boundary and _WORD_CHAR.match(text, offset):
+                    continue
+
+                for keyword, lexicon in node[""]:
+                    if start < last_end.get((keyword, lexicon), 0):
+                        continue
+                    last_end[(keyword, lexicon)] = offset
+                    yield Match(lexicon, keyword, start, offset)
+
+    def find(self, text: str) -> List[Match]:
+        """All hits, ordered by start position; offsets index `text`."""
+        return list(self._iter_matches(_lower(text)))
+
+    def count(self, text: str) -> Dict[str, int]:
+        """Number of hits per lexicon."""
+        counts = dict.fromkeys(self.lexicons, 0)
+        for match in self._iter_matches(_lower(text)):
+            counts[match.lexicon] += 1
+        return counts
+
+    def contains(self, text: str, lexicon: str) -> bool:
+        """True as soon as any keyword of the lexicon is found."""
+        return any(
+            match.lexicon == lexicon
+            for match in self._iter_matches(_lower(text))
+        )
@@ -0,0 +1,414 @@
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pymongo import ReplaceOne
+
+from nlp_engine.scoring import WEIGHT_PROFILES, score_cube, top_k
+from nlp_engine.trend_analysis import (
+    bucket_counts,
+    bucket_keys,
+    to_datetime64,
+    trend_slopes
+)
+
+
+CUBE_COLLECTION = "opportunity_cube"
+
+# Trailing windows (days) that get their own slice
+TIME_WINDOWS = (7, 30, 90)
+
+DEFAULT_COMPETITION = 0.5
+
+
+# -----------------------------------------------------
+# Topic x Slice Stats
+# -----------------------------------------------------
+
+class SliceAccumulator:
+    """
+    Per-(topic, slice) demand, sentiment sum and per-bucket mention
+    counts, accumulated chunk by chunk.
+
+    Slices are ("all", ""), ("subreddit", name), ("category", name) and
+    ("window", "<n>d"). State grows with topics x slices x time buckets,
+    never with the number of posts, so a whole corpus can stream through.
+
+    Window slices are cut from a per-day timeline (per-hour with hourly
+    buckets) when stats() is called, not when posts are added, so an
+    accumulator can be persisted (to_state / from_state), extended by
+    later runs and still rank the trailing windows of the day it is read.
+    Adding with sign=-1 takes posts back out again.
+    """
+
+    def __init__(
+        self,
+        windows: Sequence[int] = TIME_WINDOWS,
+        now: Optional[datetime] = None,
+        bucket: str = "week"
+    ):
+        self.windows = windows
+        self.now = np.datetime64(now or datetime.utcnow(), "us")
+        self.bucket = bucket
+        self.unit = "h" if bucket == "hour" else "D"
+
+        self.demand = Counter()
+        self.sentiment_sum = defaultdict(float)
+        self.bucket_counts = Counter()
+
+        # (topic, day or hour ordinal) of the "all" slice, for windows
+        self.timeline = Counter()
+        self.timeline_sentiment = defaultdict(float)
+
+    def add(
+        self,
+        topics: Sequence[int],
+        compounds: Sequence[float],
+        timestamps: Sequence,
+        subreddits: Sequence[Optional[str]],
+        categories: Sequence[Optional[str]],
+        sign: int = 1
+    ):
+        """
+        Every post is expanded into one row per slice it belongs to, and
+        the rows are reduced to (topic, slice) cells with bincounts.
+        """
+
+        topics = np.asarray(topics, dtype=np.int64)
+        compounds = np.asarray(compounds, dtype=np.float64)
+        times = to_datetime64(timestamps)
+
+        posts = np.flatnonzero(topics != -1)
+        if len(posts) == 0:
+            return
+
+        slices: List[Tuple[str, str]] = [("all", "")]
+        rows = [posts]
+        columns = [np.zeros(len(posts), np.int64)]
+
+        for slice_type, values in (("subreddit", subreddits), ("category", categories)):
+            labels = np.array([values[i] or "" for i in posts], dtype=object)
+            for name in sorted(set(labels.tolist()) - {""}):
+                members = np.flatnonzero(labels == name)
+                rows.append(posts[members])
+                columns.append(np.full(len(members), len(slices)))
+                slices.append((slice_type, name))
+
+        post_rows = np.concatenate(rows)
+        row_topics = topics[post_rows]
+        row_slices = np.concatenate(columns)
+
+        cells, cell_index = np.unique(
+            row_topics * len(slices) + row_slices, return_inverse=True
+        )
+        demand = np.bincount(cell_index)
+        sentiment_sum = np.bincount(cell_index, weights=compounds[post_rows])
+
+        for cell, n, total in zip(cells.tolist(), demand.tolist(), sentiment_sum.tolist()):
+            key = (cell // len(slices), slices[cell % len(slices)])
+            self.demand[key] += sign * n
+            self.sentiment_sum[key] += sign * total
+
+        row_times = times[post_rows]
+        dated = ~np.isnat(row_times)
+        if dated.any():
+            bucket_cells, keys, counts = bucket_counts(
+                cell_index[dated], row_times[dated], self.bucket
+            )
+            for cell, bucket_key, n in zip(
+                cells[bucket_cells].tolist(), keys.tolist(), counts.tolist()
+            ):
+                key = (cell // len(slices), slices[cell % len(slices)])
+                self.bucket_counts[key + (bucket_key,)] += sign * n
+
+        dated = posts[~np.isnat(times[posts])]
+        if len(dated):
+            units = times[dated].astype(f"datetime64[{self.unit}]").astype(np.int64)
+            pairs, pair_index = np.unique(
+                np.stack([topics[dated], units], axis=1), axis=0, return_inverse=True
+            )
+            pair_index = pair_index.reshape(-1)
+            demand = np.bincount(pair_index)
+            sentiment_sum = np.bincount(pair_index, weights=compounds[dated])
+
+            for (topic, unit), n, total in zip(
+                pairs.tolist(), demand.tolist(), sentiment_sum.tolist()
+            ):
+                self.timeline[(topic, unit)] += sign * n
+                self.timeline_sentiment[(topic, unit)] += sign * total
+
+    def merge(self, other: "SliceAccumulator"):
+        """Adds another accumulator's counts (e.g. a run's delta) to this one."""
+        for key, n in other.demand.items():
+            self.demand[key] += n
+            self.sentiment_sum[key] += other.sentiment_sum[key]
+        for key, n in other.bucket_counts.items():
+            self.bucket_counts[key] += n
+        for key, n in other.timeline.items():
+            self.timeline[key] += n
+            self.timeline_sentiment[key] += other.timeline_sentiment[key]
+        self._prune()
+
+    def _prune(self):
+        """Drops cells nothing is left in once a delta has been merged."""
+        for counts, sums in (
+            (self.demand, self.sentiment_sum),
+            (self.bucket_counts, None),
+            (self.timeline, self.timeline_sentiment)
+        ):
+            for key in [key for key, n in counts.items() if n == 0]:
+                del counts[key]
+                if sums is not None:
+                    sums.pop(key, None)
+
+    def to_state(self) -> dict:
+        """Plain lists (BSON / JSON friendly) for from_state()."""
+        return {
+            "bucket": self.bucket,
+            "demand": [
+                [topic, slice_type, name, n, self.sentiment_sum[(topic, (slice_type, name))]]
+                for (topic, (slice_type, name)), n in self.demand.items()
+            ],
+            "bucket_counts": [
+                [topic, slice_type, name, bucket_key, n]
+                for (topic, (slice_type, name), bucket_key), n
+                in self.bucket_counts.items()
+            ],
+            "timeline": [
+                [topic, unit, n, self.timeline_sentiment[(topic, unit)]]
+                for (topic, unit), n in self.timeline.items()
+            ]
+        }
+
+    @classmethod
+    def from_state(
+        cls,
+        state: dict,
+        windows: Sequence[int] = TIME_WINDOWS,
+        now: Optional[datetime] = None
+    ) -> "SliceAccumulator":
+        accumulator = cls(windows, now, state["bucket"])
+        for topic, slice_type, name, n, total in state["demand"]:
+            accumulator.demand[(topic, (slice_type, name))] = n
+            accumulator.sentiment_sum[(topic, (slice_type, name))] = total
+        for topic, slice_type, name, bucket_key, n in state["bucket_counts"]:
+            accumulator.bucket_counts[(topic, (slice_type, name), bucket_key)] = n
+        for topic, unit, n, total in state["timeline"]:
+            accumulator.timeline[(topic, unit)] = n
+            accumulator.timeline_sentiment[(topic, unit)] = total
+        return accumulator
+
+    def _window_stats(self):
+        """Demand, sentiment sums and bucket counts of the window slices."""
+        demand = Counter()
+        sentiment_sum = defaultdict(float)
+        counts = Counter()
+        if not self.timeline:
+            return demand, sentiment_sum, counts
+
+        entries = list(self.timeline.items())
+        units = np.array([unit for (_, unit), _ in entries], dtype=np.int64)
+        keys, _ = bucket_keys(
+            units.astype(f"datetime64[{self.unit}]").astype("datetime64[us]"),
+            self.bucket
+        )
+
+        for days in self.windows:
+            start = (
+                (self.now - np.timedelta64(days, "D"))
+                .astype(f"datetime64[{self.unit}]").astype(np.int64)
+            )
+            window = ("window", f"{days}d")
+            for ((topic, _), n), unit, bucket_key in zip(
+                entries, units.tolist(), keys.tolist()
+            ):
+                if unit < start:
+                    continue
+                demand[(topic, window)] += n
+                sentiment_sum[(topic, window)] += self.timeline_sentiment[(topic, unit)]
+                counts[(topic, window, bucket_key)] += n
+
+        return demand, sentiment_sum, counts
+
+    def stats(self, overall_trend: Optional[Dict[int, float]] = None) -> dict:
+        """
+        Dense (topics x slices) matrices for score_cube. overall_trend,
+        if given, replaces the trends of the "all" slice (e.g. with the
+        ones read from the persisted trend counters).
+        """
+
+        window_demand, window_sentiment, window_counts = self._window_stats()
+        demand_items = list(self.demand.items()) + list(window_demand.items())
+        sentiment_sums = {**self.sentiment_sum, **window_sentiment}
+        count_items = list(self.bucket_counts.items()) + list(window_counts.items())
+
+        topic_ids = sorted({topic for (topic, _), n in self.demand.items() if n})
+        slices = [("all", "")] + sorted(
+            {s for (_, s), n in self.demand.items() if n and s[0] != "all"}
+        ) + [("window", f"{days}d") for days in self.windows]
+
+        topic_row = {topic: i for i, topic in enumerate(topic_ids)}
+        slice_col = {s: j for j, s in enumerate(slices)}
+        shape = (len(topic_ids), len(slices))
+
+        demand = np.zeros(shape, np.int64)
+        sentiment = np.zeros(shape)
+        for (topic, s), n in demand_items:
+            if n == 0:
+                continue
+            i, j = topic_row[topic], slice_col[s]
+            demand[i, j] = n
+            sentiment[i, j] = sentiment_sums[(topic, s)] / n
+
+        # Slopes per cell from the per-bucket counts, sorted by cell then time
+        entries = sorted(
+            (topic_row[topic] * len(slices) + slice_col[s], bucket_key, n)
+            for (topic, s, bucket_key), n in count_items
+            if n
+        )
+        cell_ids = np.array([e[0] for e in entries], dtype=np.int64)
+        counts = np.array([e[2] for e in entries], dtype=np.int64)
+
+        trend = np.zeros(shape[0] * shape[1])
+        for cell, slope in trend_slopes(cell_ids, counts).items():
+            trend[cell] = slope
+
+        if overall_trend is not None:
+            for i, topic in enumerate(topic_ids):
+                trend[i * len(slices)] = overall_trend.get(topic, 0.0)
+
+        return {
+            "topic_ids": topic_ids,
+            "slices": slices,
+            "demand": demand,
+            "sentiment": sentiment,
+            "trend": trend.reshape(shape),
+            "competition": np.full(shape, DEFAULT_COMPETITION)
+        }
+
+
+def build_slice_stats(
+    topics: Sequence[int],
+    compounds: Sequence[float],
+    timestamps: Sequence,
+    subreddits: Sequence[Optional[str]],
+    categories: Sequence[Optional[str]],
+    windows: Sequence[int] = TIME_WINDOWS,
+    now: Optional[datetime] = None,
+    bucket: str = "week",
+    overall_trend: Optional[Dict[int, float]] = None
+) -> dict:
+    """Slice stats for one in-memory batch of posts."""
+    accumulator = SliceAccumulator(windows, now, bucket)
+    accumulator.add(topics, compounds, timestamps, subreddits, categories)
+    return accumulator.stats(overall_trend)
+
+
+# -----------------------------------------------------
+# Scoring and Persistence
+# -----------------------------------------------------
+
+def rank_slices(
+    stats: dict,
+    profiles: Optional[Dict[str, dict]] = None,
+    k: int = 10
+) -> List[dict]:
+    """Top-k topics for every (profile, slice), scored in one pass."""
+    names, scores = score_cube(
+        stats["demand"],
+        stats["sentiment"],
+        stats["trend"],
+        stats["competition"],
+        profiles=profiles or WEIGHT_PROFILES
+    )
+
+    topic_ids = stats["topic_ids"]
+    row = {topic: i for i, topic in enumerate(topic_ids)}
+
+    rankings = []
+    for p, profile in enumerate(names):
+        for s, (slice_type, slice_value) in enumerate(stats["slices"]):
+            best = top_k(scores[p, :, s], topic_ids, k)
+            if not best:
+                continue
+
+            rankings.append({
+                "profile": profile,
+                "slice_type": slice_type,
+                "slice": slice_value,
+                "topics": [
+                    {
+                        "topic": topic,
+                        "score": score,
+                        "demand": int(stats["demand"][row[topic], s]),
+                        "sentiment": round(float(stats["sentiment"][row[topic], s]), 4),
+                        "trend": float(stats["trend"][row[topic], s])
+                    }
+                    for topic, score in best
+                ]
+            })
+
+    return rankings
+
+
+def save_rankings(
+    collection,
+    rankings: List[dict],
+    topic_keywords: Dict[int, list],
+    topic_model_version: Optional[str] = None
+) -> int:
+    """
+    Replaces the stored ranking of every (profile, slice) and drops
+    slices that no longer exist, so the API only ever reads this run.
+    """
+
+    computed_at = datetime.utcnow()
+    requests = []
+    ids = []
+
+    for ranking in rankings:
+        doc_id = "|".join(
+            (ranking["profile"], ranking["slice_type"], ranking["slice"])
+        )
+        ids.append(doc_id)
+
+        for entry in ranking["topics"]:
+            entry["keywords"] = [
+                w for w, _ in topic_keywords.get(entry["topic"], [])[:5]
+            ]
+
+        requests.append(ReplaceOne(
+            {"_id": doc_id},
+            dict(
+                ranking,
+                topic_model_version=topic_model_version,
+                computed_at=computed_at
+            ),
+            upsert=True
+        ))
+
+    if requests:
+        collection.bulk_write(requests, ordered=False)
+    collection.delete_many({"_id": {"$nin": ids}})
+
+    return len(requests)
+
+
+def load_ranking(
+    collection,
+    profile: str = "default",
+    slice_type: str = "all",
+    slice_value: str = ""
+) -> Optional[dict]:
+    return collection.find_one(
+        {"_id": "|".join((profile, slice_type, slice_value))}
+    )
+
+
+def list_slices(collection) -> Dict[str, List[str]]:
+    """Available slice values per slice type."""
+    slices: Dict[str, set] = {}
+    for doc in collection.find({}, {"slice_type": 1, "slice": 1}):
+        slices.setdefault(doc["slice_type"], set()).add(doc["slice"])
+    return {t: sorted(v) for t, v in slices.items()}
@@ -0,0 +1,135 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pymongo import ASCENDING, DESCENDING
+
+
+SNAPSHOTS_COLLECTION = "opportunity_snapshots"
+
+
+# -----------------------------------------------------
+# Immutable Opportunity Snapshots
+# -----------------------------------------------------
+
+class OpportunitySnapshots:
+    """
+    The ranked opportunities of every pipeline run, one document per
+    (snapshot, topic), written once and never updated.
+
+    Snapshot ids sort by creation time ("s%Y%m%d-%H%M%S-<run>"), and the
+    (snapshot_id, score) index serves both "latest snapshot" and "top n
+    of a snapshot" straight from the index, whatever the corpus size.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def ensure_indexes(self):
+        self.collection.create_index(
+            [("snapshot_id", DESCENDING), ("score", DESCENDING)]
+        )
+        self.collection.create_index(
+            [("snapshot_id", ASCENDING), ("topic", ASCENDING)],
+            unique=True
+        )
+
+    def save(
+        self,
+        opportunities: List[dict],
+        topic_model_version: Optional[str] = None,
+        run_id: Optional[str] = None,
+        keep: int = 0
+    ) -> Optional[str]:
+        """Writes a new snapshot; keep > 0 drops all but the newest keep."""
+        if not opportunities:
+            return None
+
+        created_at = datetime.utcnow()
+        snapshot_id = f"s{created_at:%Y%m%d-%H%M%S}-{(run_id or '')[:8]}".rstrip("-")
+
+        self.collection.insert_many(
+            [
+                {
+                    "snapshot_id": snapshot_id,
+                    "created_at": created_at,
+                    "topic_model_version": topic_model_version,
+                    "run_id": run_id,
+                    "rank": rank,
+                    "topic": opp["topic"],
+                    "score": float(opp["score"]),
+                    "volume": int(opp["volume"]),
+                    "trend": float(opp["trend"]),
+                    "sentiment": opp["sentiment"],
+                    "keywords": [
+                        {"word": word, "weight": round(float(weight), 4)}
+                        for word, weight in opp["keywords"]
+                    ]
+                }
+                for rank, opp in enumerate(opportunities, start=1)
+            ],
+            ordered=False
+        )
+
+        if keep > 0:
+            self.prune(keep)
+        return snapshot_id
+
+    def latest_id(self) -> Optional[str]:
+        doc = self.collection.find_one(
+            {}, {"snapshot_id": 1}, sort=[("snapshot_id", DESCENDING)]
+        )
+        return doc["snapshot_id"] if doc else None
+
+    def list_ids(self) -> List[str]:
+        return sorted(self.collection.distinct("snapshot_id"), reverse=True)
+
+    def load(
+        self,
+        snapshot_id: Optional[str] = None,
+        limit: int = 20,
+        min_score: Optional[float] = None
+    ) -> Optional[dict]:
+        """Top opportunities of a snapshot (default: latest), best first."""
+        snapshot_id = snapshot_id or self.latest_id()
+        if snapshot_id is None:
+            return None
+
+        query = {"snapshot_id": snapshot_id}
+        if min_score is not None:
+            query["score"] = {"$gte": min_score}
+
+        entries = list(
+            self.collection.find(query, {"_id": 0})
+            .sort([("snapshot_id", DESCENDING), ("score", DESCENDING)])
+            .limit(limit)
+        )
+        first = entries[0] if entries else self.collection.find_one(
+            {"snapshot_id": snapshot_id}
+        )
+        if first is None:
+            return None
+
+        return {
+            "snapshot_id": snapshot_id,
+            "created_at": first["created_at"],
+            "topic_model_version": first["topic_model_version"],
+            "run_id": first["run_id"],
+            "opportunities": [
+                {
+                    key: entry[key]
+                    for key in (
+                        "rank", "topic", "score", "volume",
+                        "trend", "sentiment", "keywords"
+                    )
+                }
+                for entry in entries
+            ]
+        }
+
+    def prune(self, keep: int) -> int:
+        ids = self.list_ids()
+        if len(ids) <= keep:
+            return 0
+        return self.collection.delete_many(
+            {"snapshot_id": {"$lte": ids[keep]}}
+        ).deleted_count
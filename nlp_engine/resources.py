@@ -0,0 +1,66 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+
+class ResourceRegistry:
+    """
+    Lazily loaded, process-wide heavy resources (models, NLP pipelines).
+
+    Modules register a loader at import time, which is cheap. The loader
+    only runs on the first get() or on an explicit warmup(), so importing
+    the pipeline never pulls torch / transformers / BERTopic into memory.
+    """
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._resources: Dict[str, Any] = {}
+        self._load_seconds: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, loader: Callable[[], Any]):
+        self._loaders[name] = loader
+
+    def get(self, name: str) -> Any:
+        if name in self._resources:
+            return self._resources[name]
+
+        if name not in self._loaders:
+            raise KeyError(f"Unknown resource: {name}")
+
+        # Loads can take seconds; only one thread should pay for them
+        with self._lock:
+            if name not in self._resources:
+                start = time.perf_counter()
+                self._resources[name] = self._loaders[name]()
+                self._load_seconds[name] = round(
+                    time.perf_counter() - start, 3
+                )
+
+        return self._resources[name]
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._resources
+
+    def warmup(self, names: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """Loads the given resources (default: all registered)."""
+        for name in (names or list(self._loaders)):
+            self.get(name)
+        return dict(self._load_seconds)
+
+    def unload(self, name: str):
+        with self._lock:
+            self._resources.pop(name, None)
+            self._load_seconds.pop(name, None)
+
+    def status(self) -> Dict[str, dict]:
+        return {
+            name: {
+                "state": "warm" if name in self._resources else "cold",
+                "load_seconds": self._load_seconds.get(name)
+            }
+            for name in self._loaders
+        }
+
+
+registry = ResourceRegistry()
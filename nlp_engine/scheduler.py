@@ -0,0 +1,213 @@
+import queue
+import threading
+import time
+from contextlib import nullcontext
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+
+# End-of-stream marker passed along every edge
+_DONE = object()
+
+SOURCE = "source"
+
+
+class StageScheduler:
+    """
+    Runs chunk stages as a small DAG, one thread per stage, connected by
+    bounded queues.
+
+    Every stage takes a chunk dict and adds its own fields to it. A stage
+    starts on a chunk as soon as all the stages it depends on are done
+    with it, so independent stages (sentiment and embedding) overlap and
+    the source prefetches the next chunks while the current one is being
+    inferred. Each stage handles chunks in order, so chunks come out of
+    run() in source order. Heavy stages (torch, Mongo) release the GIL;
+    process parallelism stays inside the stages (e.g. SentimentPool).
+
+    Stages added with main_thread=True run in the thread consuming run()
+    instead, after all threaded stages. Numba's OpenMP layer (UMAP,
+    HDBSCAN) hangs when driven from a worker thread.
+
+    With concurrent=False the stages run inline, one after another.
+    metrics (a PipelineMetrics) records every stage call per chunk, with
+    count_items giving the chunk's item count.
+    """
+
+    def __init__(
+        self,
+        queue_size: int = 2,
+        concurrent: bool = True,
+        metrics=None,
+        count_items: Optional[Callable[[dict], int]] = None
+    ):
+        self.queue_size = queue_size
+        self.concurrent = concurrent
+        self.metrics = metrics
+        self.count_items = count_items or (lambda chunk: 0)
+        self.stages: Dict[str, tuple] = {}
+        self.main_stages: Dict[str, Callable[[dict], None]] = {}
+        self.busy: Dict[str, float] = {}
+
+    def add(
+        self,
+        name: str,
+        fn: Callable[[dict], None],
+        after: Sequence[str] = (),
+        main_thread: bool = False
+    ):
+        """Adds a stage running after `after` (default: right after the source)."""
+        after = tuple(after) or (SOURCE,)
+        for dep in after:
+            if dep not in (SOURCE, *self.stages, *self.main_stages):
+                raise ValueError(f"Unknown stage: {dep}")
+            if not main_thread and dep in self.main_stages:
+                raise ValueError(f"{name} cannot run after main-thread stage {dep}")
+
+        if main_thread:
+            self.main_stages[name] = fn
+        else:
+            self.stages[name] = (fn, after)
+
+    def stats(self) -> Dict[str, float]:
+        """Seconds each stage spent working (not waiting)."""
+        return {name: round(seconds, 3) for name, seconds in self.busy.items()}
+
+    def run(self, source: Iterable[dict]) -> Iterator[dict]:
+        self.busy = {
+            name: 0.0 for name in (SOURCE, *self.stages, *self.main_stages)
+        }
+
+        if not self.concurrent:
+            return self._run_inline(source)
+        return self._run_threads(source)
+
+    def _measure(self, name: str, items: int = 0):
+        if self.metrics is None:
+            return nullcontext({"items": items})
+        return self.metrics.stage(name, items=items)
+
+    def _next(self, chunks: Iterator[dict]):
+        start = time.perf_counter()
+        with self._measure(SOURCE) as call:
+            chunk = next(chunks, _DONE)
+            if chunk is not _DONE:
+                call["items"] = self.count_items(chunk)
+        self.busy[SOURCE] += time.perf_counter() - start
+        return chunk
+
+    def _call(self, name: str, fn: Callable[[dict], None], chunk: dict):
+        start = time.perf_counter()
+        with self._measure(name, self.count_items(chunk)):
+            fn(chunk)
+        self.busy[name] += time.perf_counter() - start
+
+    def _run_inline(self, source: Iterable[dict]) -> Iterator[dict]:
+        chunks = iter(source)
+        while True:
+            chunk = self._next(chunks)
+            if chunk is _DONE:
+                return
+
+            for name, (fn, _) in self.stages.items():
+                self._call(name, fn, chunk)
+            self._run_main_stages(chunk)
+            yield chunk
+
+    def _run_main_stages(self, chunk: dict):
+        for name, fn in self.main_stages.items():
+            self._call(name, fn, chunk)
+
+    def _run_threads(self, source: Iterable[dict]) -> Iterator[dict]:
+        stop = threading.Event()
+        errors: List[BaseException] = []
+
+        inbox = {
+            name: [queue.Queue(self.queue_size) for _ in after]
+            for name, (_, after) in self.stages.items()
+        }
+        consumers: Dict[str, List[queue.Queue]] = {
+            name: [] for name in (SOURCE, *self.stages)
+        }
+        for name, (_, after) in self.stages.items():
+            for dep, q in zip(after, inbox[name]):
+                consumers[dep].append(q)
+
+        # Stages no other thread depends on feed the caller
+        outbox = []
+        for name in self.stages:
+            if not consumers[name]:
+                outbox.append(queue.Queue(self.queue_size))
+                consumers[name].append(outbox[-1])
+
+        def put(q: queue.Queue, item):
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+
+        def get(q: queue.Queue):
+            while not stop.is_set():
+                try:
+                    return q.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+            return _DONE
+
+        def emit(name: str, item):
+            for q in consumers[name]:
+                put(q, item)
+
+        def feed():
+            try:
+                chunks = iter(source)
+                while not stop.is_set():
+                    chunk = self._next(chunks)
+                    if chunk is _DONE:
+                        break
+                    emit(SOURCE, chunk)
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+            finally:
+                emit(SOURCE, _DONE)
+
+        def work(name: str):
+            fn = self.stages[name][0]
+            try:
+                while True:
+                    items = [get(q) for q in inbox[name]]
+                    if any(item is _DONE for item in items):
+                        break
+
+                    self._call(name, fn, items[0])
+                    emit(name, items[0])
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+            finally:
+                emit(name, _DONE)
+
+        threads = [threading.Thread(target=feed, name=SOURCE, daemon=True)]
+        threads += [
+            threading.Thread(target=work, args=(name,), name=name, daemon=True)
+            for name in self.stages
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                items = [get(q) for q in outbox]
+                if any(item is _DONE for item in items):
+                    break
+                self._run_main_stages(items[0])
+                yield items[0]
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+        if errors:
+            raise errors[0]
@@ -1,9 +1,121 @@
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+FEATURES = ("demand", "sentiment", "trend", "competition")
+
+DEFAULT_WEIGHTS = {
+    "demand": 0.35,
+    "sentiment": 0.25,
+    "trend": 0.25,
+    "competition": 0.15
+}
+
+# Alternative rankings analysts can switch between; each sums to 1
+WEIGHT_PROFILES = {
+    "default": DEFAULT_WEIGHTS,
+    "emerging": {
+        "demand": 0.20,
+        "sentiment": 0.20,
+        "trend": 0.45,
+        "competition": 0.15
+    },
+    "pain": {
+        "demand": 0.30,
+        "sentiment": 0.45,
+        "trend": 0.10,
+        "competition": 0.15
+    },
+    "volume": {
+        "demand": 0.60,
+        "sentiment": 0.15,
+        "trend": 0.15,
+        "competition": 0.10
+    }
+}
+
+
 def normalize(value, min_v, max_v):
     if max_v == min_v:
         return 0.0
     return (value - min_v) / (max_v - min_v)
 
 
+def _normalize_columns(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Min-max per column over the masked cells; flat columns map to 0."""
+    min_v = np.where(mask, values, np.inf).min(axis=0)
+    max_v = np.where(mask, values, -np.inf).max(axis=0)
+    span = max_v - min_v
+
+    flat = ~(span > 0)
+    span = np.where(flat, 1.0, span)
+    min_v = np.where(np.isfinite(min_v), min_v, 0.0)
+
+    return np.where(flat, 0.0, (values - min_v) / span)
+
+
+def score_cube(
+    demand: np.ndarray,
+    sentiment: np.ndarray,
+    trend: np.ndarray,
+    competition: np.ndarray,
+    profiles: Optional[Dict[str, dict]] = None,
+    mask: Optional[np.ndarray] = None
+) -> Tuple[List[str], np.ndarray]:
+    """
+    Opportunity scores for every (profile, topic, slice) in one pass.
+
+    Inputs are (topics x slices) matrices. Demand and trend are min-max
+    normalised within each slice over the topics present in it (mask,
+    default demand > 0); cells outside the mask score NaN.
+
+    Returns (profile names, scores of shape profiles x topics x slices).
+    """
+
+    profiles = profiles or WEIGHT_PROFILES
+    if mask is None:
+        mask = demand > 0
+
+    Dk = _normalize_columns(demand.astype(np.float64), mask)
+    Ik = np.abs(sentiment)          # intensity
+    Tk = _normalize_columns(trend.astype(np.float64), mask)
+    Ck = 1 - competition            # whitespace
+
+    names = list(profiles)
+    weights = np.array(
+        [[profiles[name][f] for f in FEATURES] for name in names]
+    )[:, :, None, None]
+
+    # Same summation order as the scalar formula
+    scores = (
+        weights[:, 0] * Dk +
+        weights[:, 1] * Ik +
+        weights[:, 2] * Tk +
+        weights[:, 3] * Ck
+    )
+
+    return names, np.where(mask, scores, np.nan)
+
+
+def top_k(
+    scores: np.ndarray,
+    topic_ids: List[int],
+    k: int = 10
+) -> List[Tuple[int, float]]:
+    """Best k (topic, score) of one slice column, skipping NaN cells."""
+    candidates = (
+        (score, topic)
+        for topic, score in zip(topic_ids, scores.tolist())
+        if score == score
+    )
+    return [
+        (topic, round(score, 4))
+        for score, topic in heapq.nlargest(k, candidates)
+    ]
+
+
 def compute_opportunity_scores(
     topic_stats: dict,
     weights: dict = None
@@ -21,34 +133,26 @@ def compute_opportunity_scores(
     """
 
     if weights is None:
-        weights = {
-            "demand": 0.35,
-            "sentiment": 0.25,
-            "trend": 0.25,
-            "competition": 0.15
-        }
-
-    demands = [v["demand"] for v in topic_stats.values()]
-    trends = [v["trend"] for v in topic_stats.values()]
-
-    min_d, max_d = min(demands), max(demands)
-    min_t, max_t = min(trends), max(trends)
+        weights = DEFAULT_WEIGHTS
 
-    scores = {}
-
-    for topic_id, stats in topic_stats.items():
-        Dk = normalize(stats["demand"], min_d, max_d)
-        Ik = abs(stats["sentiment"])        # intensity
-        Tk = normalize(stats["trend"], min_t, max_t)
-        Ck = 1 - stats["competition"]       # whitespace
+    topics = list(topic_stats)
+    columns = {
+        f: np.array([[topic_stats[t][f]] for t in topics], dtype=np.float64)
+        for f in FEATURES
+    }
 
-        OSk = (
-            weights["demand"] * Dk +
-            weights["sentiment"] * Ik +
-            weights["trend"] * Tk +
-            weights["competition"] * Ck
-        )
+    _, cube = score_cube(
+        columns["demand"],
+        columns["sentiment"],
+        columns["trend"],
+        columns["competition"],
+        profiles={"scores": weights},
+        mask=np.ones((len(topics), 1), dtype=bool)
+    )
 
-        scores[topic_id] = round(OSk, 4)
+    scores = {
+        topic_id: round(score, 4)
+        for topic_id, score in zip(topics, cube[0, :, 0].tolist())
+    }
 
     return dict(sorted(scores.items(), key=lambda x: x[1], reverse=True))
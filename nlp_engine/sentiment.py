@@ -1,7 +1,10 @@
 import re
-import torch
-import torch.nn.functional as F
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
+import time
+from collections import namedtuple
+from typing import Callable, List, Optional
+
+from nlp_engine.keyword_matcher import KeywordMatcher
+from nlp_engine.resources import registry
 
 
 # -----------------------------------------------------
@@ -11,12 +14,44 @@ from transformers import AutoTokenizer, AutoModelForSequenceClassification
 MODEL_NAME = "distilbert-base-uncased-finetuned-sst-2-english"
 THRESHOLD = 0.6   # τ for Equation (2)
 
-tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
+SentimentModel = namedtuple("SentimentModel", ["tokenizer", "predict", "backend"])
+
+
+def configured_backend() -> str:
+    """Inference backend from settings (torch, torch_int8 or onnx)."""
+    from config.settings import settings
+    return settings.sentiment_backend
+
+
+def load_sentiment_model(
+    backend: Optional[str] = None,
+    num_threads: int = 0
+) -> SentimentModel:
+    # Heavy imports stay in the backends so importing this module is cheap
+    from transformers import AutoTokenizer
+    from config.settings import settings
+    from nlp_engine.sentiment_backends import load_backend
+
+    if backend is None:
+        backend = settings.sentiment_backend
+
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    predict = load_backend(
+        backend,
+        MODEL_NAME,
+        settings.sentiment_onnx_path,
+        num_threads=num_threads
+    )
+
+    return SentimentModel(tokenizer, predict, backend)
 
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-model.to(device)
-model.eval()
+
+registry.register("sentiment", load_sentiment_model)
+
+
+def get_sentiment_model() -> SentimentModel:
+    """Loads the tokenizer and classifier on first use."""
+    return registry.get("sentiment")
 
 
 # -----------------------------------------------------
@@ -46,6 +81,33 @@ NEGATIVE_KEYWORDS = {
     "no response", "no support", "unhelpful", "no solution"
 }
 
+# Substring semantics, same hits as text.count(k)
+NEGATIVE_MATCHER = KeywordMatcher(
+    {"negative": NEGATIVE_KEYWORDS},
+    word_boundary=False
+)
+
+
+# -----------------------------------------------------
+# Cascade Configuration
+# -----------------------------------------------------
+
+POSITIVE_KEYWORDS = {
+    "love", "great", "awesome", "amazing", "excellent", "perfect",
+    "helpful", "thanks", "thank you", "recommend", "happy",
+    "easy to use", "works great", "worth it", "fantastic"
+}
+
+# |lexicon score| below this is ambiguous and goes to the transformer
+CASCADE_BAND = 0.6
+
+# Whole-word matching: the cascade decides on its own, so "lag" inside
+# "flag" must not push a post out of the uncertainty band
+CASCADE_MATCHER = KeywordMatcher({
+    "negative": NEGATIVE_KEYWORDS,
+    "positive": POSITIVE_KEYWORDS
+})
+
 
 # -----------------------------------------------------
 # Text Cleaning
@@ -62,30 +124,62 @@ def clean_text(text: str) -> str:
 # Sentiment & Opportunity Detection
 # -----------------------------------------------------
 
-def analyze_sentiment(text: str) -> dict:
-    text = clean_text(text)
-
-    inputs = tokenizer(
-        text,
-        return_tensors="pt",
+def _tokenize_for_batching(tokenizer, texts: List[str]) -> List[dict]:
+    encodings = tokenizer(
+        texts,
         truncation=True,
-        padding=True,
+        padding=False,
         max_length=512
     )
-
-    inputs = {k: v.to(device) for k, v in inputs.items()}
-
-    with torch.no_grad():
-        outputs = model(**inputs)
-        logits = outputs.logits
-        probs = F.softmax(logits, dim=1)
-
-    # SST-2 output:
-    # index 0 = negative
-    # index 1 = positive
-    negative_prob = probs[0][0].item()
-    positive_prob = probs[0][1].item()
-
+    return [
+        {k: encodings[k][i] for k in encodings.keys()}
+        for i in range(len(texts))
+    ]
+
+
+def _length_buckets(
+    lengths: List[int],
+    batch_size: int,
+    max_tokens: int
+) -> List[List[int]]:
+    """
+    Groups indices into batches of similar token length.
+
+    Indices are sorted by length so each batch only pads up to its own
+    longest sequence. A batch is closed when it reaches batch_size or when
+    its padded size (rows x longest row) would exceed max_tokens.
+    """
+
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+
+    batches = []
+    current = []
+    current_max = 0
+
+    for idx in order:
+        new_max = max(current_max, lengths[idx])
+        if current and (
+            len(current) >= batch_size or
+            new_max * (len(current) + 1) > max_tokens
+        ):
+            batches.append(current)
+            current = []
+            new_max = lengths[idx]
+
+        current.append(idx)
+        current_max = new_max
+
+    if current:
+        batches.append(current)
+
+    return batches
+
+
+def _build_result(
+    text: str,
+    negative_prob: float,
+    positive_prob: float
+) -> dict:
     # -------------------------------------------------
     # Equation (1)
     # P_opportunity(pi) = σ(W · vi + b)
@@ -110,7 +204,7 @@ def analyze_sentiment(text: str) -> dict:
     # Keyword Amplification for Explicit Pain
     # -------------------------------------------------
 
-    keyword_hits = sum(text.count(k) for k in NEGATIVE_KEYWORDS)
+    keyword_hits = NEGATIVE_MATCHER.count(text)["negative"]
     keyword_boost = min(0.3, 0.05 * keyword_hits)
 
     complaint_intensity = min(
@@ -135,4 +229,178 @@ def analyze_sentiment(text: str) -> dict:
         "complaint_intensity": round(complaint_intensity, 3),
         "popportunity": round(popportunity, 3),
         "is_opportunity": is_relevant
-    }
\ No newline at end of file
+    }
+
+
+def analyze_sentiment(text: str) -> dict:
+    tokenizer, predict, _ = get_sentiment_model()
+    text = clean_text(text)
+
+    inputs = tokenizer(
+        text,
+        return_tensors="np",
+        truncation=True,
+        padding=True,
+        max_length=512
+    )
+
+    # SST-2 output:
+    # index 0 = negative
+    # index 1 = positive
+    negative_prob, positive_prob = predict(inputs)[0]
+
+    return _build_result(text, negative_prob, positive_prob)
+
+
+def analyze_sentiment_batch(
+    texts: List[str],
+    batch_size: int = 32,
+    max_tokens: int = 8192,
+    sentiment_model: Optional[SentimentModel] = None
+) -> List[dict]:
+    """
+    Batched version of analyze_sentiment.
+
+    Texts are bucketed by token length and each bucket is padded only to
+    its own longest sequence, so one forward pass scores many posts
+    without wasting compute on padding. Results are returned in input
+    order and have the same shape as analyze_sentiment.
+    """
+
+    if not texts:
+        return []
+
+    tokenizer, predict, _ = sentiment_model or get_sentiment_model()
+
+    cleaned = [clean_text(t) for t in texts]
+    encoded = _tokenize_for_batching(tokenizer, cleaned)
+    lengths = [len(e["input_ids"]) for e in encoded]
+
+    results = [None] * len(cleaned)
+
+    for batch in _length_buckets(lengths, batch_size, max_tokens):
+        inputs = tokenizer.pad(
+            [encoded[i] for i in batch],
+            padding="longest",
+            return_tensors="np"
+        )
+        probs = predict(inputs)
+
+        for idx, (negative_prob, positive_prob) in zip(batch, probs):
+            results[idx] = _build_result(
+                cleaned[idx], negative_prob, positive_prob
+            )
+
+    return results
+
+
+# -----------------------------------------------------
+# Cascade: Lexicon Fast Path, Transformer for Ambiguous Posts
+# -----------------------------------------------------
+
+def lexicon_score(text: str) -> float:
+    """
+    Cheap polarity estimate in (-1, 1): (pos - neg) / (pos + neg + 1).
+    The +1 keeps a single keyword hit from looking certain.
+    """
+    counts = CASCADE_MATCHER.count(text)
+    negative, positive = counts["negative"], counts["positive"]
+    return (positive - negative) / (positive + negative + 1)
+
+
+def analyze_sentiment_cascade(
+    texts: List[str],
+    band: float = CASCADE_BAND,
+    scorer: Optional[Callable[[List[str]], List[dict]]] = None
+) -> List[dict]:
+    """
+    Posts whose lexicon score is at least `band` away from zero are decided
+    by the lexicon alone; the rest go to the transformer (`scorer`, by
+    default analyze_sentiment_batch). Every result carries a "tier" key
+    ("lexicon" or "transformer") recording which tier decided it.
+    """
+
+    if scorer is None:
+        scorer = analyze_sentiment_batch
+
+    results = [None] * len(texts)
+    ambiguous = []
+
+    for idx, text in enumerate(texts):
+        cleaned = clean_text(text)
+        score = lexicon_score(cleaned)
+
+        if abs(score) >= band:
+            # Map the lexicon score onto pseudo-probabilities so the result
+            # has exactly the transformer's shape (compound == score)
+            result = _build_result(cleaned, (1 - score) / 2, (1 + score) / 2)
+            result["tier"] = "lexicon"
+            results[idx] = result
+        else:
+            ambiguous.append(idx)
+
+    if ambiguous:
+        scored = scorer([texts[i] for i in ambiguous])
+        for idx, result in zip(ambiguous, scored):
+            result = dict(result)
+            result["tier"] = "transformer"
+            results[idx] = result
+
+    return results
+
+
+def evaluate_cascade(
+    texts: List[str],
+    labels: Optional[List[str]] = None,
+    band: float = CASCADE_BAND,
+    scorer: Optional[Callable[[List[str]], List[dict]]] = None
+) -> dict:
+    """
+    Runs transformer-only and cascade scoring on the same sample and
+    reports label agreement, accuracy against gold labels (if given),
+    the share of posts the lexicon decided, and the wall-clock speedup.
+    """
+
+    if scorer is None:
+        scorer = analyze_sentiment_batch
+
+    # Keep lazy model loading out of the timings
+    scorer(texts[:1])
+
+    start = time.perf_counter()
+    reference = scorer(texts)
+    transformer_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cascade = analyze_sentiment_cascade(texts, band=band, scorer=scorer)
+    cascade_seconds = time.perf_counter() - start
+
+    n = len(texts)
+    lexicon_idx = [i for i, r in enumerate(cascade) if r["tier"] == "lexicon"]
+
+    report = {
+        "posts": n,
+        "band": band,
+        "lexicon_share": round(len(lexicon_idx) / n, 3) if n else 0.0,
+        "agreement": round(
+            sum(r["label"] == c["label"] for r, c in zip(reference, cascade)) / n, 3
+        ) if n else 0.0,
+        "lexicon_tier_agreement": round(
+            sum(reference[i]["label"] == cascade[i]["label"] for i in lexicon_idx)
+            / len(lexicon_idx), 3
+        ) if lexicon_idx else None,
+        "transformer_seconds": round(transformer_seconds, 3),
+        "cascade_seconds": round(cascade_seconds, 3),
+        "speedup": round(transformer_seconds / cascade_seconds, 2)
+        if cascade_seconds else None
+    }
+
+    if labels is not None:
+        report["transformer_accuracy"] = round(
+            sum(r["label"] == g for r, g in zip(reference, labels)) / n, 3
+        ) if n else 0.0
+        report["cascade_accuracy"] = round(
+            sum(c["label"] == g for c, g in zip(cascade, labels)) / n, 3
+        ) if n else 0.0
+
+    return report
@@ -0,0 +1,152 @@
+import inspect
+import os
+from typing import Callable, List
+
+
+# -----------------------------------------------------
+# Inference Backends
+# -----------------------------------------------------
+#
+# Every backend returns predict(inputs) -> [[negative, positive], ...]
+# where inputs is the tokenizer output with return_tensors="np".
+#
+#   torch       eager PyTorch (default)
+#   torch_int8  PyTorch with dynamic int8 quantization of Linear layers
+#   onnx        exported ONNX graph run with onnxruntime
+
+BACKENDS = ("torch", "torch_int8", "onnx")
+
+Predictor = Callable[[dict], List[List[float]]]
+
+
+def _torch_predictor(model, device) -> Predictor:
+    import torch
+
+    def predict(inputs: dict) -> List[List[float]]:
+        tensors = {
+            k: torch.as_tensor(v).to(device)
+            for k, v in inputs.items()
+        }
+        with torch.no_grad():
+            logits = model(**tensors).logits
+            return torch.softmax(logits, dim=1).tolist()
+
+    return predict
+
+
+def load_torch(
+    model_name: str,
+    quantize: bool = False,
+    num_threads: int = 0
+) -> Predictor:
+    import torch
+    from transformers import AutoModelForSequenceClassification
+
+    if num_threads:
+        torch.set_num_threads(num_threads)
+
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+
+    if quantize:
+        # Dynamic quantization is CPU-only
+        device = torch.device("cpu")
+        model = torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+    else:
+        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        model.to(device)
+
+    return _torch_predictor(model, device)
+
+
+def export_onnx(model_name: str, path: str) -> str:
+    """Exports the classifier with dynamic batch and sequence axes."""
+    import torch
+    from transformers import AutoModelForSequenceClassification
+
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+
+    dummy = torch.ones((1, 8), dtype=torch.long)
+    dynamic = {0: "batch", 1: "sequence"}
+
+    # Newer torch defaults to the dynamo exporter, which needs onnxscript
+    export_kwargs = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        export_kwargs["dynamo"] = False
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    torch.onnx.export(
+        model,
+        (dummy, dummy),
+        path,
+        input_names=["input_ids", "attention_mask"],
+        output_names=["logits"],
+        dynamic_axes={
+            "input_ids": dynamic,
+            "attention_mask": dynamic,
+            "logits": {0: "batch"}
+        },
+        opset_version=17,
+        **export_kwargs
+    )
+
+    print(f"Exported {model_name} to {path}")
+    return path
+
+
+def load_onnx(model_name: str, path: str, num_threads: int = 0) -> Predictor:
+    import numpy as np
+    import onnxruntime as ort
+
+    if not os.path.exists(path):
+        export_onnx(model_name, path)
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = (
+        ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    )
+    if num_threads:
+        options.intra_op_num_threads = num_threads
+
+    session = ort.InferenceSession(
+        path,
+        sess_options=options,
+        providers=["CPUExecutionProvider"]
+    )
+    input_names = [i.name for i in session.get_inputs()]
+
+    def predict(inputs: dict) -> List[List[float]]:
+        feed = {
+            name: np.asarray(inputs[name], dtype=np.int64)
+            for name in input_names
+        }
+        logits = session.run(None, feed)[0]
+
+        # Numerically stable softmax
+        logits = logits - logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        return (exp / exp.sum(axis=1, keepdims=True)).tolist()
+
+    return predict
+
+
+def load_backend(
+    backend: str,
+    model_name: str,
+    onnx_path: str,
+    num_threads: int = 0
+) -> Predictor:
+    """num_threads=0 keeps the runtime's default intra-op threading."""
+    if backend == "torch":
+        return load_torch(model_name, num_threads=num_threads)
+    if backend == "torch_int8":
+        return load_torch(model_name, quantize=True, num_threads=num_threads)
+    if backend == "onnx":
+        return load_onnx(model_name, onnx_path, num_threads=num_threads)
+
+    raise ValueError(
+        f"Unknown sentiment backend '{backend}', expected one of {BACKENDS}"
+    )
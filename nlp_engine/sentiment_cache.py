@@ -0,0 +1,220 @@
+import hashlib
+import json
+import sqlite3
+import time
+from typing import Callable, Dict, List, Optional
+
+from nlp_engine.sentiment import (
+    MODEL_NAME,
+    THRESHOLD,
+    NEGATIVE_KEYWORDS,
+    configured_backend,
+    clean_text,
+    analyze_sentiment_batch
+)
+
+
+# -----------------------------------------------------
+# Cache Configuration
+# -----------------------------------------------------
+
+DEFAULT_CACHE_PATH = "sentiment_cache.sqlite3"
+DEFAULT_MAX_ENTRIES = 200_000
+
+
+def model_fingerprint(
+    model_name: str = MODEL_NAME,
+    threshold: float = THRESHOLD,
+    backend: Optional[str] = None
+) -> str:
+    """
+    Identifies everything that shapes a sentiment result.
+    The lexicon is included because it drives complaint_intensity, the
+    backend because quantized/ONNX scores differ slightly from eager torch.
+    """
+    if backend is None:
+        backend = configured_backend()
+
+    lexicon = "|".join(sorted(NEGATIVE_KEYWORDS))
+    raw = f"{model_name}|{threshold}|{backend}|{lexicon}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# -----------------------------------------------------
+# Persistent Content-Addressed Cache
+# -----------------------------------------------------
+
+class SentimentCache:
+    """
+    On-disk sentiment cache keyed by sha256(fingerprint + cleaned text).
+
+    Entries are evicted least-recently-used once max_entries is exceeded.
+    When the model fingerprint changes every entry is dropped, so results
+    from an older model or threshold are never served.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        fingerprint: Optional[str] = None
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.fingerprint = fingerprint or model_fingerprint()
+        self.hits = 0
+        self.misses = 0
+
+        # Used from the pipeline's sentiment stage thread; one user at a time
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " result TEXT NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_entries_last_used "
+            "ON entries (last_used)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta ("
+            " name TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL)"
+        )
+        self._check_fingerprint()
+
+    def _check_fingerprint(self):
+        row = self.conn.execute(
+            "SELECT value FROM meta WHERE name = 'fingerprint'"
+        ).fetchone()
+
+        if row is None or row[0] != self.fingerprint:
+            if row is not None:
+                print("Sentiment model changed, invalidating cache")
+            self.conn.execute("DELETE FROM entries")
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (name, value) "
+                "VALUES ('fingerprint', ?)",
+                (self.fingerprint,)
+            )
+            self.conn.commit()
+
+    def key(self, text: str) -> str:
+        raw = f"{self.fingerprint}\0{clean_text(text)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, dict]:
+        found = {}
+        unique = list(set(keys))
+
+        # SQLite caps bound parameters per statement
+        for start in range(0, len(unique), 500):
+            chunk = unique[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT key, result FROM entries "
+                f"WHERE key IN ({placeholders})",
+                chunk
+            ).fetchall()
+            for key, result in rows:
+                found[key] = json.loads(result)
+
+        if found:
+            now = time.time()
+            self.conn.executemany(
+                "UPDATE entries SET last_used = ? WHERE key = ?",
+                [(now, key) for key in found]
+            )
+            self.conn.commit()
+
+        return found
+
+    def put_many(self, items: Dict[str, dict]):
+        if not items:
+            return
+
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO entries (key, result, last_used) "
+            "VALUES (?, ?, ?)",
+            [(key, json.dumps(result), now) for key, result in items.items()]
+        )
+        self._evict()
+        self.conn.commit()
+
+    def _evict(self):
+        (count,) = self.conn.execute(
+            "SELECT COUNT(*) FROM entries"
+        ).fetchone()
+
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self.conn.execute(
+                "DELETE FROM entries WHERE key IN ("
+                " SELECT key FROM entries ORDER BY last_used LIMIT ?)",
+                (overflow,)
+            )
+
+    def stats(self) -> dict:
+        (size,) = self.conn.execute(
+            "SELECT COUNT(*) FROM entries"
+        ).fetchone()
+        lookups = self.hits + self.misses
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "size": size,
+            "max_entries": self.max_entries
+        }
+
+    def clear(self):
+        self.conn.execute("DELETE FROM entries")
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def analyze_sentiment_cached(
+    texts: List[str],
+    cache: SentimentCache,
+    batch_size: int = 32,
+    max_tokens: int = 8192,
+    scorer: Optional[Callable[[List[str]], List[dict]]] = None
+) -> List[dict]:
+    """
+    analyze_sentiment_batch with a read-through cache.
+    Only texts whose cleaned form has not been scored before hit the model.
+    scorer overrides how misses are scored (e.g. SentimentPool.analyze).
+    """
+
+    keys = [cache.key(t) for t in texts]
+    cached = cache.get_many(keys)
+
+    # Score each distinct missing text once
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in cached and key not in missing:
+            missing[key] = text
+
+    miss_count = sum(1 for key in keys if key not in cached)
+    cache.misses += miss_count
+    cache.hits += len(keys) - miss_count
+
+    if missing:
+        if scorer is None:
+            fresh = analyze_sentiment_batch(
+                list(missing.values()),
+                batch_size=batch_size,
+                max_tokens=max_tokens
+            )
+        else:
+            fresh = scorer(list(missing.values()))
+        new_entries = dict(zip(missing.keys(), fresh))
+        cache.put_many(new_entries)
+        cached.update(new_entries)
+
+    return [dict(cached[key]) for key in keys]
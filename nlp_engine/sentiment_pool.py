@@ -0,0 +1,165 @@
+import multiprocessing
+import os
+from typing import List, Optional, Tuple
+
+
+# -----------------------------------------------------
+# Worker Process State
+# -----------------------------------------------------
+
+_worker_model = None
+_worker_batch_size = 32
+_worker_max_tokens = 8192
+
+
+def available_cpus() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def plan_partition(
+    workers: Optional[int] = None,
+    threads_per_worker: Optional[int] = None,
+    cpus: Optional[int] = None
+) -> Tuple[int, int]:
+    """
+    Splits the available cores into (workers, threads per worker) so that
+    workers x threads never exceeds the core count unless asked to.
+    """
+
+    cpus = cpus or available_cpus()
+
+    if workers and threads_per_worker:
+        if workers * threads_per_worker > cpus:
+            print(
+                f"⚠️ {workers} workers x {threads_per_worker} threads "
+                f"oversubscribes {cpus} cores"
+            )
+        return workers, threads_per_worker
+
+    if workers:
+        return workers, max(1, cpus // workers)
+
+    if not threads_per_worker:
+        threads_per_worker = min(4, cpus)
+
+    return max(1, cpus // threads_per_worker), threads_per_worker
+
+
+def _init_worker(
+    backend: str,
+    num_threads: int,
+    batch_size: int,
+    max_tokens: int
+):
+    global _worker_model, _worker_batch_size, _worker_max_tokens
+
+    # Must happen before torch / onnxruntime spin up their thread pools
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(num_threads)
+
+    if backend in ("torch", "torch_int8"):
+        import torch
+        torch.set_num_threads(num_threads)
+        torch.set_num_interop_threads(1)
+
+    from nlp_engine.sentiment import load_sentiment_model
+
+    # onnx: num_threads becomes the session's intra_op_num_threads
+    _worker_model = load_sentiment_model(backend, num_threads=num_threads)
+    _worker_batch_size = batch_size
+    _worker_max_tokens = max_tokens
+
+
+def _score_shard(texts: List[str]) -> List[dict]:
+    from nlp_engine.sentiment import analyze_sentiment_batch
+
+    return analyze_sentiment_batch(
+        texts,
+        batch_size=_worker_batch_size,
+        max_tokens=_worker_max_tokens,
+        sentiment_model=_worker_model
+    )
+
+
+# -----------------------------------------------------
+# Sentiment Worker Pool
+# -----------------------------------------------------
+
+class SentimentPool:
+    """
+    Scores sentiment across N worker processes, each holding its own copy
+    of the model and pinned to a fixed number of intra-op threads.
+
+    Texts are sharded into contiguous chunks and results come back in
+    input order. Use as a context manager, or call close() when done.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        threads_per_worker: Optional[int] = None,
+        backend: Optional[str] = None,
+        batch_size: int = 32,
+        max_tokens: int = 8192,
+        shard_size: Optional[int] = None
+    ):
+        if backend is None:
+            from nlp_engine.sentiment import configured_backend
+            backend = configured_backend()
+
+        self.workers, self.threads_per_worker = plan_partition(
+            workers, threads_per_worker
+        )
+        self.backend = backend
+        # A few batches per shard keeps length bucketing effective while
+        # still spreading work evenly
+        self.shard_size = shard_size or batch_size * 4
+
+        # spawn: forked children would inherit the parent's torch threads
+        ctx = multiprocessing.get_context("spawn")
+        self._pool = ctx.Pool(
+            self.workers,
+            initializer=_init_worker,
+            initargs=(backend, self.threads_per_worker, batch_size, max_tokens)
+        )
+
+        print(
+            f"Sentiment pool: {self.workers} workers x "
+            f"{self.threads_per_worker} threads ({backend})"
+        )
+
+    def analyze(self, texts: List[str]) -> List[dict]:
+        if not texts:
+            return []
+
+        shards = [
+            texts[i:i + self.shard_size]
+            for i in range(0, len(texts), self.shard_size)
+        ]
+
+        results = []
+        for shard_result in self._pool.imap(_score_shard, shards):
+            results.extend(shard_result)
+
+        return results
+
+    def close(self):
+        """Waits for in-flight work, then stops the workers."""
+        self._pool.close()
+        self._pool.join()
+
+    def terminate(self):
+        """Stops the workers immediately."""
+        self._pool.terminate()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.terminate()
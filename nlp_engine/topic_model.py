@@ -1,22 +1,65 @@
-from bertopic import BERTopic
-from sklearn.cluster import KMeans
-from sentence_transformers import SentenceTransformer
-from typing import List, Tuple, Dict
+import json
+import os
+from typing import List, Tuple, Dict, Optional, TYPE_CHECKING
 
+from nlp_engine.resources import registry
 
-def create_topic_model(n_topics: int = 12) -> BERTopic:
-    embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
+if TYPE_CHECKING:
+    import numpy as np
+    from bertopic import BERTopic
 
-    cluster_model = KMeans(
-        n_clusters=n_topics,
-        random_state=42,
-        n_init=10
+
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+
+
+def _load_embedding_model():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(EMBEDDING_MODEL_NAME)
+
+
+registry.register("embedding", _load_embedding_model)
+
+
+def encode_documents(documents: List[str], batch_size: int = 64):
+    """MiniLM sentence embeddings as a (n, 384) float32 array."""
+    embedding_model = registry.get("embedding")
+    return embedding_model.encode(
+        documents,
+        batch_size=batch_size,
+        convert_to_numpy=True,
+        show_progress_bar=False
     )
 
+
+def create_topic_model(n_topics: int = 12, incremental: bool = False) -> "BERTopic":
+    from bertopic import BERTopic
+    from sklearn.cluster import KMeans, MiniBatchKMeans
+
+    embedding_model = registry.get("embedding")
+
+    if incremental:
+        from bertopic.dimensionality import BaseDimensionalityReduction
+
+        # Clusters live directly in embedding space, so new posts can be
+        # assigned (and centroids nudged) without refitting anything
+        cluster_model = MiniBatchKMeans(
+            n_clusters=n_topics,
+            random_state=42,
+            n_init=3
+        )
+        umap_model = BaseDimensionalityReduction()
+    else:
+        cluster_model = KMeans(
+            n_clusters=n_topics,
+            random_state=42,
+            n_init=10
+        )
+        umap_model = None
+
     topic_model = BERTopic(
         embedding_model=embedding_model,
         hdbscan_model=cluster_model,
-        umap_model=None,
+        umap_model=umap_model,
         calculate_probabilities=True,
         verbose=False
     )
@@ -25,13 +68,15 @@ def create_topic_model(n_topics: int = 12) -> BERTopic:
 
 
 def fit_topics(
-    topic_model: BERTopic,
-    documents: List[str]
+    topic_model: "BERTopic",
+    documents: List[str],
+    embeddings: Optional["np.ndarray"] = None
 ) -> Tuple[List[int], Dict[int, list]]:
     if not documents:
         raise ValueError("No documents provided for topic modeling")
 
-    topics, _ = topic_model.fit_transform(documents)
+    # Precomputed embeddings skip BERTopic's own encoding pass
+    topics, _ = topic_model.fit_transform(documents, embeddings=embeddings)
 
     topic_keywords = {
         topic_id: topic_model.get_topic(topic_id)
@@ -43,7 +88,220 @@ def fit_topics(
 
 
 # 🔥 THIS is what run_pipeline imports
-def run_topic_modeling(documents: List[str], n_topics: int = 12):
+def run_topic_modeling(
+    documents: List[str],
+    n_topics: int = 12,
+    embeddings: Optional["np.ndarray"] = None
+):
     topic_model = create_topic_model(n_topics)
-    topics, topic_keywords = fit_topics(topic_model, documents)
+    topics, topic_keywords = fit_topics(topic_model, documents, embeddings)
     return topics, topic_keywords
+
+
+# -----------------------------------------------------
+# Incremental Topic Model
+# -----------------------------------------------------
+
+DEFAULT_TOPIC_STATE_DIR = "topic_state"
+
+
+def _centroids(topics: List[int], embeddings: "np.ndarray") -> Dict[int, "np.ndarray"]:
+    import numpy as np
+
+    topics = np.asarray(topics)
+    return {
+        int(t): embeddings[topics == t].mean(axis=0)
+        for t in np.unique(topics)
+        if t != -1
+    }
+
+
+class IncrementalTopicModel:
+    """
+    Fit once, then assign new posts to the existing topics.
+
+    New posts go through BERTopic.transform and nudge the MiniBatchKMeans
+    centroids with partial_fit. A full refit only happens on demand or when
+    drift (mean distance of new posts to their nearest centroid, relative
+    to the same figure at fit time) passes drift_threshold.
+
+    Topic ids handed out are stable across runs: after a refit, the new
+    topics are matched to the previous ones by centroid similarity and
+    inherit their ids; unmatched topics get fresh ids.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_TOPIC_STATE_DIR,
+        n_topics: int = 12,
+        drift_threshold: float = 0.25,
+        min_similarity: float = 0.5
+    ):
+        self.path = path
+        self.n_topics = n_topics
+        self.drift_threshold = drift_threshold
+        self.min_similarity = min_similarity
+
+        self.topic_model = None
+        # Whether the last update() refitted (i.e. produced a new model)
+        self.refitted = False
+        # model topic id -> stable topic id
+        self.stable_ids: Dict[int, int] = {}
+        self.next_id = 0
+        self.reference_distance = None
+        self.centroids: Dict[int, "np.ndarray"] = {}
+
+        if os.path.exists(os.path.join(path, "state.json")):
+            self.load()
+
+    # -------------------------------------------------
+    # Persistence
+    # -------------------------------------------------
+
+    def load(self):
+        import numpy as np
+        from bertopic import BERTopic
+
+        with open(os.path.join(self.path, "state.json"), encoding="utf-8") as f:
+            state = json.load(f)
+
+        self.stable_ids = {int(k): v for k, v in state["stable_ids"].items()}
+        self.next_id = state["next_id"]
+        self.reference_distance = state["reference_distance"]
+
+        centroids = np.load(os.path.join(self.path, "centroids.npz"))
+        self.centroids = {int(k): centroids[k] for k in centroids.files}
+
+        self.topic_model = BERTopic.load(os.path.join(self.path, "model"))
+
+    def save(self):
+        import numpy as np
+
+        os.makedirs(self.path, exist_ok=True)
+
+        # Pickle keeps the fitted clusterer; we always pass embeddings,
+        # so the sentence-transformer itself isn't stored
+        self.topic_model.save(
+            os.path.join(self.path, "model"),
+            serialization="pickle",
+            save_embedding_model=False
+        )
+        np.savez(
+            os.path.join(self.path, "centroids.npz"),
+            **{str(k): v for k, v in self.centroids.items()}
+        )
+        with open(os.path.join(self.path, "state.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "stable_ids": self.stable_ids,
+                "next_id": self.next_id,
+                "reference_distance": self.reference_distance,
+                "n_topics": self.n_topics
+            }, f)
+
+    # -------------------------------------------------
+    # Drift & Refit
+    # -------------------------------------------------
+
+    def _mean_distance(self, embeddings: "np.ndarray") -> float:
+        distances = self.topic_model.hdbscan_model.transform(embeddings)
+        return float(distances.min(axis=1).mean())
+
+    def drift(self, embeddings: "np.ndarray") -> float:
+        if not self.reference_distance:
+            return 0.0
+        return self._mean_distance(embeddings) / self.reference_distance - 1
+
+    def _match_stable_ids(self, new_centroids: Dict[int, "np.ndarray"]) -> Dict[int, int]:
+        import numpy as np
+        from scipy.optimize import linear_sum_assignment
+
+        mapping = {}
+        new_ids = list(new_centroids)
+        old_ids = list(self.centroids)
+
+        if old_ids and new_ids:
+            new_mat = np.stack([new_centroids[t] for t in new_ids])
+            old_mat = np.stack([self.centroids[t] for t in old_ids])
+            new_mat = new_mat / np.linalg.norm(new_mat, axis=1, keepdims=True)
+            old_mat = old_mat / np.linalg.norm(old_mat, axis=1, keepdims=True)
+
+            similarity = new_mat @ old_mat.T
+            rows, cols = linear_sum_assignment(-similarity)
+
+            for r, c in zip(rows, cols):
+                if similarity[r, c] >= self.min_similarity:
+                    mapping[new_ids[r]] = old_ids[c]
+
+        for topic in new_ids:
+            if topic not in mapping:
+                mapping[topic] = self.next_id
+                self.next_id += 1
+
+        return mapping
+
+    def refit(self, documents: List[str], embeddings: "np.ndarray") -> List[int]:
+        self.refitted = True
+        self.topic_model = create_topic_model(self.n_topics, incremental=True)
+        model_topics, _ = self.topic_model.fit_transform(documents, embeddings=embeddings)
+
+        new_centroids = _centroids(model_topics, embeddings)
+        self.stable_ids = self._match_stable_ids(new_centroids)
+        self.centroids = {
+            self.stable_ids[t]: vec for t, vec in new_centroids.items()
+        }
+        self.reference_distance = self._mean_distance(embeddings)
+
+        return list(model_topics)
+
+    # -------------------------------------------------
+    # Update
+    # -------------------------------------------------
+
+    def update(
+        self,
+        documents: List[str],
+        embeddings: "np.ndarray",
+        force_refit: bool = False
+    ) -> Tuple[List[int], Dict[int, list]]:
+        """
+        Assigns documents to stable topic ids, refitting only if forced or
+        drifted. Returns (topics, topic_keywords) like fit_topics.
+        """
+
+        if not documents:
+            raise ValueError("No documents provided for topic modeling")
+
+        self.refitted = False
+
+        if self.topic_model is None or force_refit:
+            print("Topic model: full fit")
+            model_topics = self.refit(documents, embeddings)
+        else:
+            drift = self.drift(embeddings)
+            if drift > self.drift_threshold:
+                print(f"Topic model: drift {drift:.3f} > {self.drift_threshold}, refitting")
+                model_topics = self.refit(documents, embeddings)
+            else:
+                print(f"Topic model: drift {drift:.3f}, assigning to existing topics")
+                model_topics, _ = self.topic_model.transform(documents, embeddings=embeddings)
+                self.topic_model.hdbscan_model.partial_fit(embeddings)
+
+        model_topics = [int(t) for t in model_topics]
+
+        for topic in set(model_topics):
+            if topic != -1 and topic not in self.stable_ids:
+                self.stable_ids[topic] = self.next_id
+                self.next_id += 1
+
+        topics = [
+            self.stable_ids[t] if t != -1 else -1
+            for t in model_topics
+        ]
+        topic_keywords = {
+            self.stable_ids[t]: self.topic_model.get_topic(t)
+            for t in set(model_topics)
+            if t != -1
+        }
+
+        self.save()
+        return topics, topic_keywords
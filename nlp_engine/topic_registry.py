@@ -0,0 +1,239 @@
+import json
+import os
+import re
+import shutil
+from datetime import datetime
+from typing import Dict, List, Optional, TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from bertopic import BERTopic
+
+
+DEFAULT_REGISTRY_DIR = "topic_models"
+
+# Names save() generates: v<date>-<time>, with a .N suffix on collisions
+VERSION_PATTERN = re.compile(r"v\d{8}-\d{6}(\.\d+)?")
+
+
+# -----------------------------------------------------
+# A Loaded Model Version
+# -----------------------------------------------------
+
+class TopicModelVersion:
+    """
+    One registered topic model.
+
+    centroids.npy is memory-mapped, so loading a version for assignment is
+    a JSON read plus an mmap; the full BERTopic object (c-TF-IDF, vocab) is
+    only deserialised if bertopic() is called.
+
+    topic_ids, keywords and assign() use the published (stable) ids. The
+    saved BERTopic numbers its topics its own way; to_stable() and
+    model_topic() translate between the two.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+        with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+
+        self.version = self.manifest["version"]
+        self.topic_ids = np.asarray(self.manifest["topic_ids"], dtype=np.int64)
+        self.keywords = {
+            int(k): v for k, v in self.manifest["keywords"].items()
+        }
+        # Published id -> BERTopic's id; absent when they are the same
+        self.model_topic_ids = {
+            int(k): int(v)
+            for k, v in self.manifest.get("model_topic_ids", {}).items()
+        }
+        self._stable_ids = {v: k for k, v in self.model_topic_ids.items()}
+
+        self.centroids = np.load(
+            os.path.join(path, "centroids.npy"), mmap_mode="r"
+        )
+        norms = np.linalg.norm(self.centroids, axis=1, keepdims=True)
+        self._unit_centroids = self.centroids / np.maximum(norms, 1e-12)
+        self._bertopic = None
+
+    def assign(self, embeddings: np.ndarray) -> List[int]:
+        """Nearest topic by cosine similarity to the topic centroids."""
+        if len(self.topic_ids) == 0:
+            return [-1] * len(embeddings)
+
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        similarity = (embeddings / np.maximum(norms, 1e-12)) @ self._unit_centroids.T
+        return self.topic_ids[similarity.argmax(axis=1)].tolist()
+
+    def to_stable(self, model_topics: List[int]) -> List[int]:
+        """BERTopic topic ids (e.g. from bertopic().transform) -> published ids."""
+        if not self.model_topic_ids:
+            return [int(t) for t in model_topics]
+        return [self._stable_ids.get(int(t), -1) for t in model_topics]
+
+    def model_topic(self, topic: int) -> int:
+        """Published id -> the id to pass to bertopic().get_topic()."""
+        return self.model_topic_ids.get(topic, topic)
+
+    def bertopic(self) -> "BERTopic":
+        if self._bertopic is None:
+            from bertopic import BERTopic
+            self._bertopic = BERTopic.load(os.path.join(self.path, "bertopic"))
+        return self._bertopic
+
+
+# -----------------------------------------------------
+# Versioned Registry
+# -----------------------------------------------------
+
+class TopicModelRegistry:
+    """
+    Fitted topic models saved under version tags.
+
+    Each version directory holds:
+        bertopic/       BERTopic saved with safetensors (+ c-TF-IDF)
+        centroids.npy   topic centroids in embedding space, one row per topic
+        manifest.json   version, published topic ids, keywords, metadata,
+                        and the published -> BERTopic id mapping
+    A LATEST file points at the newest version.
+    """
+
+    def __init__(self, root: str = DEFAULT_REGISTRY_DIR):
+        self.root = root
+        self._loaded: Dict[str, TopicModelVersion] = {}
+        os.makedirs(root, exist_ok=True)
+
+    def _version_dir(self, version: str) -> str:
+        return os.path.join(self.root, version)
+
+    def save(
+        self,
+        topic_model: "BERTopic",
+        topics: List[int],
+        embeddings: np.ndarray,
+        topic_keywords: Dict[int, list],
+        version: Optional[str] = None,
+        embedding_model_name: Optional[str] = None,
+        metadata: Optional[dict] = None,
+        model_topic_ids: Optional[Dict[int, int]] = None
+    ) -> str:
+        """
+        Registers a fitted model. `topics` / `topic_keywords` use the ids
+        the pipeline publishes (stable ids in incremental mode);
+        model_topic_ids maps each of those to topic_model's own id when
+        they differ.
+        """
+
+        if version is None:
+            version = datetime.utcnow().strftime("v%Y%m%d-%H%M%S")
+            suffix = 1
+            while os.path.exists(self._version_dir(version)):
+                suffix += 1
+                version = f"{version.split('.')[0]}.{suffix}"
+
+        if not VERSION_PATTERN.fullmatch(version):
+            raise ValueError(f"Invalid topic model version name: {version}")
+
+        path = self._version_dir(version)
+        if os.path.exists(path):
+            raise ValueError(f"Topic model version {version} already exists")
+
+        tmp_path = path + ".tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        topic_model.save(
+            os.path.join(tmp_path, "bertopic"),
+            serialization="safetensors",
+            save_ctfidf=True,
+            save_embedding_model=embedding_model_name or False
+        )
+
+        topics = np.asarray(topics)
+        topic_ids = sorted(int(t) for t in set(topics.tolist()) if t != -1)
+
+        centroids = np.zeros((len(topic_ids), embeddings.shape[1]), np.float32)
+        for row, topic in enumerate(topic_ids):
+            centroids[row] = embeddings[topics == topic].mean(axis=0)
+        np.save(os.path.join(tmp_path, "centroids.npy"), centroids)
+
+        with open(os.path.join(tmp_path, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "version": version,
+                "created_at": datetime.utcnow().isoformat(),
+                "topic_ids": topic_ids,
+                "keywords": {
+                    str(t): [[w, float(s)] for w, s in topic_keywords.get(t, [])]
+                    for t in topic_ids
+                },
+                "model_topic_ids": {
+                    str(t): int(model_topic_ids[t])
+                    for t in topic_ids
+                    if model_topic_ids and t in model_topic_ids
+                },
+                "n_documents": int(len(topics)),
+                "metadata": metadata or {}
+            }, f)
+
+        # Publish atomically so readers never see a half-written version
+        os.replace(tmp_path, path)
+        self._set_latest(version)
+
+        print(f"Registered topic model {version}")
+        return version
+
+    def _set_latest(self, version: str):
+        tmp = os.path.join(self.root, "LATEST.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(version)
+        os.replace(tmp, os.path.join(self.root, "LATEST"))
+
+    def latest_version(self) -> Optional[str]:
+        path = os.path.join(self.root, "LATEST")
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return f.read().strip() or None
+
+    def list_versions(self) -> List[str]:
+        """Registered versions, oldest first."""
+        created = {}
+        for name in os.listdir(self.root):
+            manifest = os.path.join(self.root, name, "manifest.json")
+            if os.path.exists(manifest):
+                with open(manifest, encoding="utf-8") as f:
+                    created[name] = json.load(f)["created_at"]
+
+        return sorted(created, key=created.get)
+
+    def load(self, version: Optional[str] = None) -> TopicModelVersion:
+        """Loads a version (default: latest); loaded versions are cached."""
+        version = version or self.latest_version()
+        if version is None:
+            raise FileNotFoundError("No topic model has been registered yet")
+
+        if version not in self._loaded:
+            # Versions come from API requests; anything but a registry
+            # name could point the path outside the registry
+            if not VERSION_PATTERN.fullmatch(version):
+                raise FileNotFoundError(f"Unknown topic model version: {version}")
+            path = self._version_dir(version)
+            if not os.path.exists(os.path.join(path, "manifest.json")):
+                raise FileNotFoundError(f"Unknown topic model version: {version}")
+            self._loaded[version] = TopicModelVersion(path)
+
+        return self._loaded[version]
+
+    def prune(self, keep: int = 10):
+        """Deletes all but the newest `keep` versions (never LATEST)."""
+        latest = self.latest_version()
+        versions = self.list_versions()
+
+        for version in versions[:-keep] if keep else versions:
+            if version != latest:
+                shutil.rmtree(self._version_dir(version), ignore_errors=True)
+                self._loaded.pop(version, None)
@@ -1,68 +1,247 @@
-import math
-from collections import defaultdict
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+
+# -----------------------------------------------------
+# Time Buckets
+# -----------------------------------------------------
+
+BUCKETS = ("hour", "day", "week")
+
+
+def to_datetime64(timestamps) -> np.ndarray:
+    """
+    datetime64[us] array; anything that is not a datetime becomes NaT.
+    Aware datetimes keep their wall-clock time, as strftime would.
+    """
+
+    if isinstance(timestamps, np.ndarray) and timestamps.dtype.kind == "M":
+        return timestamps.astype("datetime64[us]")
+
+    if hasattr(timestamps, "dtype") and getattr(timestamps.dtype, "kind", "") == "M":
+        # pandas Series / DatetimeIndex
+        if getattr(timestamps.dtype, "tz", None) is not None:
+            accessor = getattr(timestamps, "dt", timestamps)
+            timestamps = accessor.tz_localize(None)
+        return np.asarray(timestamps, dtype="datetime64[us]")
+
+    return np.array(
+        [
+            ts.replace(tzinfo=None) if isinstance(ts, datetime) else None
+            for ts in timestamps
+        ],
+        dtype="datetime64[us]"
+    )
+
+
+def bucket_keys(times: np.ndarray, bucket: str = "week") -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns (keys, ordinals) for a datetime64 array.
+
+    keys sort chronologically and identify a bucket; for "week" they
+    reproduce strftime("%Y-%W") as year * 100 + week, so a week spanning
+    New Year splits in two exactly as before. ordinals count buckets
+    since the epoch without gaps and are used for windowing.
+    """
+
+    if bucket == "hour":
+        ordinals = times.astype("datetime64[h]").astype(np.int64)
+        return ordinals, ordinals
+
+    days = times.astype("datetime64[D]")
+    day_ordinals = days.astype(np.int64)
+
+    if bucket == "day":
+        return day_ordinals, day_ordinals
+
+    if bucket == "week":
+        years = days.astype("datetime64[Y]")
+        year_day = (days - years.astype("datetime64[D]")).astype(np.int64)
+        weekday = (day_ordinals + 3) % 7   # 1970-01-01 was a Thursday; Monday = 0
+
+        week_of_year = (year_day + 7 - weekday) // 7
+        keys = (years.astype(np.int64) + 1970) * 100 + week_of_year
+        ordinals = (day_ordinals + 3) // 7  # Monday-based weeks since epoch
+        return keys, ordinals
+
+    raise ValueError(f"Unknown trend bucket '{bucket}', expected one of {BUCKETS}")
+
+
+# -----------------------------------------------------
+# Trend Growth
+# -----------------------------------------------------
+
+def bucket_counts(
+    topics,
+    timestamps,
+    bucket: str = "week",
+    window: Optional[int] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Mention counts per (topic, bucket), as three aligned arrays
+    (topic, bucket key, count) sorted by topic then time.
+
+    window keeps only the last `window` buckets before the newest
+    timestamp in the data.
+    """
+
+    topics = np.asarray(topics, dtype=np.int64)
+    times = to_datetime64(timestamps)
+
+    valid = (topics != -1) & ~np.isnat(times)
+    topics, times = topics[valid], times[valid]
+
+    if len(topics) == 0:
+        empty = np.empty(0, np.int64)
+        return empty, empty, empty
+
+    keys, ordinals = bucket_keys(times, bucket)
+
+    if window:
+        recent = ordinals > ordinals.max() - window
+        topics, keys = topics[recent], keys[recent]
+
+    # Pack (topic, bucket) into one int64 so a single sort groups the
+    # pairs; run boundaries then give the counts
+    key_base = keys.min()
+    topic_base = topics.min()
+    packed = ((topics - topic_base) << 32) | (keys - key_base)
+    packed.sort()
+
+    starts = np.flatnonzero(np.r_[True, packed[1:] != packed[:-1]])
+    counts = np.diff(np.r_[starts, len(packed)])
+    runs = packed[starts]
+
+    return (runs >> 32) + topic_base, (runs & 0xFFFFFFFF) + key_base, counts
 
 
 def analyze_trends(
     topics: List[int],
-    timestamps: List[datetime]
+    timestamps: List[datetime],
+    bucket: str = "week",
+    window: Optional[int] = None
 ) -> Dict[int, float]:
     """
     Computes trend growth G_k as:
 
     G_k = d/dt log(|o_k(t)|)
 
-    where |o_k(t)| is the weekly mention count
-    and derivative is estimated via linear regression slope.
+    where |o_k(t)| is the mention count per bucket (weekly by default)
+    and the derivative is the least-squares slope of log counts against
+    the index of each non-empty bucket. Slopes for every topic are solved
+    at once from per-topic sums.
     """
 
-    topic_time_count = defaultdict(lambda: defaultdict(int))
-
-    # Aggregate weekly counts
-    for topic, ts in zip(topics, timestamps):
-        if topic == -1:
-            continue
+    topic_ids, _, counts = bucket_counts(topics, timestamps, bucket, window)
+    return trend_slopes(topic_ids, counts)
 
-        if not isinstance(ts, datetime):
-            continue
 
-        week_key = ts.strftime("%Y-%W")
-        topic_time_count[topic][week_key] += 1
+def trend_slopes(topic_ids: np.ndarray, counts: np.ndarray) -> Dict[int, float]:
+    """
+    G_k from per-(topic, bucket) counts sorted by topic then time, as
+    returned by bucket_counts or read back from persisted counters.
+    """
 
-    trend_scores = {}
+    topic_ids = np.asarray(topic_ids, dtype=np.int64)
+    counts = np.asarray(counts, dtype=np.float64)
 
-    for topic, weeks in topic_time_count.items():
-        sorted_weeks = sorted(weeks.items())
-        counts = [count for _, count in sorted_weeks]
+    # Buckets whose counter dropped to zero are not observations
+    nonzero = counts > 0
+    topic_ids, counts = topic_ids[nonzero], counts[nonzero]
 
-        if len(counts) < 2:
-            continue
+    if len(topic_ids) == 0:
+        return {}
 
-        # Log transform
-        log_counts = [math.log(max(1, c)) for c in counts]
+    # Group index and position of each bucket within its topic
+    starts = np.flatnonzero(np.r_[True, topic_ids[1:] != topic_ids[:-1]])
+    sizes = np.diff(np.r_[starts, len(topic_ids)])
+    group = np.repeat(np.arange(len(starts)), sizes)
+    x = np.arange(len(topic_ids)) - starts[group]
 
-        # Linear regression slope
-        n = len(log_counts)
-        x = list(range(n))
+    y = np.log(counts)
+    n = sizes.astype(np.float64)
 
-        mean_x = sum(x) / n
-        mean_y = sum(log_counts) / n
+    mean_x = (n - 1) / 2
+    mean_y = np.bincount(group, weights=y) / n
 
-        numerator = sum(
-            (xi - mean_x) * (yi - mean_y)
-            for xi, yi in zip(x, log_counts)
-        )
-        denominator = sum(
-            (xi - mean_x) ** 2
-            for xi in x
-        )
+    dx = x - mean_x[group]
+    numerator = np.bincount(group, weights=dx * (y - mean_y[group]))
+    denominator = np.bincount(group, weights=dx * dx)
 
-        if denominator == 0:
+    trend_scores = {}
+    for topic, size, num, den in zip(
+        topic_ids[starts].tolist(), sizes, numerator, denominator
+    ):
+        if size < 2 or den == 0:
             continue
+        trend_scores[topic] = round(float(num / den), 3)
+
+    return trend_scores
+
 
-        slope = numerator / denominator
+# -----------------------------------------------------
+# Burst Detection
+# -----------------------------------------------------
 
-        trend_scores[topic] = round(slope, 3)
+def detect_bursts(
+    topic_ids,
+    ordinals,
+    counts,
+    alpha: float = 0.3,
+    z_threshold: float = 3.0,
+    min_count: int = 5,
+    lookback: int = 26
+) -> List[dict]:
+    """
+    Flags topics whose newest bucket spikes above their recent history.
+
+    Counts are laid out densely over the last `lookback` bucket ordinals
+    (empty buckets count as zero). An exponentially weighted mean and
+    variance over every bucket but the newest give the expected level;
+    the newest bucket is a burst when its z-score reaches z_threshold
+    and it holds at least min_count mentions.
+    """
 
-    return trend_scores
\ No newline at end of file
+    topic_ids = np.asarray(topic_ids, dtype=np.int64)
+    ordinals = np.asarray(ordinals, dtype=np.int64)
+    counts = np.asarray(counts, dtype=np.float64)
+
+    if len(topic_ids) == 0:
+        return []
+
+    latest = ordinals.max()
+    recent = ordinals > latest - lookback
+    topic_ids, ordinals, counts = topic_ids[recent], ordinals[recent], counts[recent]
+
+    topics, rows = np.unique(topic_ids, return_inverse=True)
+    columns = ordinals - (latest - lookback + 1)
+
+    # Duplicate (topic, ordinal) cells, e.g. a week split by New Year, add up
+    dense = np.zeros((len(topics), lookback))
+    np.add.at(dense, (rows, columns), counts)
+
+    mean = dense[:, 0].copy()
+    var = np.zeros(len(topics))
+    for t in range(1, lookback - 1):
+        diff = dense[:, t] - mean
+        increment = alpha * diff
+        mean += increment
+        var = (1 - alpha) * (var + diff * increment)
+
+    # The +1 keeps near-silent topics from alerting on a couple of posts
+    current = dense[:, -1]
+    z = (current - mean) / np.sqrt(var + 1.0)
+
+    bursts = []
+    for i in np.flatnonzero((z >= z_threshold) & (current >= min_count)):
+        bursts.append({
+            "topic": int(topics[i]),
+            "ordinal": int(latest),
+            "count": int(current[i]),
+            "expected": round(float(mean[i]), 2),
+            "z_score": round(float(z[i]), 2)
+        })
+
+    return sorted(bursts, key=lambda b: b["z_score"], reverse=True)
@@ -0,0 +1,282 @@
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from nlp_engine.trend_analysis import (
+    bucket_keys,
+    detect_bursts,
+    to_datetime64,
+    trend_slopes
+)
+
+
+COUNTERS_COLLECTION = "topic_trend_counts"
+JOURNAL_COLLECTION = "topic_trend_journal"
+
+DUPLICATE_KEY_CODE = 11000
+
+
+def bucket_start(ordinal: int, bucket: str) -> datetime:
+    """First instant of a bucket, for readable counter documents."""
+    if bucket == "hour":
+        value = np.datetime64(ordinal, "h")
+    elif bucket == "day":
+        value = np.datetime64(ordinal, "D")
+    else:
+        value = np.datetime64(ordinal * 7 - 3, "D")   # Monday of that week
+    return value.astype("datetime64[us]").astype(datetime)
+
+
+# -----------------------------------------------------
+# Persisted Topic x Bucket Counters
+# -----------------------------------------------------
+
+class TopicTrendCounters:
+    """
+    Mention counts per (topic model version, topic, time bucket), kept in
+    their own collection and maintained with $inc as posts are assigned.
+
+    Each counted post remembers what it was counted under (its
+    `trend_counter` field), so re-running the pipeline over the same
+    posts is a no-op and a post that moves topic is moved, not recounted.
+    Reading trends or bursts then costs O(topics x buckets), not O(posts).
+
+    Markers and counters live in different collections (or stores), so a
+    chunk's moves are journaled before its markers are written: journal()
+    records them, the caller writes the markers, apply() moves the
+    counters. Every $inc is guarded by the chunk id ($addToSet on the
+    counter) until the entry is closed, so re-applying a chunk that was
+    partly applied only moves the rest, and a closed entry is not
+    applied again. A journal entry left by a crash is finished by
+    recover() from the markers that actually got stored, so a chunk is
+    never lost or counted twice.
+    """
+
+    def __init__(self, collection, bucket: str = "week", journal=None):
+        self.collection = collection
+        self.bucket = bucket
+        self.journal_collection = journal
+
+    def ensure_indexes(self):
+        self.collection.create_index(
+            [
+                ("topic_model_version", ASCENDING),
+                ("bucket", ASCENDING),
+                ("topic_id", ASCENDING),
+                ("key", ASCENDING)
+            ]
+        )
+        # recover() scans the open entries of a source on every run
+        if self.journal_collection is not None:
+            self.journal_collection.create_index([("source", ASCENDING)])
+
+    def counter_keys(
+        self,
+        topics: List[int],
+        timestamps: list,
+        topic_model_version: str
+    ) -> List[Optional[dict]]:
+        """The counter each post belongs in (None: not counted)."""
+        times = to_datetime64(timestamps)
+        valid = ~np.isnat(times)
+
+        keys = np.zeros(len(times), np.int64)
+        ordinals = np.zeros(len(times), np.int64)
+        if valid.any():
+            keys[valid], ordinals[valid] = bucket_keys(times[valid], self.bucket)
+
+        return [
+            {
+                "topic_model_version": topic_model_version,
+                "bucket": self.bucket,
+                "topic_id": int(topic),
+                "key": int(key),
+                "ordinal": int(ordinal)
+            } if topic != -1 and ok else None
+            for topic, ok, key, ordinal in zip(
+                topics, valid.tolist(), keys.tolist(), ordinals.tolist()
+            )
+        ]
+
+    def journal(
+        self,
+        post_ids: List,
+        previous: List[Optional[dict]],
+        current: List[Optional[dict]],
+        source: str = "posts"
+    ) -> Optional[dict]:
+        """
+        Records which posts move from which counter to which, before their
+        markers are written. Returns the entry to apply() once they are,
+        or None when nothing moves. source names the store holding the
+        markers, for recover().
+        """
+
+        moves = [
+            [post_id, old, new]
+            for post_id, old, new in zip(post_ids, previous, current)
+            if old != new
+        ]
+        if not moves:
+            return None
+
+        entry = {
+            "_id": uuid.uuid4().hex,
+            "source": source,
+            "moves": moves,
+            "created_at": datetime.utcnow()
+        }
+        self.journal_collection.insert_one(entry)
+        return entry
+
+    def apply(self, entry: Optional[dict], stored: Optional[dict] = None) -> int:
+        """
+        Moves the counters of a journaled chunk and closes its entry.
+        stored (post id -> marker as written) replaces the intended markers
+        when some writes may not have landed. Returns the number of counter
+        documents touched.
+        """
+
+        if entry is None:
+            return 0
+
+        chunk_id = entry["_id"]
+        if self.journal_collection.count_documents({"_id": chunk_id}, limit=1) == 0:
+            return 0
+        deltas = Counter()
+        fields = {}
+
+        for post_id, old, new in entry["moves"]:
+            if stored is not None:
+                new = stored.get(post_id)
+            if old == new:
+                continue
+            if old is not None:
+                deltas[_counter_id(old)] -= 1
+            if new is not None:
+                deltas[_counter_id(new)] += 1
+                fields.setdefault(_counter_id(new), new)
+
+        requests = []
+        touched = []
+        for counter_id, delta in deltas.items():
+            if delta == 0:
+                continue
+
+            touched.append(counter_id)
+            update = {
+                "$inc": {"count": delta},
+                "$addToSet": {"applied": chunk_id}
+            }
+            if counter_id in fields:
+                counter = fields[counter_id]
+                update["$setOnInsert"] = dict(
+                    counter,
+                    bucket_start=bucket_start(counter["ordinal"], self.bucket)
+                )
+            # A counter already holding chunk_id does not match, and its
+            # upsert then fails on the _id: that counter was moved already
+            requests.append(UpdateOne(
+                {"_id": counter_id, "applied": {"$ne": chunk_id}},
+                update,
+                upsert=True
+            ))
+
+        if requests:
+            try:
+                self.collection.bulk_write(requests, ordered=False)
+            except BulkWriteError as e:
+                errors = e.details.get("writeErrors", [])
+                if any(err.get("code") != DUPLICATE_KEY_CODE for err in errors):
+                    raise
+
+        self.journal_collection.delete_one({"_id": chunk_id})
+
+        # Only needed while the entry was open; a crash before this just
+        # leaves a stale id behind
+        if touched:
+            self.collection.update_many(
+                {"_id": {"$in": touched}},
+                {"$pull": {"applied": chunk_id}}
+            )
+
+        return len(requests)
+
+    def recover(
+        self,
+        read_markers: Callable[[List], Dict],
+        source: str = "posts"
+    ) -> int:
+        """
+        Finishes the journal entries an interrupted run left behind, using
+        the markers read back from the store (post ids -> marker) to tell
+        which moves were written. Returns the number of entries recovered.
+        """
+
+        entries = list(self.journal_collection.find({"source": source}))
+        for entry in entries:
+            post_ids = [post_id for post_id, _, _ in entry["moves"]]
+            self.apply(entry, stored=read_markers(post_ids))
+        return len(entries)
+
+    def load(
+        self,
+        topic_model_version: str,
+        window: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """(topic, key, ordinal, count) arrays sorted by topic then key."""
+        query = {
+            "topic_model_version": topic_model_version,
+            "bucket": self.bucket,
+            "count": {"$gt": 0}
+        }
+
+        if window:
+            newest = self.collection.find_one(
+                query, {"ordinal": 1}, sort=[("ordinal", -1)]
+            )
+            if newest is not None:
+                query["ordinal"] = {"$gt": newest["ordinal"] - window}
+
+        docs = list(self.collection.find(
+            query, {"topic_id": 1, "key": 1, "ordinal": 1, "count": 1, "_id": 0}
+        ))
+
+        rows = np.array(
+            [(d["topic_id"], d["key"], d["ordinal"], d["count"]) for d in docs],
+            dtype=np.int64
+        ).reshape(-1, 4)
+        rows = rows[np.lexsort((rows[:, 1], rows[:, 0]))]
+
+        return rows[:, 0], rows[:, 1], rows[:, 2], rows[:, 3]
+
+    def trends(
+        self,
+        topic_model_version: str,
+        window: Optional[int] = None
+    ) -> Dict[int, float]:
+        topic_ids, _, _, counts = self.load(topic_model_version, window)
+        return trend_slopes(topic_ids, counts)
+
+    def bursts(self, topic_model_version: str, **kwargs) -> List[dict]:
+        topic_ids, _, ordinals, counts = self.load(
+            topic_model_version, kwargs.get("lookback", 26)
+        )
+        bursts = detect_bursts(topic_ids, ordinals, counts, **kwargs)
+
+        for burst in bursts:
+            burst["bucket"] = self.bucket
+            burst["bucket_start"] = bucket_start(burst["ordinal"], self.bucket)
+        return bursts
+
+
+def _counter_id(counter: dict) -> str:
+    return "|".join(
+        str(counter[f])
+        for f in ("topic_model_version", "bucket", "topic_id", "key")
+    )
@@ -0,0 +1,520 @@
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from nlp_engine.embedding_store import append_log, read_log
+
+
+# -----------------------------------------------------
+# Index Configuration
+# -----------------------------------------------------
+
+DEFAULT_INDEX_DIR = "vector_index"
+EMBEDDING_DIM = 384
+INITIAL_CAPACITY = 1024
+
+# Below this many vectors a blocked exact scan is already sub-millisecond
+MIN_TRAIN_SIZE = 20000
+# Retrain the coarse quantizer once the index has grown this much
+RETRAIN_GROWTH = 4.0
+MAX_LISTS = 4096
+TRAIN_SAMPLES_PER_LIST = 64
+SCAN_BLOCK = 65536
+
+# Per-row filter columns, memory-mapped next to the vectors
+ROW_DTYPE = np.dtype([
+    ("list", np.int32),
+    ("created", np.int64),
+    ("subreddit", np.int32)
+])
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def to_epoch(value) -> int:
+    """Naive-UTC datetime (as stored by the scraper) -> epoch seconds."""
+    if value is None:
+        return 0
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            return int(value.timestamp())
+        return int((value - _EPOCH).total_seconds())
+    return int(value)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest scores, best first."""
+    if len(scores) > k:
+        part = np.argpartition(-scores, k - 1)[:k]
+    else:
+        part = np.arange(len(scores))
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+# -----------------------------------------------------
+# IVF Vector Index
+# -----------------------------------------------------
+
+class VectorIndex:
+    """
+    Persistent cosine-similarity index over post embeddings.
+
+    Vectors are L2-normalised and kept in one memory-mapped matrix. Once
+    the index holds MIN_TRAIN_SIZE vectors, a k-means coarse quantizer
+    splits them into ~4*sqrt(N) inverted lists and a query only scores
+    the nprobe lists closest to it (IVF). Smaller indexes fall back to a
+    blocked exact scan.
+
+    Files in the index directory:
+        vectors.npy     (capacity, dim) unit vectors, memory-mapped
+        centroids.npy   (nlist, dim) coarse quantizer, once trained
+        rows.npy        per-row list id, created_utc and subreddit code,
+                        memory-mapped
+        ids.log         post id of each row, one JSON line per row,
+                        append-only
+        meta.json       subreddit vocabulary, counters, committed log size
+
+    Ids never change row, so a flush appends the ids added since the
+    previous one and writes back dirty pages; nothing is rewritten
+    wholesale.
+    """
+
+    def __init__(
+        self,
+        directory: str = DEFAULT_INDEX_DIR,
+        dim: int = EMBEDDING_DIM,
+        dtype: str = "float32",
+        nprobe: int = 16
+    ):
+        self.directory = directory
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.nprobe = nprobe
+
+        self.vectors_path = os.path.join(directory, "vectors.npy")
+        self.centroids_path = os.path.join(directory, "centroids.npy")
+        self.rows_path = os.path.join(directory, "rows.npy")
+        self.ids_path = os.path.join(directory, "ids.log")
+        self.meta_path = os.path.join(directory, "meta.json")
+
+        os.makedirs(directory, exist_ok=True)
+
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.subreddits: List[str] = []
+        self._subreddit_codes: Dict[str, int] = {}
+        self.count = 0
+        self.trained_count = 0
+        self.centroids: Optional[np.ndarray] = None
+        self._log_size = 0
+        self._pending_ids: List[str] = []
+
+        # Rows grouped by inverted list; rebuilt lazily after writes
+        self._order: Optional[np.ndarray] = None
+        self._offsets: Optional[np.ndarray] = None
+        self.loaded_mtime = 0.0
+
+        if os.path.exists(self.meta_path) and os.path.exists(self.vectors_path):
+            self._load()
+        else:
+            self.vectors = self._create(INITIAL_CAPACITY)
+            self._set_rows(self._create_rows(INITIAL_CAPACITY))
+
+    # -------------------------------------------------
+    # Persistence
+    # -------------------------------------------------
+
+    def _load(self):
+        with open(self.meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+
+        self.vectors = np.load(self.vectors_path, mmap_mode="r+")
+
+        if meta["dim"] != self.dim or meta["dtype"] != self.dtype.name:
+            print("Vector index layout changed, rebuilding")
+            del self.vectors
+            self.vectors = self._create(INITIAL_CAPACITY)
+            self._set_rows(self._create_rows(INITIAL_CAPACITY))
+            return
+
+        self.subreddits = meta["subreddits"]
+        self._subreddit_codes = {s: i for i, s in enumerate(self.subreddits)}
+        self.count = meta["count"]
+        self.trained_count = meta["trained_count"]
+
+        legacy_rows = os.path.join(self.directory, "rows.npz")
+        if "ids" in meta:
+            # Written before ids and rows were appended in place: migrate
+            self.ids = meta["ids"]
+            self._pending_ids = list(self.ids)
+            rows = np.load(legacy_rows)
+            self._set_rows(self._create_rows(self.vectors.shape[0]))
+            self.lists[:self.count] = rows["lists"][:self.count]
+            self.created[:self.count] = rows["created"][:self.count]
+            self.subreddit[:self.count] = rows["subreddit"][:self.count]
+        else:
+            self._log_size = meta["log_size"]
+            self.ids = read_log(self.ids_path, self._log_size)
+            self._set_rows(np.load(self.rows_path, mmap_mode="r+"))
+
+        self.rows = {post_id: row for row, post_id in enumerate(self.ids)}
+
+        if os.path.exists(self.centroids_path) and self.trained_count:
+            self.centroids = np.load(self.centroids_path)
+
+        self.loaded_mtime = os.path.getmtime(self.meta_path)
+
+    def _create(self, capacity: int) -> np.memmap:
+        return np.lib.format.open_memmap(
+            self.vectors_path,
+            mode="w+",
+            dtype=self.dtype,
+            shape=(capacity, self.dim)
+        )
+
+    def _create_rows(self, capacity: int) -> np.memmap:
+        rows = np.lib.format.open_memmap(
+            self.rows_path, mode="w+", dtype=ROW_DTYPE, shape=(capacity,)
+        )
+        rows["subreddit"] = -1
+        return rows
+
+    def _set_rows(self, rows: np.memmap):
+        """Column views write straight through to the memory-mapped rows."""
+        self._rows = rows
+        self.lists = rows["list"]
+        self.created = rows["created"]
+        self.subreddit = rows["subreddit"]
+
+    def _ensure_capacity(self, needed: int):
+        capacity = self.vectors.shape[0]
+        if needed <= capacity:
+            return
+
+        while capacity < needed:
+            capacity *= 2
+
+        tmp_path = self.vectors_path + ".tmp"
+        grown = np.lib.format.open_memmap(
+            tmp_path,
+            mode="w+",
+            dtype=self.dtype,
+            shape=(capacity, self.dim)
+        )
+        grown[:self.count] = self.vectors[:self.count]
+        grown.flush()
+
+        del self.vectors
+        del grown
+        os.replace(tmp_path, self.vectors_path)
+        self.vectors = np.load(self.vectors_path, mmap_mode="r+")
+
+        tmp_rows = self.rows_path + ".tmp"
+        grown_rows = np.lib.format.open_memmap(
+            tmp_rows, mode="w+", dtype=ROW_DTYPE, shape=(capacity,)
+        )
+        grown_rows["subreddit"] = -1
+        grown_rows[:self.count] = self._rows[:self.count]
+        grown_rows.flush()
+
+        del self._rows, self.lists, self.created, self.subreddit
+        del grown_rows
+        os.replace(tmp_rows, self.rows_path)
+        self._set_rows(np.load(self.rows_path, mmap_mode="r+"))
+
+    def flush(self):
+        self.vectors.flush()
+        self._rows.flush()
+
+        if self.centroids is not None:
+            np.save(self.centroids_path, self.centroids)
+
+        self._log_size = append_log(self.ids_path, self._log_size, self._pending_ids)
+        self._pending_ids = []
+
+        tmp_meta = self.meta_path + ".tmp"
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            json.dump({
+                "dim": self.dim,
+                "dtype": self.dtype.name,
+                "count": self.count,
+                "trained_count": self.trained_count,
+                "subreddits": self.subreddits,
+                "log_size": self._log_size
+            }, f)
+        os.replace(tmp_meta, self.meta_path)
+
+        self.loaded_mtime = os.path.getmtime(self.meta_path)
+
+    def is_stale(self) -> bool:
+        """True when another process has flushed a newer index to disk."""
+        return (
+            os.path.exists(self.meta_path) and
+            os.path.getmtime(self.meta_path) > self.loaded_mtime
+        )
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, post_id) -> bool:
+        return str(post_id) in self.rows
+
+    # -------------------------------------------------
+    # Coarse Quantizer
+    # -------------------------------------------------
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def _assign_lists(self, vectors: np.ndarray) -> np.ndarray:
+        assigned = np.empty(len(vectors), np.int32)
+        for start in range(0, len(vectors), SCAN_BLOCK):
+            block = np.asarray(vectors[start:start + SCAN_BLOCK], np.float32)
+            assigned[start:start + len(block)] = (
+                block @ self.centroids.T
+            ).argmax(axis=1)
+        return assigned
+
+    def train(self):
+        """(Re)builds the inverted lists from everything currently indexed."""
+        from sklearn.cluster import MiniBatchKMeans
+
+        nlist = int(min(MAX_LISTS, max(1, 4 * np.sqrt(self.count))))
+        n_samples = min(self.count, nlist * TRAIN_SAMPLES_PER_LIST)
+
+        rng = np.random.default_rng(42)
+        sample_rows = np.sort(rng.choice(self.count, n_samples, replace=False))
+        sample = np.asarray(self.vectors[sample_rows], np.float32)
+
+        # k-means++ seeding dominates training time at thousands of lists
+        # and buys little recall for a coarse quantizer
+        kmeans = MiniBatchKMeans(
+            n_clusters=nlist,
+            init="random",
+            max_iter=20,
+            random_state=42,
+            batch_size=max(1024, nlist * 4),
+            n_init=1
+        ).fit(sample)
+
+        self.centroids = _normalize(kmeans.cluster_centers_)
+        self.lists[:self.count] = self._assign_lists(self.vectors[:self.count])
+        self.trained_count = self.count
+        self._order = None
+
+        print(f"Vector index trained: {nlist} lists over {self.count} vectors")
+
+    def _maybe_train(self):
+        if self.count < MIN_TRAIN_SIZE:
+            return
+        if not self.is_trained or self.count >= self.trained_count * RETRAIN_GROWTH:
+            self.train()
+
+    def _build_lists(self):
+        order = np.argsort(self.lists[:self.count], kind="stable")
+        self._order = order.astype(np.int64)
+        self._offsets = np.searchsorted(
+            self.lists[:self.count][order],
+            np.arange(len(self.centroids) + 1)
+        )
+
+    # -------------------------------------------------
+    # Writes
+    # -------------------------------------------------
+
+    def _subreddit_code(self, name: Optional[str]) -> int:
+        if not name:
+            return -1
+        if name not in self._subreddit_codes:
+            self._subreddit_codes[name] = len(self.subreddits)
+            self.subreddits.append(name)
+        return self._subreddit_codes[name]
+
+    def add(
+        self,
+        ids: List,
+        embeddings: np.ndarray,
+        subreddits: Optional[List[str]] = None,
+        created: Optional[List] = None,
+        flush: bool = True
+    ):
+        """
+        Inserts or overwrites posts. Known ids keep their row, so re-running
+        the pipeline over the same posts does not grow the index.
+        """
+
+        if len(ids) == 0:
+            return
+
+        ids = [str(post_id) for post_id in ids]
+        vectors = _normalize(embeddings)
+        subreddits = subreddits or [None] * len(ids)
+        created = created or [None] * len(ids)
+
+        new = sum(1 for post_id in set(ids) if post_id not in self.rows)
+        self._ensure_capacity(self.count + new)
+
+        rows = np.empty(len(ids), np.int64)
+        for i, post_id in enumerate(ids):
+            row = self.rows.get(post_id)
+            if row is None:
+                row = self.count
+                self.count += 1
+                self.rows[post_id] = row
+                self.ids.append(post_id)
+                self._pending_ids.append(post_id)
+            rows[i] = row
+
+            self.created[row] = to_epoch(created[i])
+            self.subreddit[row] = self._subreddit_code(subreddits[i])
+
+        self.vectors[rows] = vectors
+
+        if self.is_trained:
+            self.lists[rows] = self._assign_lists(vectors)
+        self._order = None
+
+        self._maybe_train()
+        if flush:
+            self.flush()
+
+        print(f"Vector index: {len(ids)} upserted, {self.count} total")
+
+    # -------------------------------------------------
+    # Search
+    # -------------------------------------------------
+
+    def _filter_mask(
+        self,
+        rows,
+        subreddit: Optional[str],
+        since: Optional[datetime],
+        until: Optional[datetime]
+    ) -> Optional[np.ndarray]:
+        mask = None
+
+        if subreddit is not None:
+            code = self._subreddit_codes.get(subreddit, -2)
+            mask = self.subreddit[rows] == code
+        if since is not None:
+            m = self.created[rows] >= to_epoch(since)
+            mask = m if mask is None else mask & m
+        if until is not None:
+            m = self.created[rows] < to_epoch(until)
+            mask = m if mask is None else mask & m
+
+        return mask
+
+    def _scan(self, query, k, subreddit, since, until) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact blocked scan, holding only a running top-k between blocks."""
+        best_rows = np.empty(0, np.int64)
+        best_scores = np.empty(0, np.float32)
+
+        for start in range(0, self.count, SCAN_BLOCK):
+            rows = np.arange(start, min(start + SCAN_BLOCK, self.count))
+            mask = self._filter_mask(rows, subreddit, since, until)
+            if mask is not None:
+                rows = rows[mask]
+                if len(rows) == 0:
+                    continue
+                block = np.asarray(self.vectors[rows], np.float32)
+            else:
+                block = np.asarray(self.vectors[start:start + len(rows)], np.float32)
+
+            scores = block @ query
+            best_rows = np.concatenate([best_rows, rows])
+            best_scores = np.concatenate([best_scores, scores])
+
+            keep = _top_k(best_scores, k)
+            best_rows, best_scores = best_rows[keep], best_scores[keep]
+
+        return best_rows, best_scores
+
+    def _selective_rows(self, nprobe, subreddit, since, until) -> Optional[np.ndarray]:
+        """Rows passing the filter, if there are fewer than a probe visits."""
+        mask = self._filter_mask(slice(0, self.count), subreddit, since, until)
+        matching = np.flatnonzero(mask)
+
+        probe_size = nprobe * self.count / len(self.centroids)
+        return matching if len(matching) <= probe_size else None
+
+    def _probe(self, query, k, nprobe, subreddit, since, until) -> Tuple[np.ndarray, np.ndarray]:
+        if self._order is None:
+            self._build_lists()
+
+        ranked_lists = np.argsort(-(self.centroids @ query))
+        nprobe = min(nprobe, len(ranked_lists))
+
+        # Selective filters can starve the closest lists; widen the probe
+        # until k hits survive or every list has been visited
+        while True:
+            segments = [
+                self._order[self._offsets[l]:self._offsets[l + 1]]
+                for l in ranked_lists[:nprobe]
+            ]
+            rows = np.concatenate(segments) if segments else np.empty(0, np.int64)
+
+            mask = self._filter_mask(rows, subreddit, since, until)
+            if mask is not None:
+                rows = rows[mask]
+
+            if len(rows) >= k or nprobe >= len(ranked_lists):
+                break
+            nprobe = min(nprobe * 2, len(ranked_lists))
+
+        rows = np.sort(rows)   # sequential reads from the memmap
+        scores = np.asarray(self.vectors[rows], np.float32) @ query
+        keep = _top_k(scores, k)
+        return rows[keep], scores[keep]
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int = 10,
+        subreddit: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        nprobe: Optional[int] = None,
+        exact: bool = False
+    ) -> List[Tuple[str, float]]:
+        """Top-k (post id, cosine similarity) for a single query embedding."""
+        if self.count == 0:
+            return []
+
+        query = _normalize(np.asarray(query).reshape(-1))
+
+        nprobe = nprobe or self.nprobe
+        filtered = subreddit is not None or since is not None or until is not None
+
+        matching = None
+        if filtered and self.is_trained and not exact:
+            matching = self._selective_rows(nprobe, subreddit, since, until)
+
+        if exact or not self.is_trained:
+            rows, scores = self._scan(query, k, subreddit, since, until)
+        elif matching is not None:
+            # Fewer posts pass the filter than a probe would score anyway:
+            # scoring exactly those is both cheaper and exact
+            rows = matching
+            scores = np.asarray(self.vectors[rows], np.float32) @ query
+            keep = _top_k(scores, k)
+            rows, scores = rows[keep], scores[keep]
+        else:
+            rows, scores = self._probe(
+                query, k, nprobe, subreddit, since, until
+            )
+
+        return [
+            (self.ids[row], round(float(score), 4))
+            for row, score in zip(rows.tolist(), scores.tolist())
+        ]
@@ -0,0 +1,313 @@
+import multiprocessing
+import os
+import threading
+import traceback
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from pymongo import DESCENDING
+from pymongo.errors import DuplicateKeyError
+
+from config.database import db
+from config.settings import settings
+from database.pipeline_state import STATE_COLLECTION
+
+
+JOBS_COLLECTION = "pipeline_jobs"
+
+# Lives in pipeline_state; holds the id of the one active job
+LOCK_ID = "pipeline_job_lock"
+
+ACTIVE_STATUSES = ("queued", "running")
+
+# Parameters a job may pass through to run_pipeline.main
+JOB_PARAMS = ("force_refit", "limit", "chunk_size", "incremental", "restart")
+
+
+# -----------------------------------------------------
+# Job Store
+# -----------------------------------------------------
+
+class PipelineJobs:
+    """
+    Pipeline runs as jobs: submitted from the API, executed in a worker
+    process, tracked in the pipeline_jobs collection.
+
+    At most one job is active at a time. submit() takes a lock document
+    atomically, so concurrent requests (also from other API processes)
+    get the active job back instead of starting an overlapping run. A
+    lock whose job has finished, or whose heartbeat is older than
+    stale_seconds (a killed worker), is taken over. So is a job still
+    queued after queued_stale_seconds: its worker died before starting
+    it (spawn or import failure).
+
+    Cancellation is cooperative: a queued job is cancelled at once, a
+    running one stops after the chunk it is writing.
+    """
+
+    def __init__(
+        self,
+        jobs,
+        state,
+        stale_seconds: int = 1800,
+        queued_stale_seconds: int = 120
+    ):
+        self.jobs = jobs
+        self.state = state
+        self.stale_seconds = stale_seconds
+        self.queued_stale_seconds = queued_stale_seconds
+
+    def submit(self, params: dict) -> Tuple[dict, bool]:
+        """Returns (job, created); created is False for a deduplicated request."""
+        now = datetime.utcnow()
+        job = {
+            "_id": uuid.uuid4().hex,
+            "status": "queued",
+            "params": {k: v for k, v in params.items() if k in JOB_PARAMS},
+            "created_at": now,
+            "heartbeat_at": now,
+            "cancel_requested": False,
+            "progress": {"processed": 0, "chunks": 0},
+            "stages": {}
+        }
+        # Inserted before locking, so a lock holder always has a job document
+        self.jobs.insert_one(job)
+
+        holder = self._acquire(job["_id"])
+        if holder is not None:
+            active = self.get(holder)
+            if active is None or self._is_stale(active):
+                self._abandon(active)
+                self._release(holder)
+                holder = self._acquire(job["_id"])
+
+        if holder is not None:
+            self.jobs.delete_one({"_id": job["_id"]})
+            return self.get(holder), False
+        return job, True
+
+    def get(self, job_id: str) -> Optional[dict]:
+        return self.jobs.find_one({"_id": job_id})
+
+    def list(self, limit: int = 20) -> List[dict]:
+        return list(
+            self.jobs.find({}).sort("created_at", DESCENDING).limit(limit)
+        )
+
+    def cancel(self, job_id: str) -> Optional[dict]:
+        job = self.jobs.find_one_and_update(
+            {"_id": job_id, "status": "queued"},
+            {"$set": {
+                "status": "cancelled",
+                "cancel_requested": True,
+                "finished_at": datetime.utcnow()
+            }}
+        )
+        if job is not None:
+            self._release(job_id)
+        else:
+            self.jobs.update_one(
+                {"_id": job_id, "status": "running"},
+                {"$set": {"cancel_requested": True}}
+            )
+        return self.get(job_id)
+
+    # Worker side
+
+    def start(self, job_id: str) -> Optional[dict]:
+        """Marks a queued job running; None if it was cancelled meanwhile."""
+        return self.jobs.find_one_and_update(
+            {"_id": job_id, "status": "queued"},
+            {"$set": {
+                "status": "running",
+                "started_at": datetime.utcnow(),
+                "heartbeat_at": datetime.utcnow(),
+                "pid": os.getpid()
+            }}
+        )
+
+    def report_progress(self, job_id: str, progress: dict) -> bool:
+        """Stores progress and stage timings; returns True if cancel was requested."""
+        job = self.jobs.find_one_and_update(
+            {"_id": job_id},
+            {"$set": {
+                "run_id": progress["run_id"],
+                "progress": {
+                    "processed": progress["processed"],
+                    "chunks": progress["chunks"]
+                },
+                "stages": progress["stages"],
+                "heartbeat_at": datetime.utcnow()
+            }},
+            projection={"cancel_requested": 1}
+        )
+        return bool(job and job.get("cancel_requested"))
+
+    def heartbeat(self, job_id: str):
+        """Marks a running job alive without touching its progress."""
+        self.jobs.update_one(
+            {"_id": job_id, "status": "running"},
+            {"$set": {"heartbeat_at": datetime.utcnow()}}
+        )
+
+    def finish(self, job_id: str, status: str, fields: Optional[dict] = None):
+        self.jobs.update_one(
+            {"_id": job_id},
+            {"$set": dict(
+                fields or {},
+                status=status,
+                finished_at=datetime.utcnow()
+            )}
+        )
+        self._release(job_id)
+
+    # Lock
+
+    def _acquire(self, job_id: str) -> Optional[str]:
+        """Takes the lock for job_id; returns the current holder if taken."""
+        while True:
+            try:
+                self.state.find_one_and_update(
+                    {"_id": LOCK_ID, "job_id": None},
+                    {"$set": {"job_id": job_id, "acquired_at": datetime.utcnow()}},
+                    upsert=True
+                )
+                return None
+            except DuplicateKeyError:
+                holder = self._holder()
+                if holder is not None:
+                    return holder
+                # Released between the failed upsert and the read: the
+                # lock is free again, so retry rather than assume we hold it
+
+    def _holder(self) -> Optional[str]:
+        lock = self.state.find_one({"_id": LOCK_ID})
+        return lock.get("job_id") if lock else None
+
+    def _release(self, job_id: str):
+        self.state.update_one(
+            {"_id": LOCK_ID, "job_id": job_id},
+            {"$set": {"job_id": None}}
+        )
+
+    def _abandon(self, job: Optional[dict]):
+        if job is not None and job["status"] in ACTIVE_STATUSES:
+            self.finish(job["_id"], "failed", {
+                "error": (
+                    "Worker never started the job" if job["status"] == "queued"
+                    else "Worker stopped reporting progress"
+                )
+            })
+
+    def _is_stale(self, job: dict) -> bool:
+        if job["status"] not in ACTIVE_STATUSES:
+            return True
+        # Nothing heartbeats for a queued job; its worker starts it
+        # within seconds of the launch
+        seconds = (
+            self.queued_stale_seconds if job["status"] == "queued"
+            else self.stale_seconds
+        )
+        return job["heartbeat_at"] < datetime.utcnow() - timedelta(seconds=seconds)
+
+
+def open_jobs() -> PipelineJobs:
+    return PipelineJobs(
+        db[JOBS_COLLECTION],
+        db[STATE_COLLECTION],
+        stale_seconds=settings.job_stale_seconds,
+        queued_stale_seconds=settings.job_queued_stale_seconds
+    )
+
+
+# -----------------------------------------------------
+# Worker Process
+# -----------------------------------------------------
+
+@contextmanager
+def keep_alive(jobs: PipelineJobs, job_id: str, interval: float):
+    """
+    Heartbeats the job from a timer thread while the block runs. Progress
+    reports only come per chunk; the aggregation, ranking and write-back
+    after the last chunk can outlast stale_seconds on their own.
+    """
+
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(interval):
+            try:
+                jobs.heartbeat(job_id)
+            except Exception as e:
+                print(f"⚠️ Job heartbeat failed: {e}")
+
+    thread = threading.Thread(target=beat, name="job-heartbeat", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_job(job_id: str):
+    """Worker process entry point: runs one job to completion."""
+    jobs = open_jobs()
+    job = jobs.start(job_id)
+    if job is None:
+        return
+
+    # Imported once the job is running, so an import error fails the job
+    # instead of leaving it queued
+    try:
+        import run_pipeline
+    except BaseException as e:
+        jobs.finish(job_id, "failed", {
+            "error": repr(e),
+            "traceback": traceback.format_exc()[-4000:]
+        })
+        raise
+
+    def progress(update: dict):
+        if jobs.report_progress(job_id, update):
+            raise run_pipeline.PipelineCancelled()
+
+    try:
+        with keep_alive(jobs, job_id, settings.job_heartbeat_seconds):
+            report = run_pipeline.main(**job["params"], progress=progress)
+    except run_pipeline.PipelineCancelled:
+        jobs.finish(job_id, "cancelled")
+    except BaseException as e:
+        jobs.finish(job_id, "failed", {
+            "error": repr(e),
+            "traceback": traceback.format_exc()[-4000:]
+        })
+        raise
+    else:
+        jobs.finish(job_id, "completed", {
+            "run_id": report["_id"],
+            "stages": report["stages"],
+            "progress.processed": report.get("processed", 0),
+            "wall_seconds": report["wall_seconds"],
+            "snapshot_id": report.get("snapshot_id")
+        })
+
+
+def launch(job_id: str) -> multiprocessing.Process:
+    """
+    Runs the job in a fresh (spawned) process so the API process never
+    loads the models or blocks on the run.
+    """
+
+    # Reap workers that have exited since the last launch
+    multiprocessing.active_children()
+
+    process = multiprocessing.get_context("spawn").Process(
+        target=run_job,
+        args=(job_id,),
+        name=f"pipeline-job-{job_id[:8]}"
+    )
+    process.start()
+    return process
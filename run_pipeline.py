@@ -1,81 +1,1060 @@
-from datetime import datetime
+import threading
+from contextlib import closing, contextmanager
+from datetime import datetime, timedelta
 from collections import defaultdict, Counter
-from typing import List
+from functools import partial
+from typing import Callable, Iterator, List, Optional
 
 from config.database import db
-from nlp_engine.sentiment import analyze_sentiment
-from nlp_engine.topic_model import run_topic_modeling
-from nlp_engine.trend_analysis import analyze_trends
+from config.settings import settings
+from database.pipeline_state import STATE_COLLECTION, PipelineState, post_position
+from database.storage import (
+    STORAGE_BACKENDS,
+    TOPICS_COLLECTION,
+    MongoPostStore,
+    ParquetPostStore
+)
+from nlp_engine.sentiment import analyze_sentiment_batch, analyze_sentiment_cascade
+from nlp_engine.sentiment_cache import SentimentCache, analyze_sentiment_cached
+from nlp_engine.sentiment_pool import SentimentPool
+from nlp_engine.topic_model import (
+    EMBEDDING_MODEL_NAME,
+    IncrementalTopicModel,
+    create_topic_model,
+    encode_documents,
+    fit_topics
+)
+from nlp_engine.topic_registry import TopicModelRegistry
+from nlp_engine.dedup import StreamingDeduplicator
+from nlp_engine.embedding_store import EmbeddingStore
+from nlp_engine.vector_index import VectorIndex
+from nlp_engine.trend_counters import (
+    COUNTERS_COLLECTION,
+    JOURNAL_COLLECTION,
+    TopicTrendCounters
+)
+from nlp_engine.instrumentation import (
+    RUNS_COLLECTION,
+    PipelineMetrics,
+    format_summary,
+    report_json,
+    write_prometheus
+)
+from nlp_engine.opportunity_snapshots import SNAPSHOTS_COLLECTION, OpportunitySnapshots
+from nlp_engine.scheduler import StageScheduler
 from nlp_engine.scoring import compute_opportunity_scores
+from nlp_engine.opportunity_cube import (
+    CUBE_COLLECTION,
+    SliceAccumulator,
+    rank_slices,
+    save_rankings
+)
 
 
-POSTS_COLLECTION = db["posts"]
+def open_post_store():
+    """Where posts are read from and results written to (storage_backend)."""
+    if settings.storage_backend == "mongo":
+        return MongoPostStore(
+            db["posts"],
+            write_batch_size=settings.write_batch_size,
+            max_retries=settings.write_max_retries,
+            topics=db[TOPICS_COLLECTION]
+        )
+    if settings.storage_backend == "parquet":
+        return ParquetPostStore(
+            settings.storage_path,
+            write_batch_size=settings.write_batch_size
+        )
 
+    raise ValueError(
+        f"Unknown storage backend '{settings.storage_backend}', "
+        f"expected one of {STORAGE_BACKENDS}"
+    )
 
-def load_preprocessed_posts(limit: int = 500) -> List[dict]:
-    cursor = POSTS_COLLECTION.find(
-        {
-            "preprocessed": True,
-            "is_candidate": True,
-            "processed_text": {"$exists": True, "$ne": ""}
-        }
-    ).limit(limit)
 
-    posts = list(cursor)
+POST_STORE = open_post_store()
+CUBE = db[CUBE_COLLECTION]
+RUNS = db[RUNS_COLLECTION]
+SNAPSHOTS = OpportunitySnapshots(db[SNAPSHOTS_COLLECTION])
+TREND_COUNTERS = TopicTrendCounters(
+    db[COUNTERS_COLLECTION],
+    bucket=settings.trend_bucket,
+    journal=db[JOURNAL_COLLECTION]
+)
+
+# Bump when the shape of what the pipeline writes changes
+PIPELINE_VERSION = "v1"
+
+# Each store keeps its own watermark (positions are store-specific)
+PIPELINE_STATE = PipelineState(
+    db[STATE_COLLECTION], PIPELINE_VERSION, name=POST_STORE.name
+)
+
+
+def load_preprocessed_posts(limit: int = 500) -> List[dict]:
+    posts = next(POST_STORE.iter_chunks(limit, limit), [])
     print(f"Loaded {len(posts)} preprocessed posts")
     return posts
 
 
-def main():
-    print("\nStarting NLP Opportunity Pipeline\n")
+def iter_post_chunks(
+    chunk_size: int,
+    limit: Optional[int] = None,
+    after: Optional[dict] = None,
+    until: Optional[datetime] = None
+) -> Iterator[List[dict]]:
+    """
+    Streams projected posts from the configured store in fixed-size
+    chunks; with until set (incremental runs), only posts preprocessed
+    after the `after` position and no later than until, in
+    (preprocessed_at, _id) order so positions can be checkpointed.
+    """
 
-    # Load data
-    posts = load_preprocessed_posts()
+    loaded = 0
+    for chunk in POST_STORE.iter_chunks(chunk_size, limit, after, until):
+        loaded += len(chunk)
+        print(f"\nLoaded {len(chunk)} posts ({loaded} so far)")
+        yield chunk
 
-    # SAMPLE CHECK
-    print("\n SAMPLE PREPROCESSED POSTS\n")
-    for i, p in enumerate(posts[:5]):
-        print(f"Post {i+1}")
-        print("Original title:", p.get("title"))
-        print("Original text:", p.get("selftext", "")[:200])
-        print("Processed text:", p.get("processed_text", "")[:200])
-        print("-" * 60)
 
+def open_deduplicator() -> Optional[StreamingDeduplicator]:
+    """
+    One LSH index for the whole run, so near-duplicates are found across
+    chunks too. A resumed run starts from an empty index.
+    """
+    if not settings.dedup_enabled:
+        return None
+    return StreamingDeduplicator(threshold=settings.dedup_threshold)
+
+
+def dedupe_posts(
+    posts: List[dict],
+    texts: List[str],
+    timestamps: list,
+    deduplicator: Optional[StreamingDeduplicator]
+):
+    """
+    Index of each post's canonical copy within the chunk (the earliest
+    near-duplicate), plus the posts that duplicate a canonical post of an
+    earlier chunk and the index rows of the chunk's new canonical posts
+    (see StreamingDeduplicator.add).
+    """
+
+    if deduplicator is None:
+        return list(range(len(posts))), {}, {}
+
+    canonical, earlier, rows = deduplicator.add(
+        [p["_id"] for p in posts], texts, order=timestamps
+    )
+
+    duplicates = sum(
+        1 for i, c in enumerate(canonical) if i != c or i in earlier
+    )
+    print(f"Near-duplicates: {duplicates} of {len(posts)} posts")
+    return canonical, earlier, rows
+
+
+@contextmanager
+def open_sentiment_scorer() -> Iterator[Callable[[List[str]], List[dict]]]:
+    """
+    Yields texts -> sentiments, backed by the configured worker pool,
+    cache and cascade mode. Workers and cache stay open across chunks.
+    """
+
+    pool = None
+    cache = None
+
+    if settings.sentiment_workers > 0:
+        pool = SentimentPool(
+            workers=settings.sentiment_workers,
+            threads_per_worker=settings.sentiment_threads_per_worker or None,
+            batch_size=settings.sentiment_batch_size,
+            max_tokens=settings.sentiment_max_tokens
+        )
+        scorer = pool.analyze
+    else:
+        scorer = partial(
+            analyze_sentiment_batch,
+            batch_size=settings.sentiment_batch_size,
+            max_tokens=settings.sentiment_max_tokens
+        )
+
+    if settings.sentiment_cache_enabled:
+        cache = SentimentCache(
+            settings.sentiment_cache_path,
+            max_entries=settings.sentiment_cache_max_entries
+        )
+        scorer = partial(analyze_sentiment_cached, cache=cache, scorer=scorer)
+
+    def score(texts: List[str]) -> List[dict]:
+        if settings.sentiment_mode != "cascade":
+            return scorer(texts)
+
+        sentiments = analyze_sentiment_cascade(
+            texts,
+            band=settings.sentiment_cascade_band,
+            scorer=scorer
+        )
+        tiers = Counter(s["tier"] for s in sentiments)
+        print(f"Sentiment tiers: {dict(tiers)}")
+        return sentiments
+
+    try:
+        yield score
+
+        if cache is not None:
+            print(f"Sentiment cache: {cache.stats()}")
+    finally:
+        if cache is not None:
+            cache.close()
+        if pool is not None:
+            pool.close()
+
+
+def open_embedding_store() -> EmbeddingStore:
+    return EmbeddingStore(
+        settings.embedding_store_path,
+        model_name=EMBEDDING_MODEL_NAME,
+        dtype=settings.embedding_store_dtype
+    )
+
+
+def open_vector_index() -> VectorIndex:
+    return VectorIndex(
+        settings.vector_index_path,
+        dtype=settings.embedding_store_dtype
+    )
+
+
+def embed_posts(store: EmbeddingStore, posts: List[dict], texts: List[str]):
+    return store.embed(
+        [p["_id"] for p in posts], texts, encode_documents, flush=False
+    )
+
+
+def index_posts(index: VectorIndex, posts: List[dict], embeddings):
+    """Upserts the posts into the semantic search index"""
+    index.add(
+        [p["_id"] for p in posts],
+        embeddings,
+        subreddits=[p.get("subreddit") for p in posts],
+        created=[p.get("created_utc") for p in posts],
+        flush=False
+    )
+
+
+class TopicAssigner:
+    """
+    Assigns topics chunk by chunk.
+
+    With topic_model_version set, posts are assigned to that registered
+    model without fitting anything. Incremental mode updates the model
+    with every chunk. Batch mode is fitted once, on a sample drawn across
+    the whole run (fit()), and assigns every chunk to that model's
+    centroids. Every new fit is registered.
+
+    version pins a registered model like settings.topic_model_version;
+    reuse_latest makes batch mode assign to the latest registered model
+    instead of fitting a new one on a (small) incremental delta.
+    """
+
+    def __init__(
+        self,
+        force_refit: bool = False,
+        version: Optional[str] = None,
+        reuse_latest: bool = False
+    ):
+        self.registry = TopicModelRegistry(settings.topic_registry_path)
+        self.force_refit = force_refit
+        self.version: Optional[str] = None
+        self.keywords: dict = {}
+
+        self._fitted = None
+        self._incremental = None
+
+        version = version or settings.topic_model_version
+
+        if version:
+            self._use_version(version)
+        elif settings.topic_mode == "incremental":
+            self._incremental = IncrementalTopicModel(
+                settings.topic_state_path,
+                n_topics=settings.topic_n_topics,
+                drift_threshold=settings.topic_drift_threshold
+            )
+        elif reuse_latest and not force_refit and self.registry.latest_version():
+            self._use_version(self.registry.latest_version())
+
+    def _use_version(self, version: str):
+        self._fitted = self.registry.load(version)
+        self.version = self._fitted.version
+        self.keywords = self._fitted.keywords
+
+    def _register(
+        self,
+        topic_model,
+        topics,
+        embeddings,
+        model_topic_ids: Optional[dict] = None
+    ) -> str:
+        version = self.registry.save(
+            topic_model,
+            topics,
+            embeddings,
+            self.keywords,
+            embedding_model_name=EMBEDDING_MODEL_NAME,
+            metadata={"mode": settings.topic_mode},
+            model_topic_ids=model_topic_ids
+        )
+        self.registry.prune(settings.topic_registry_keep)
+        return version
+
+    @property
+    def needs_fit(self) -> bool:
+        return self._fitted is None and self._incremental is None
+
+    def fit(self, texts: List[str], embeddings):
+        """Fits and registers the batch-mode model chunks are assigned to."""
+        topic_model = create_topic_model(settings.topic_n_topics)
+        topics, self.keywords = fit_topics(topic_model, texts, embeddings)
+        self.version = self._register(topic_model, topics, embeddings)
+        self._fitted = self.registry.load(self.version)
+
+    def assign(self, texts: List[str], embeddings) -> List[int]:
+        if self._fitted is not None:
+            return self._fitted.assign(embeddings)
+
+        if self._incremental is not None:
+            topics, self.keywords = self._incremental.update(
+                texts, embeddings, force_refit=self.force_refit
+            )
+            self.force_refit = False
+
+            if self._incremental.refitted or self.registry.latest_version() is None:
+                # The saved BERTopic keeps its own ids; the manifest maps
+                # the published stable ids onto them
+                self.version = self._register(
+                    self._incremental.topic_model,
+                    topics,
+                    embeddings,
+                    model_topic_ids={
+                        stable: model
+                        for model, stable in self._incremental.stable_ids.items()
+                    }
+                )
+            else:
+                self.version = self.version or self.registry.latest_version()
+            return topics
+
+        raise RuntimeError("Batch topic mode needs fit() before assign()")
+
+
+# -----------------------------------------------------
+# Chunk Stages
+# -----------------------------------------------------
+#
+# Each stage takes a chunk dict and adds its own fields. The scheduler
+# runs them as a DAG, so only a few chunks of posts, texts and
+# embeddings are alive at a time:
+#
+#   source (Mongo read) -> dedup -> sentiment ----------> topics -> write
+#                                -> embedding ---------/   (main thread)
+
+def dedupe_chunk(chunk: dict, deduplicator: Optional[StreamingDeduplicator]):
+    posts = chunk["posts"]
     texts = [p["processed_text"] for p in posts]
     timestamps = [p.get("created_utc", datetime.utcnow()) for p in posts]
 
-    # Sentiment Analysis
+    # Near-duplicates run through the expensive stages once, via
+    # their canonical post, and inherit its results afterwards; those
+    # of an earlier chunk's post skip them entirely
+    canonical, earlier, rows = dedupe_posts(posts, texts, timestamps, deduplicator)
+    unique = sorted({c for i, c in enumerate(canonical) if i not in earlier})
+
+    chunk.update({
+        "timestamps": timestamps,
+        "canonical": canonical,
+        "earlier": earlier,
+        "dedup_rows": rows,
+        "position": {i: j for j, i in enumerate(unique)},
+        "unique_posts": [posts[i] for i in unique],
+        "unique_texts": [texts[i] for i in unique]
+    })
+
+
+def score_chunk(chunk: dict, score):
     print(" Running sentiment analysis...")
-    sentiments = [analyze_sentiment(t) for t in texts]
+    chunk["sentiments"] = score(chunk["unique_texts"])
+
+
+def embed_chunk(
+    chunk: dict,
+    store: EmbeddingStore,
+    index: VectorIndex,
+    lock: threading.Lock
+):
+    print(" Embedding posts...")
+    # Checkpoints flush the store and index from the main thread
+    with lock:
+        chunk["embeddings"] = embed_posts(
+            store, chunk["unique_posts"], chunk["unique_texts"]
+        )
+        index_posts(index, chunk["unique_posts"], chunk["embeddings"])
 
-    # Topic Modeling
+
+def topic_chunk(chunk: dict, assigner: TopicAssigner):
     print(" Running topic modeling (BERTopic)...")
-    topics, topic_keywords = run_topic_modeling(texts)
+    chunk["topics"] = assigner.assign(
+        chunk["unique_texts"], chunk["embeddings"]
+    )
+    chunk["topic_model_version"] = assigner.version
+
+    # Embeddings are not needed past this point
+    del chunk["embeddings"]
+
+
+def build_scheduler(
+    score,
+    store,
+    index,
+    assigner,
+    lock,
+    deduplicator: Optional[StreamingDeduplicator] = None,
+    metrics: Optional[PipelineMetrics] = None
+) -> StageScheduler:
+    scheduler = StageScheduler(
+        queue_size=settings.pipeline_queue_size,
+        concurrent=settings.pipeline_concurrent,
+        metrics=metrics,
+        count_items=lambda chunk: len(chunk["posts"])
+    )
+    scheduler.add("dedup", partial(dedupe_chunk, deduplicator=deduplicator))
+    scheduler.add("sentiment", partial(score_chunk, score=score), after=["dedup"])
+    scheduler.add(
+        "embedding",
+        partial(embed_chunk, store=store, index=index, lock=lock),
+        after=["dedup"]
+    )
+    scheduler.add(
+        "topics",
+        partial(topic_chunk, assigner=assigner),
+        after=["embedding"],
+        main_thread=True
+    )
+    return scheduler
 
-    # Trend Analysis
-    print("Analyzing topic trends...")
-    trend_scores = analyze_trends(topics, timestamps)
 
-    # Aggregate per-topic stats
-    topic_agg = defaultdict(lambda: {
+def stored_sentiment(compound: float) -> dict:
+    """Sentiment as written back (and aggregated)."""
+    return {
+        "label": (
+            "positive" if compound > 0.05
+            else "negative" if compound < -0.05
+            else "neutral"
+        ),
+        "compound": compound
+    }
+
+
+def chunk_results(
+    chunk: dict,
+    deduplicator: Optional[StreamingDeduplicator]
+) -> List[tuple]:
+    """
+    (canonical id, topic, sentiment) per post of a chunk: its canonical
+    post's results, which for duplicates of an earlier chunk's post come
+    from the dedup index. Records the chunk's new canonical posts there.
+    """
+
+    posts = chunk["posts"]
+    canonical = chunk["canonical"]
+    position = chunk["position"]
+
+    results = []
+    for i, post in enumerate(posts):
+        row = chunk["earlier"].get(i)
+        if row is not None:
+            canonical_id, topic, compound = deduplicator.result(row)
+            results.append((canonical_id, topic, stored_sentiment(compound)))
+            continue
+
+        j = position[canonical[i]]
+        results.append((
+            posts[canonical[i]]["_id"],
+            chunk["topics"][j],
+            stored_sentiment(chunk["sentiments"][j]["compound"])
+        ))
+
+    if deduplicator is not None:
+        deduplicator.record(
+            chunk["dedup_rows"],
+            {i: results[i][1] for i in chunk["dedup_rows"]},
+            {i: results[i][2]["compound"] for i in chunk["dedup_rows"]}
+        )
+    return results
+
+
+def write_chunk(
+    chunk: dict,
+    results: List[tuple],
+    trend_counters: List[Optional[dict]],
+    writer
+):
+    """Per-post results; topic-level trend and score are set at the end."""
+    for i, post in enumerate(chunk["posts"]):
+        canonical_id, topic, sent = results[i]
+
+        if topic == -1:
+            if post.get("trend_counter") is not None:
+                writer.set(post, {"trend_counter": None})
+            else:
+                writer.skip()
+            continue
+
+        writer.set(post, {
+            "sentiment": sent,
+            "topic_id": topic,
+            "pipeline_version": PIPELINE_VERSION,
+            "topic_model_version": chunk["topic_model_version"],
+            "canonical_id": canonical_id,
+            "is_duplicate": canonical_id != post["_id"],
+            "trend_counter": trend_counters[i],
+            "updated_at": datetime.utcnow()
+        })
+
+
+# -----------------------------------------------------
+# Aggregation
+# -----------------------------------------------------
+
+def new_topic_agg() -> dict:
+    return defaultdict(lambda: {
         "count": 0,
         "sentiment_sum": 0.0,
-        "sentiment_labels": []
+        "sentiment_labels": Counter()
     })
 
-    for topic, sent in zip(topics, sentiments):
+
+def accumulate(
+    topic_agg: dict,
+    slice_stats: SliceAccumulator,
+    post_topics: List[int],
+    sentiments: List[dict],
+    timestamps: list,
+    subreddits: List[Optional[str]],
+    categories: List[Optional[str]],
+    sign: int = 1
+):
+    """
+    Adds posts to the per-topic and per-slice stats (sign=-1 takes them
+    back out); topic -1 is skipped.
+    """
+    for topic, sent in zip(post_topics, sentiments):
         if topic == -1:
             continue
-        topic_agg[topic]["count"] += 1
-        topic_agg[topic]["sentiment_sum"] += sent["compound"]
-        topic_agg[topic]["sentiment_labels"].append(sent["label"])
+        topic_agg[topic]["count"] += sign
+        topic_agg[topic]["sentiment_sum"] += sign * sent["compound"]
+        topic_agg[topic]["sentiment_labels"][sent["label"]] += sign
+
+    slice_stats.add(
+        post_topics,
+        [sent["compound"] for sent in sentiments],
+        timestamps,
+        subreddits,
+        categories,
+        sign=sign
+    )
+
+
+def aggregates_state(
+    topic_model_version: str,
+    topic_agg: dict,
+    slice_stats: SliceAccumulator
+) -> dict:
+    """Accumulators as stored in the pipeline state."""
+    return {
+        "topic_model_version": topic_model_version,
+        "topics": [
+            {
+                "topic": int(topic),
+                "count": stats["count"],
+                "sentiment_sum": stats["sentiment_sum"],
+                "sentiment_labels": dict(stats["sentiment_labels"])
+            }
+            for topic, stats in topic_agg.items()
+        ],
+        "slices": slice_stats.to_state()
+    }
+
+
+def load_aggregates(state: dict):
+    topic_agg = new_topic_agg()
+    for row in state["topics"]:
+        topic_agg[row["topic"]].update(
+            count=row["count"],
+            sentiment_sum=row["sentiment_sum"],
+            sentiment_labels=Counter(row["sentiment_labels"])
+        )
+    return topic_agg, SliceAccumulator.from_state(state["slices"])
+
+
+def merge_aggregates(base: dict, delta: dict):
+    """Folds a run's delta (a stored state) into the stored aggregates."""
+    topic_agg, slice_stats = load_aggregates(base)
+    delta_agg, delta_slices = load_aggregates(delta)
+
+    for topic, stats in delta_agg.items():
+        topic_agg[topic]["count"] += stats["count"]
+        topic_agg[topic]["sentiment_sum"] += stats["sentiment_sum"]
+        topic_agg[topic]["sentiment_labels"].update(stats["sentiment_labels"])
+        topic_agg[topic]["sentiment_labels"] = +topic_agg[topic]["sentiment_labels"]
+        if topic_agg[topic]["count"] == 0:
+            del topic_agg[topic]
+    slice_stats.merge(delta_slices)
+
+    return topic_agg, slice_stats
+
+
+def accumulate_delta(
+    topic_agg: dict,
+    slice_stats: SliceAccumulator,
+    chunk: dict,
+    post_topics: List[int],
+    results: List[tuple],
+    topic_model_version: str
+):
+    """
+    A chunk's change to the stored aggregates of topic_model_version:
+    posts counted there by an earlier run (their stored trend_counter)
+    come out with the sentiment they were stored with, then go back in
+    with this run's results.
+    """
+
+    posts = chunk["posts"]
+    counted = [
+        i for i, p in enumerate(posts)
+        if (p.get("trend_counter") or {}).get("topic_model_version") == topic_model_version
+        and p.get("sentiment")
+    ]
+    if counted:
+        accumulate(
+            topic_agg,
+            slice_stats,
+            [posts[i]["trend_counter"]["topic_id"] for i in counted],
+            [posts[i]["sentiment"] for i in counted],
+            [chunk["timestamps"][i] for i in counted],
+            [posts[i].get("subreddit") for i in counted],
+            [posts[i].get("category") for i in counted],
+            sign=-1
+        )
+
+    accumulate(
+        topic_agg,
+        slice_stats,
+        post_topics,
+        [sent for _, _, sent in results],
+        chunk["timestamps"],
+        [p.get("subreddit") for p in posts],
+        [p.get("category") for p in posts]
+    )
+
+
+def aggregate_stored_posts(model_version: str, chunk_size: int):
+    """
+    Per-topic and per-slice stats rebuilt from the results already
+    written back for model_version. Incremental runs only score the new
+    posts, but rank topics over the whole processed corpus: they fold
+    their delta into the stored aggregates and only rebuild them when
+    there are none yet for the model they assigned to.
+    """
+
+    topic_agg = new_topic_agg()
+    slice_stats = SliceAccumulator(bucket=settings.trend_bucket)
+
+    for posts in POST_STORE.iter_results(PIPELINE_VERSION, model_version, chunk_size):
+        accumulate(
+            topic_agg,
+            slice_stats,
+            [p["topic_id"] for p in posts],
+            [p["sentiment"] for p in posts],
+            [p.get("created_utc") for p in posts],
+            [p.get("subreddit") for p in posts],
+            [p.get("category") for p in posts]
+        )
+
+    return topic_agg, slice_stats
+
+
+def run_delta(
+    delta_version: Optional[str],
+    topic_agg: dict,
+    slice_stats: SliceAccumulator
+) -> Optional[dict]:
+    """What a checkpoint keeps of an incremental run's delta (None: rebuild)."""
+    if delta_version is None:
+        return None
+    return aggregates_state(delta_version, topic_agg, slice_stats)
+
+
+def print_sample(posts: List[dict]):
+    print("\n SAMPLE PREPROCESSED POSTS\n")
+    for i, p in enumerate(posts[:5]):
+        print(f"Post {i+1}")
+        print("Original title:", p.get("title"))
+        print("Original text:", (p.get("selftext") or "")[:200])
+        print("Processed text:", (p.get("processed_text") or "")[:200])
+        print("-" * 60)
+
+
+class PipelineCancelled(Exception):
+    """Raised by a progress callback to stop a run between chunks."""
+
+
+def publish_report(
+    metrics: PipelineMetrics,
+    status: str,
+    error: Optional[str] = None
+) -> dict:
+    """Stores the run report and emits it as JSON / Prometheus text."""
+    if error:
+        metrics.extra["error"] = error
+    path = metrics.dump_profile()
+    if path:
+        metrics.extra["profile_path"] = path
+        print(f"cProfile dump of {metrics.profile_stage}: {path}")
+
+    report = metrics.report(status)
+    print(format_summary(report))
+
+    try:
+        RUNS.replace_one({"_id": report["_id"]}, report, upsert=True)
+    except Exception as e:
+        print(f"⚠️ Could not store run report: {e}")
+
+    if settings.metrics_report_path == "-":
+        print(report_json(report))
+    elif settings.metrics_report_path:
+        with open(settings.metrics_report_path, "w", encoding="utf-8") as f:
+            f.write(report_json(report))
+
+    if settings.metrics_prometheus_path:
+        write_prometheus(report, settings.metrics_prometheus_path)
+
+    return report
+
+
+def main(
+    force_refit: bool = False,
+    limit: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    incremental: Optional[bool] = None,
+    restart: bool = False,
+    progress: Optional[Callable[[dict], None]] = None
+) -> dict:
+    """
+    Streams the corpus through the pipeline in chunks. Memory holds one
+    chunk plus per-topic / per-slice accumulators, whatever the corpus
+    size. limit=0 processes every preprocessed post.
+
+    Incremental runs only read posts preprocessed since the watermark of
+    the last completed run and checkpoint every few written chunks; an
+    interrupted run resumes from its checkpoint unless restart is set.
+
+    Every run, failed or not, leaves a report in pipeline_runs, which is
+    also returned. progress, if given, is called after every written
+    chunk and may raise PipelineCancelled to stop the run.
+    """
+
+    metrics = PipelineMetrics(
+        memory=settings.metrics_memory,
+        profile_stage=settings.metrics_profile_stage,
+        profile_dir=settings.metrics_profile_dir
+    )
+
+    try:
+        _run(
+            metrics, force_refit, limit, chunk_size, incremental, restart,
+            progress
+        )
+    except PipelineCancelled:
+        publish_report(metrics, "cancelled")
+        raise
+    except BaseException as e:
+        publish_report(metrics, "failed", error=repr(e))
+        raise
+
+    return publish_report(metrics, "completed")
+
+
+def _run(
+    metrics: PipelineMetrics,
+    force_refit: bool,
+    limit: Optional[int],
+    chunk_size: Optional[int],
+    incremental: Optional[bool],
+    restart: bool,
+    progress: Optional[Callable[[dict], None]] = None
+):
+    print("\nStarting NLP Opportunity Pipeline\n")
+
+    limit = settings.pipeline_limit if limit is None else limit
+    chunk_size = chunk_size or settings.pipeline_chunk_size
+    if limit:
+        chunk_size = min(chunk_size, limit)
+    if incremental is None:
+        incremental = settings.pipeline_incremental
+
+    checkpoint = None
+    resumed = False
+    if incremental:
+        checkpoint = None if restart else PIPELINE_STATE.checkpoint()
+        resumed = checkpoint is not None
+        if resumed:
+            print(
+                f"Resuming run started {checkpoint['started_at']:%Y-%m-%d %H:%M} "
+                f"after {checkpoint['processed']} posts"
+            )
+        else:
+            # Posts preprocessed just before the run may still be
+            # committing with an earlier preprocessed_at; leave them
+            # to the next run instead of skipping them for good
+            checkpoint = PIPELINE_STATE.start(
+                until=datetime.utcnow()
+                - timedelta(seconds=settings.pipeline_until_lag_seconds)
+            )
+            print(f"Incremental run from watermark {checkpoint['position']}")
+
+    recovered = TREND_COUNTERS.recover(
+        POST_STORE.counter_markers, source=POST_STORE.name
+    )
+    if recovered:
+        print(f"Recovered {recovered} interrupted trend counter updates")
+
+    store = open_embedding_store()
+    index = open_vector_index()
+    deduplicator = open_deduplicator()
+    assigner = TopicAssigner(
+        force_refit,
+        # A resumed batch-mode run keeps assigning to the model it fitted
+        version=(
+            checkpoint["topic_model_version"]
+            if resumed and settings.topic_mode == "batch" else None
+        ),
+        reuse_latest=incremental
+    )
+
+    # Aggregate per-topic stats; incremental runs collect their delta
+    # to the stored aggregates, if there are any to fold it into
+    topic_agg = new_topic_agg()
+    slice_stats = SliceAccumulator(bucket=settings.trend_bucket)
+    base = PIPELINE_STATE.aggregates() if incremental else None
+    if base and base["slices"]["bucket"] != settings.trend_bucket:
+        base = None
+    delta_version = base["topic_model_version"] if base else None
+    if resumed:
+        delta = checkpoint.get("delta")
+        if delta is None:
+            delta_version = None
+        else:
+            topic_agg, slice_stats = load_aggregates(delta)
+    processed = checkpoint["processed"] if resumed else 0
+    last_position = checkpoint["position"] if incremental else None
+    chunks_done = 0
+    store_lock = threading.Lock()
+
+    writer = POST_STORE.writer()
+
+    selection = (
+        {"after": checkpoint["position"], "until": checkpoint["until"]}
+        if incremental else {}
+    )
+
+    if assigner.needs_fit:
+        # One model for the whole run, fitted on posts drawn across it
+        # rather than on whichever chunk comes first
+        print("Fitting topic model on a sample of the run...")
+        with metrics.stage("topic_fit"):
+            sample = POST_STORE.sample(
+                settings.topic_fit_sample_size, limit, **selection
+            )
+            if sample:
+                texts = [p["processed_text"] for p in sample]
+                assigner.fit(texts, embed_posts(store, sample, texts))
+        print(f"Fitted topic model {assigner.version} on {len(sample)} posts")
+
+    with open_sentiment_scorer() as score:
+        source = iter_post_chunks(chunk_size, limit, **selection)
+
+        scheduler = build_scheduler(
+            score, store, index, assigner, store_lock, deduplicator, metrics
+        )
+        # Closed on the way out, also on errors: its threads must stop
+        # before the scorer they call is torn down
+        with closing(
+            scheduler.run({"posts": posts} for posts in source)
+        ) as chunks:
+            for chunk in chunks:
+                posts = chunk["posts"]
+
+                if processed == 0:
+                    print_sample(posts)
+
+                results = chunk_results(chunk, deduplicator)
+
+                # Only canonical posts are counted; each post's counter moves with it
+                post_topics = [
+                    topic if canonical_id == post["_id"] else -1
+                    for post, (canonical_id, topic, _) in zip(posts, results)
+                ]
+
+                if not incremental:
+                    accumulate(
+                        topic_agg,
+                        slice_stats,
+                        post_topics,
+                        [sent for _, _, sent in results],
+                        chunk["timestamps"],
+                        [p.get("subreddit") for p in posts],
+                        [p.get("category") for p in posts]
+                    )
+                elif delta_version is not None:
+                    if chunk["topic_model_version"] != delta_version:
+                        # Another model: the stored aggregates get rebuilt
+                        delta_version = None
+                    else:
+                        accumulate_delta(
+                            topic_agg, slice_stats, chunk, post_topics, results,
+                            delta_version
+                        )
+
+                # The counter moves are journaled before the markers are
+                # written, so a run stopped in between is finished by recover()
+                with metrics.stage("write", items=len(posts)):
+                    trend_counters = TREND_COUNTERS.counter_keys(
+                        post_topics, chunk["timestamps"], chunk["topic_model_version"]
+                    )
+                    moves = TREND_COUNTERS.journal(
+                        [p["_id"] for p in posts],
+                        [p.get("trend_counter") for p in posts],
+                        trend_counters,
+                        source=POST_STORE.name
+                    )
+                    failed = writer.report()["failed"]
+                    write_chunk(chunk, results, trend_counters, writer)
+                    writer.flush()
+
+                with metrics.stage("trend_counters", items=len(posts)):
+                    # Markers that failed to write keep their old counter
+                    stored = None
+                    if moves is not None and writer.report()["failed"] > failed:
+                        stored = POST_STORE.counter_markers(
+                            [post_id for post_id, _, _ in moves["moves"]]
+                        )
+                    TREND_COUNTERS.apply(moves, stored)
+                processed += len(posts)
+                chunks_done += 1
+
+                if incremental:
+                    last_position = post_position(posts[-1])
+                    if chunks_done % settings.pipeline_checkpoint_every == 0:
+                        # Everything up to the checkpoint must be durable first
+                        with metrics.stage("checkpoint"):
+                            writer.flush()
+                            with store_lock:
+                                store.flush()
+                                index.flush()
+                            PIPELINE_STATE.save_checkpoint(
+                                last_position,
+                                processed,
+                                assigner.version,
+                                delta=run_delta(delta_version, topic_agg, slice_stats)
+                            )
+
+                if progress is not None:
+                    progress({
+                        "run_id": metrics.run_id,
+                        "processed": processed,
+                        "chunks": chunks_done,
+                        "stages": metrics.stage_totals()
+                    })
+
+    with metrics.stage("flush"):
+        writer.flush()
+        store.flush()
+        index.flush()
+
+    metrics.extra.update({
+        "processed": processed,
+        "incremental": incremental,
+        "pipeline_version": PIPELINE_VERSION
+    })
+
+    if incremental:
+        PIPELINE_STATE.save_checkpoint(
+            last_position,
+            processed,
+            assigner.version,
+            delta=run_delta(delta_version, topic_agg, slice_stats)
+        )
+
+    if processed == 0:
+        if incremental:
+            PIPELINE_STATE.complete(last_position)
+            print("No new posts since the last run")
+        else:
+            print("No preprocessed posts to process")
+        return
+
+    if incremental and assigner.version is None:
+        # Nothing left to assign after a resume: reuse the run's model
+        assigner = TopicAssigner(version=checkpoint["topic_model_version"])
+
+    model_version = assigner.version
+    topic_keywords = assigner.keywords
+    metrics.extra["topic_model_version"] = model_version
+    print(f"\nProcessed {processed} posts")
+    print(f"Topic model version: {model_version}")
+
+    aggregates = None
+    if incremental:
+        with metrics.stage("aggregate"):
+            if delta_version is not None and delta_version == model_version:
+                print("Folding new posts into the stored aggregates...")
+                topic_agg, slice_stats = merge_aggregates(
+                    base, aggregates_state(model_version, topic_agg, slice_stats)
+                )
+            else:
+                print("Aggregating processed posts...")
+                topic_agg, slice_stats = aggregate_stored_posts(model_version, chunk_size)
+            aggregates = aggregates_state(model_version, topic_agg, slice_stats)
+
+    # Trend Analysis
+    print("Analyzing topic trends...")
+    with metrics.stage("trends"):
+        trend_scores = TREND_COUNTERS.trends(
+            model_version, window=settings.trend_window or None
+        )
+
+        bursts = TREND_COUNTERS.bursts(
+            model_version,
+            z_threshold=settings.trend_burst_z_threshold,
+            min_count=settings.trend_burst_min_count
+        )
+    for burst in bursts:
+        print(
+            f"Burst: topic {burst['topic']} has {burst['count']} mentions "
+            f"in the {burst['bucket']} of {burst['bucket_start']:%Y-%m-%d} "
+            f"(expected {burst['expected']}, z={burst['z_score']})"
+        )
 
     # Build topic_stats
     topic_stats = {}
 
     for topic, stats in topic_agg.items():
+        if stats["count"] <= 0:
+            continue
         avg_sentiment = stats["sentiment_sum"] / stats["count"]
-        dominant_sentiment = Counter(stats["sentiment_labels"]).most_common(1)[0][0]
+        dominant_sentiment = stats["sentiment_labels"].most_common(1)[0][0]
 
         topic_stats[topic] = {
             "demand": stats["count"],
@@ -87,7 +1066,18 @@ def main():
 
     # Compute Opportunity Scores
     print("Computing opportunity scores...")
-    scores = compute_opportunity_scores(topic_stats)
+    with metrics.stage("scoring", items=len(topic_stats)):
+        scores = compute_opportunity_scores(topic_stats)
+
+    # Per-slice rankings for the API
+    print("Ranking opportunities per subreddit, category and time window...")
+    with metrics.stage("cube"):
+        rankings = rank_slices(
+            slice_stats.stats(overall_trend=trend_scores),
+            k=settings.opportunity_top_k
+        )
+        save_rankings(CUBE, rankings, topic_keywords, model_version)
+    print(f"Stored {len(rankings)} slice rankings")
 
     #  Output
     opportunities = []
@@ -104,6 +1094,16 @@ def main():
 
     opportunities.sort(key=lambda x: x["score"], reverse=True)
 
+    SNAPSHOTS.ensure_indexes()
+    snapshot_id = SNAPSHOTS.save(
+        opportunities,
+        topic_model_version=model_version,
+        run_id=metrics.run_id,
+        keep=settings.opportunity_snapshot_keep
+    )
+    metrics.extra["snapshot_id"] = snapshot_id
+    print(f"Stored opportunity snapshot {snapshot_id}")
+
     print("\n TOP OPPORTUNITIES\n")
     for opp in opportunities:
         print(f"Topic ID: {opp['topic']}")
@@ -114,37 +1114,76 @@ def main():
         print(f"Keywords: {opp['keywords']}")
         print("-" * 40)
 
-    #  UPDATE MongoDB with results
-    print("Updating MongoDB with sentiment, topic, trend, score...")
-
-    for post, sent, topic in zip(posts, sentiments, topics):
-        if topic == -1:
-            continue
+    #  Topic-level results
+    print(f"Writing topic trend and score ({POST_STORE.name} store)...")
 
-        POSTS_COLLECTION.update_one(
-            {"_id": post["_id"]},
-            {
-                "$set": {
-                    "sentiment": {
-                        "label": (
-                            "positive" if sent["compound"] > 0.05
-                            else "negative" if sent["compound"] < -0.05
-                            else "neutral"
-                        ),
-                        "compound": sent["compound"]
-                    },
-                    "topic_id": topic,
-                    "trend": trend_scores.get(topic, 0.0),
-                    "score": scores.get(topic, 0.0),
-                    "pipeline_version": "v1",
-                    "updated_at": datetime.utcnow()
-                }
+    with metrics.stage("topic_writes", items=len(topic_stats)):
+        writer.set_topics(model_version, {
+            topic: {
+                "trend": trend_scores.get(topic, 0.0),
+                "score": scores.get(topic, 0.0)
             }
-        )
+            for topic in topic_stats
+        })
+        writer.flush()
+
+    report = writer.report()
+    metrics.extra["write_back"] = report
+    print(
+        f"Write-back: {report['written']} written, {report['failed']} failed, "
+        f"{report['skipped']} skipped in {report['batches']} batches "
+        f"({report['retries']} retries, {report['seconds']}s)"
+    )
+    for error in report["errors"]:
+        print(f"⚠️ Write error {error['code']}: {error['message']}")
+
+    print("Results written successfully")
+
+    if incremental:
+        PIPELINE_STATE.complete(last_position, aggregates)
+        print(f"Watermark advanced to {last_position}")
 
-    print("MongoDB updated successfully")
     print("\nPipeline completed successfully!")
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="NLP opportunity pipeline")
+    parser.add_argument(
+        "--refit",
+        action="store_true",
+        help="Force a full topic refit in incremental mode"
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=None,
+        help="Max posts to process (0 = whole corpus, default from settings)"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=None,
+        help="Posts per streamed chunk (default from settings)"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        default=None,
+        help="Only process posts preprocessed since the last completed run"
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Discard an interrupted incremental run instead of resuming it"
+    )
+    args = parser.parse_args()
+
+    main(
+        force_refit=args.refit,
+        limit=args.limit,
+        chunk_size=args.chunk_size,
+        incremental=args.incremental,
+        restart=args.restart
+    )
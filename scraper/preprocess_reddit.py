@@ -3,10 +3,14 @@
 #python -m spacy download en_core_web_sm
 
 
+from datetime import datetime
+
 from pymongo import MongoClient
-import spacy
 import re
 
+from nlp_engine.keyword_matcher import KeywordMatcher
+from nlp_engine.resources import registry
+
 # -----------------------
 # CONFIG
 # -----------------------
@@ -18,7 +22,12 @@ COLLECTION_NAME = "posts"
 # -----------------------
 # LOAD NLP MODEL
 # -----------------------
-nlp = spacy.load("en_core_web_sm")
+def _load_spacy():
+    import spacy
+    return spacy.load("en_core_web_sm")
+
+
+registry.register("spacy", _load_spacy)
 
 # -----------------------
 # FILTER RULES
@@ -36,6 +45,12 @@ PAIN_KEYWORDS = {
     "scared", "struggling", "nothing works", "burnout"
 }
 
+# One automaton for both filter lexicons (substring semantics)
+FILTER_MATCHER = KeywordMatcher(
+    {"exclude": EXCLUDE_KEYWORDS, "pain": PAIN_KEYWORDS},
+    word_boundary=False
+)
+
 # -----------------------
 # TEXT CLEANING
 # -----------------------
@@ -52,6 +67,7 @@ def clean_text(text):
 # NLP PREPROCESS
 # -----------------------
 def preprocess_text(text):
+    nlp = registry.get("spacy")
     doc = nlp(text)
     return " ".join(
         token.lemma_
@@ -65,15 +81,14 @@ def preprocess_text(text):
 def is_candidate_post(title, content, author):
     if author in EXCLUDE_AUTHORS:
         return False
-    combined = f"{title} {content}".lower()
-    return not any(k in combined for k in EXCLUDE_KEYWORDS)
+    combined = f"{title} {content}"
+    return not FILTER_MATCHER.contains(combined, "exclude")
 
 # -----------------------
 # PAIN SIGNAL
 # -----------------------
 def has_pain_signal(text):
-    text = text.lower()
-    return any(k in text for k in PAIN_KEYWORDS)
+    return FILTER_MATCHER.contains(text, "pain")
 
 # -----------------------
 # PIPELINE
@@ -98,7 +113,8 @@ def run_pipeline():
             "pain_signal": has_pain_signal(full_text),
             "clean_text": clean_text(full_text),
             "processed_text": preprocess_text(clean_text(full_text)),
-            "preprocessed": True
+            "preprocessed": True,
+            "preprocessed_at": datetime.utcnow()
         }
 
         col.update_one({"_id": d["_id"]}, {"$set": update})
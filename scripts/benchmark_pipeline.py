@@ -0,0 +1,409 @@
+"""
+Stage-by-stage benchmark of the pipeline on synthetic corpora.
+
+Generates a corpus per size (scripts.synthetic_corpus), preprocesses
+it, stores it in mongomock or a local mongod and runs the real
+pipeline (run_pipeline._run) over it, so every stage the pipeline
+reports is timed: dedup, sentiment, embedding, topic fit and assignment,
+write-back, trend counters, trends, scoring and the opportunity cube.
+Throughput and memory per stage are compared against a baseline file; a
+stage that got slower or hungrier than the tolerance fails the run.
+
+Each size runs in its own process, so one size's allocations and model
+caches do not show up in the next one's numbers. Memory is the stage's
+tracemalloc peak above what was allocated when it started (--memory
+tracemalloc, the default; stages then run one after another so their
+peaks do not overlap) or the process RSS after the stage (--memory rss).
+
+The topic model is fitted on at most --model-posts posts per size and
+every post is assigned to it, as in a batch-mode run. Without the model
+dependencies the pipeline stages are reported as skipped; with
+--synthetic-embeddings, clustered vectors stand in for MiniLM.
+
+    python -m scripts.benchmark_pipeline
+    python -m scripts.benchmark_pipeline --sizes 1000,100000,1000000 --synthetic-embeddings
+    python -m scripts.benchmark_pipeline --mongo-uri mongodb://localhost:27017 --update-baseline
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import zlib
+from typing import Dict, List
+
+import numpy as np
+from nlp_engine.instrumentation import PipelineMetrics
+from nlp_engine.resources import registry
+from nlp_engine.vector_index import EMBEDDING_DIM
+from scraper.keywords import PAIN_CATEGORIES
+from scripts.synthetic_corpus import CATEGORIES, generate_posts
+
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "benchmark_baseline.json")
+BENCH_DATABASE = "reddit_pain_points_bench"
+
+# Regressions below these are timer and allocator noise, whatever the ratio
+MIN_SECONDS = 0.05
+MEMORY_SLACK_MB = 20
+
+
+def open_collection(mongo_uri: str):
+    if mongo_uri == "mongomock":
+        try:
+            import mongomock
+        except ImportError:
+            print("mongomock is not installed (pip install mongomock), or pass --mongo-uri")
+            sys.exit(1)
+        client = mongomock.MongoClient()
+    else:
+        from pymongo import MongoClient
+        client = MongoClient(mongo_uri)
+
+    client.drop_database(BENCH_DATABASE)
+    return client, client[BENCH_DATABASE]
+
+
+def missing(*modules: str) -> List[str]:
+    return [m for m in modules if importlib.util.find_spec(m) is None]
+
+
+def pipeline_missing(args) -> List[str]:
+    modules = ["transformers", "bertopic"]
+    if not args.synthetic_embeddings:
+        modules.append("sentence_transformers")
+    return missing(*modules)
+
+
+class SyntheticEmbedder:
+    """
+    Stands in for MiniLM: unit vectors around one center per category,
+    the category being the one whose lexicon words the text uses most.
+    """
+
+    def __init__(self):
+        self.centers = np.random.default_rng(0).standard_normal(
+            (len(CATEGORIES), EMBEDDING_DIM)
+        ).astype(np.float32)
+        self.category_of = {
+            word: i
+            for i, category in enumerate(CATEGORIES)
+            for word in PAIN_CATEGORIES[category]
+        }
+
+    def encode(self, documents: List[str], **kwargs) -> np.ndarray:
+        vectors = np.empty((len(documents), EMBEDDING_DIM), np.float32)
+        for i, text in enumerate(documents):
+            votes = np.bincount(
+                [self.category_of[w] for w in text.split() if w in self.category_of],
+                minlength=len(CATEGORIES)
+            )
+            noise = np.random.default_rng(zlib.crc32(text.encode())).standard_normal(
+                EMBEDDING_DIM
+            ).astype(np.float32)
+            vectors[i] = self.centers[votes.argmax()] + 0.8 * noise
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def warm_up(args):
+    """Model loading and numba compilation, kept out of the timed stages."""
+    posts = next(generate_posts(300, args.seed + 1))
+    texts = [f"{p['title']}. {p['content']}" for p in posts]
+
+    if args.synthetic_embeddings:
+        registry.register("embedding", SyntheticEmbedder)
+
+    if pipeline_missing(args):
+        return
+
+    from nlp_engine.sentiment import analyze_sentiment_batch
+    from nlp_engine.topic_model import create_topic_model, encode_documents, fit_topics
+
+    analyze_sentiment_batch(texts[:32])
+    fit_topics(create_topic_model(args.topics), texts, encode_documents(texts))
+
+
+# -----------------------------------------------------
+# One Corpus Size
+# -----------------------------------------------------
+
+def preprocess(posts: List[dict], metrics: PipelineMetrics) -> Dict[str, str]:
+    """
+    The preprocessor's fields, computed with its functions on the
+    generated posts before they are stored. Lemmatization needs spaCy;
+    without it processed_text is the cleaned text.
+    """
+
+    from datetime import datetime
+
+    from scraper.preprocess_reddit import (
+        clean_text,
+        has_pain_signal,
+        is_candidate_post,
+        preprocess_text
+    )
+
+    notes = {}
+    lemmatize = not missing("spacy")
+    if not lemmatize:
+        notes["preprocess"] = "processed_text not lemmatized: spaCy is not installed"
+
+    with metrics.stage("preprocess", items=len(posts)):
+        for post in posts:
+            full_text = f"{post['title']}. {post['content']}"
+            cleaned = clean_text(full_text)
+            post.update(
+                is_candidate=is_candidate_post(post["title"], post["content"], post["author"]),
+                pain_signal=has_pain_signal(full_text),
+                processed_text=preprocess_text(cleaned) if lemmatize else cleaned,
+                preprocessed=True,
+                preprocessed_at=datetime.utcnow()
+            )
+
+    return notes
+
+
+def run_pipeline_stages(database, metrics: PipelineMetrics, workdir: str, args):
+    """run_pipeline._run over the benchmark database, as a batch run."""
+    # Settings require these; the benchmark never reaches Reddit or the configured cluster
+    for name in ("REDDIT_CLIENT_ID", "REDDIT_CLIENT_SECRET", "REDDIT_USER_AGENT"):
+        os.environ.setdefault(name, "benchmark")
+    os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+
+    from config.database import Database
+    from config.settings import settings
+
+    Database.get_database = classmethod(lambda cls: database)
+
+    settings.storage_backend = "mongo"
+    settings.pipeline_concurrent = args.memory != "tracemalloc"
+    settings.pipeline_incremental = False
+    settings.topic_mode = "batch"
+    settings.topic_model_version = ""
+    settings.topic_n_topics = args.topics
+    settings.topic_fit_sample_size = args.model_posts
+    settings.sentiment_cache_enabled = False
+    settings.metrics_report_path = ""
+    settings.metrics_prometheus_path = ""
+    for name in ("embedding_store_path", "vector_index_path", "topic_registry_path"):
+        setattr(settings, name, os.path.join(workdir, name))
+
+    import run_pipeline
+
+    run_pipeline._run(
+        metrics,
+        force_refit=False,
+        limit=0,
+        chunk_size=args.chunk_size,
+        incremental=False,
+        restart=False
+    )
+
+
+def run_size(size: int, args) -> Dict[str, dict]:
+    metrics = PipelineMetrics(memory=args.memory)
+    notes = {}
+
+    client, database = open_collection(args.mongo_uri)
+    collection = database["posts"]
+
+    try:
+        with metrics.stage("generate", items=size):
+            posts = [p for batch in generate_posts(size, args.seed) for p in batch]
+
+        notes.update(preprocess(posts, metrics))
+
+        with metrics.stage("insert", items=size):
+            for offset in range(0, size, args.batch_size):
+                collection.insert_many(posts[offset:offset + args.batch_size], ordered=False)
+        del posts
+
+        unavailable = pipeline_missing(args)
+        if unavailable:
+            notes["pipeline"] = f"skipped: {', '.join(unavailable)} not installed"
+        else:
+            with tempfile.TemporaryDirectory() as workdir:
+                run_pipeline_stages(database, metrics, workdir, args)
+    finally:
+        client.drop_database(BENCH_DATABASE)
+
+    memory_field = "max_alloc_peak_mb" if args.memory == "tracemalloc" else "max_rss_mb"
+    results = {}
+    for name, totals in metrics.stage_totals().items():
+        results[name] = {
+            "items": totals["items"],
+            "seconds": totals["wall_seconds"],
+            "items_per_second": totals["items_per_second"],
+            "memory_mb": totals.get(memory_field, 0.0)
+        }
+    for name, note in notes.items():
+        results.setdefault(name, {})["skipped" if name == "pipeline" else "note"] = note
+    return results
+
+
+def run_size_in_subprocess(size: int, args) -> Dict[str, dict]:
+    """run_size in a fresh interpreter, with the same options."""
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, "results.json")
+        command = [
+            sys.executable, "-m", "scripts.benchmark_pipeline",
+            "--in-process",
+            "--sizes", str(size),
+            "--seed", str(args.seed),
+            "--mongo-uri", args.mongo_uri,
+            "--model-posts", str(args.model_posts),
+            "--topics", str(args.topics),
+            "--batch-size", str(args.batch_size),
+            "--chunk-size", str(args.chunk_size),
+            "--memory", args.memory,
+            "--output", output
+        ]
+        if args.synthetic_embeddings:
+            command.append("--synthetic-embeddings")
+
+        subprocess.run(command, check=True)
+        with open(output, encoding="utf-8") as f:
+            return json.load(f)[str(size)]
+
+
+# -----------------------------------------------------
+# Baseline
+# -----------------------------------------------------
+
+def compare(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    regressions = []
+    for size, stages in results.items():
+        for name, current in stages.items():
+            reference = baseline.get(size, {}).get(name)
+            if (
+                not reference
+                or "skipped" in current or "skipped" in reference
+                or "seconds" not in current or "seconds" not in reference
+            ):
+                continue
+
+            timed = max(current["seconds"], reference["seconds"]) >= MIN_SECONDS
+            if timed and current["items_per_second"] and reference["items_per_second"]:
+                floor = reference["items_per_second"] * (1 - tolerance)
+                if current["items_per_second"] < floor:
+                    regressions.append(
+                        f"{size} {name}: {current['items_per_second']:.1f} items/s, "
+                        f"baseline {reference['items_per_second']:.1f}"
+                    )
+
+            ceiling = max(
+                reference["memory_mb"] * (1 + tolerance),
+                reference["memory_mb"] + MEMORY_SLACK_MB
+            )
+            if current["memory_mb"] > ceiling:
+                regressions.append(
+                    f"{size} {name}: {current['memory_mb']:.1f} MB, "
+                    f"baseline {reference['memory_mb']:.1f} MB"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1000,10000")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mongo-uri", default="mongomock")
+    parser.add_argument("--model-posts", type=int, default=5000)
+    parser.add_argument("--topics", type=int, default=12)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    parser.add_argument("--synthetic-embeddings", action="store_true")
+    parser.add_argument("--memory", choices=("tracemalloc", "rss"), default="tracemalloc")
+    parser.add_argument(
+        "--in-process",
+        action="store_true",
+        help="Run the sizes in this process (used for the per-size subprocesses)"
+    )
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--output", help="Write the results as JSON")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+
+    if args.in_process:
+        print("Warming up models...")
+        warm_up(args)
+        results = {str(size): run_size(size, args) for size in sizes}
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+        return
+
+    setup = {
+        "store": "mongomock" if args.mongo_uri == "mongomock" else "mongod",
+        "memory_mode": args.memory,
+        "synthetic_embeddings": args.synthetic_embeddings,
+        "model_posts": args.model_posts,
+        "chunk_size": args.chunk_size
+    }
+    results = {}
+
+    for size in sizes:
+        print(f"\n{size} posts")
+        results[str(size)] = run_size_in_subprocess(size, args)
+
+        for name, stage in results[str(size)].items():
+            if "seconds" not in stage:
+                print(f"  {name:<14} {stage.get('skipped') or stage.get('note')}")
+                continue
+            print(
+                f"  {name:<14} {stage['seconds']:>8.2f}s "
+                f"{stage['items_per_second'] or 0:>12.1f} items/s "
+                f"{stage['memory_mb']:>8.1f} MB"
+            )
+            if "note" in stage:
+                print(f"  {'':<14} ({stage['note']})")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(dict(
+                setup,
+                machine=platform.node(),
+                python=platform.python_version(),
+                sizes=results
+            ), f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --update-baseline to create one")
+        return
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    # Numbers from a different store or setup are not comparable
+    mismatched = [k for k, v in setup.items() if baseline.get(k) != v]
+    if mismatched:
+        print(f"\nBaseline was recorded with a different setup: " + ", ".join(
+            f"{k}={baseline.get(k)}" for k in mismatched
+        ))
+        sys.exit(1)
+
+    regressions = compare(results, baseline["sizes"], args.tolerance)
+    if regressions:
+        print(f"\nREGRESSION (tolerance {args.tolerance:.0%}):")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+
+    print(f"\nNo regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Parity check and benchmark for the vectorized trend engine.
+
+Compares analyze_trends against the original per-post loop on a small
+corpus, then times the vectorized engine on a large synthetic one.
+
+    python -m scripts.benchmark_trends
+    python -m scripts.benchmark_trends --pairs 10000000 --topics 50
+"""
+
+import argparse
+import math
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import numpy as np
+
+from nlp_engine.trend_analysis import BUCKETS, analyze_trends
+
+
+def loop_trends(topics, timestamps):
+    """The original per-post implementation, kept as the parity reference."""
+    topic_time_count = defaultdict(lambda: defaultdict(int))
+
+    for topic, ts in zip(topics, timestamps):
+        if topic == -1 or not isinstance(ts, datetime):
+            continue
+        topic_time_count[topic][ts.strftime("%Y-%W")] += 1
+
+    trend_scores = {}
+    for topic, weeks in topic_time_count.items():
+        counts = [count for _, count in sorted(weeks.items())]
+        if len(counts) < 2:
+            continue
+
+        log_counts = [math.log(max(1, c)) for c in counts]
+        n = len(log_counts)
+        x = list(range(n))
+        mean_x = sum(x) / n
+        mean_y = sum(log_counts) / n
+
+        numerator = sum((xi - mean_x) * (yi - mean_y) for xi, yi in zip(x, log_counts))
+        denominator = sum((xi - mean_x) ** 2 for xi in x)
+        if denominator == 0:
+            continue
+
+        trend_scores[topic] = round(numerator / denominator, 3)
+
+    return trend_scores
+
+
+def synthetic_pairs(size: int, topics: int, days: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    topic_ids = rng.integers(-1, topics, size)
+    start = np.datetime64("2024-12-20T00:00:00", "s")
+
+    # Skewed towards recent days so topics get a real growth signal
+    offsets = (rng.power(1.5 + topic_ids % 3, size) * days * 86400).astype(np.int64)
+    return topic_ids, start + offsets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pairs", type=int, default=10_000_000)
+    parser.add_argument("--topics", type=int, default=50)
+    parser.add_argument("--days", type=int, default=400)
+    parser.add_argument("--parity-pairs", type=int, default=200_000)
+    args = parser.parse_args()
+
+    # Parity on Python datetimes, including the pipeline's input shape
+    topics, times = synthetic_pairs(args.parity_pairs, args.topics, args.days, seed=1)
+    py_times = times.astype("datetime64[us]").astype(datetime).tolist()
+    py_times[::97] = [None] * len(py_times[::97])
+
+    expected = loop_trends(topics.tolist(), py_times)
+    actual = analyze_trends(topics.tolist(), py_times)
+    mismatched = {
+        t for t in expected.keys() | actual.keys()
+        if expected.get(t) != actual.get(t)
+    }
+    print(f"Parity: {len(expected)} topics, {len(mismatched)} mismatched")
+
+    topics, times = synthetic_pairs(args.pairs, args.topics, args.days)
+    for bucket in BUCKETS:
+        start = time.perf_counter()
+        analyze_trends(topics, times, bucket=bucket)
+        elapsed = time.perf_counter() - start
+        print(f"  {bucket:<5} {args.pairs:,} pairs in {elapsed:.2f}s")
+
+    start = time.perf_counter()
+    analyze_trends(topics, times, bucket="day", window=28)
+    print(f"  day, 28-bucket window in {time.perf_counter() - start:.2f}s")
+
+    sys.exit(1 if mismatched else 0)
+
+
+if __name__ == "__main__":
+    main()
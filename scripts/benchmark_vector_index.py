@@ -0,0 +1,72 @@
+"""
+Latency and recall benchmark for the semantic search index.
+
+Builds an index over synthetic clustered embeddings, then compares IVF
+search against the exact blocked scan on random queries.
+
+    python -m scripts.benchmark_vector_index
+    python -m scripts.benchmark_vector_index --size 2000000 --nprobe 32
+"""
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from nlp_engine.vector_index import EMBEDDING_DIM, VectorIndex
+
+
+def synthetic_embeddings(size: int, clusters: int, seed: int = 0) -> np.ndarray:
+    # Same cluster centres for every chunk; only the samples vary by seed
+    centers = np.random.default_rng(0).standard_normal(
+        (clusters, EMBEDDING_DIM)
+    ).astype(np.float32)
+    rng = np.random.default_rng(seed)
+    labels = rng.integers(0, clusters, size)
+    noise = rng.standard_normal((size, EMBEDDING_DIM)).astype(np.float32)
+    return centers[labels] + 0.6 * noise
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=500000)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        index = VectorIndex(directory, nprobe=args.nprobe)
+
+        start = time.perf_counter()
+        chunk = 100000
+        for offset in range(0, args.size, chunk):
+            n = min(chunk, args.size - offset)
+            index.add(
+                list(range(offset, offset + n)),
+                synthetic_embeddings(n, args.clusters, seed=offset)
+            )
+        print(f"Indexed {len(index)} vectors in {time.perf_counter() - start:.1f}s")
+
+        queries = synthetic_embeddings(args.queries, args.clusters, seed=args.size + 1)
+
+        latencies = []
+        recall = 0.0
+        for query in queries:
+            start = time.perf_counter()
+            approx = index.search(query, k=args.k)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+            exact = index.search(query, k=args.k, exact=True)
+            recall += len({i for i, _ in approx} & {i for i, _ in exact}) / args.k
+
+        latencies = np.array(latencies)
+        print(f"  p50 latency: {np.percentile(latencies, 50):.2f} ms")
+        print(f"  p99 latency: {np.percentile(latencies, 99):.2f} ms")
+        print(f"  recall@{args.k}:   {recall / args.queries:.3f}")
+
+
+if __name__ == "__main__":
+    main()
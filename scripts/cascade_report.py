@@ -0,0 +1,46 @@
+"""
+Agreement and speedup of cascade sentiment vs transformer-only.
+
+The sample is a JSONL file with one {"text": ..., "label": ...} object per
+line, label being positive / negative / neutral (label is optional).
+
+    python -m scripts.cascade_report --sample labelled.jsonl --band 0.6
+"""
+
+import argparse
+import json
+
+from nlp_engine.sentiment import CASCADE_BAND, evaluate_cascade
+
+
+def load_sample(path: str):
+    texts, labels = [], []
+
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            texts.append(row["text"])
+            labels.append(row.get("label"))
+
+    if any(label is None for label in labels):
+        labels = None
+
+    return texts, labels
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sample", required=True)
+    parser.add_argument("--band", type=float, default=CASCADE_BAND)
+    args = parser.parse_args()
+
+    texts, labels = load_sample(args.sample)
+    report = evaluate_cascade(texts, labels=labels, band=args.band)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Parity check and throughput benchmark for the sentiment backends.
+
+Scores a fixed corpus with every backend and compares labels and
+compound scores against eager torch, then times each backend.
+
+    python -m scripts.check_sentiment_backends
+    python -m scripts.check_sentiment_backends --backends torch onnx --repeat 20
+"""
+
+import argparse
+import sys
+import time
+
+from nlp_engine.sentiment import analyze_sentiment_batch, load_sentiment_model
+from nlp_engine.sentiment_backends import BACKENDS
+
+
+PARITY_CORPUS = [
+    "The app keeps crashing every time I open it, absolutely useless",
+    "I love how fast the new update is, great job team",
+    "Applied to 200 companies and got no response from any of them",
+    "Is there a tool that can automate invoice reminders for freelancers?",
+    "Rent went up again and my landlord won't fix the broken heater",
+    "This course was worth every penny, I finally understand recursion",
+    "Customer support never replied, the refund is still missing",
+    "Meh, the interface is okay I guess",
+    "Burnout is real, working 14 hours a day with no work life balance",
+    "Our startup just hit its first 1000 paying customers",
+    "The metro is always delayed and there is no alternative route",
+    "Why is there no simple budgeting app that works offline?",
+    "I wish the platform had better search, it takes forever to find anything",
+    "Best decision ever was switching to this editor",
+    "The website throws an error whenever I try to pay",
+    "Honestly the food delivery was on time and still hot",
+    "Overpriced subscription with hidden charges, never again",
+    "Looking for an alternative to this buggy project management tool",
+    "Interview went well, fingers crossed",
+    "Nothing works, I'm stuck and frustrated with this setup",
+]
+
+MAX_COMPOUND_DIFF = 0.05
+MIN_LABEL_AGREEMENT = 0.95
+
+
+def check_parity(reference: list, candidate: list) -> dict:
+    agree = sum(
+        r["label"] == c["label"]
+        for r, c in zip(reference, candidate)
+    )
+    max_diff = max(
+        abs(r["compound"] - c["compound"])
+        for r, c in zip(reference, candidate)
+    )
+
+    agreement = agree / len(reference)
+    return {
+        "label_agreement": round(agreement, 3),
+        "max_compound_diff": round(max_diff, 3),
+        "passed": (
+            agreement >= MIN_LABEL_AGREEMENT and
+            max_diff <= MAX_COMPOUND_DIFF
+        )
+    }
+
+
+def benchmark(sentiment_model, texts: list, repeat: int) -> float:
+    # First call pays for lazy initialisation; keep it out of the timing
+    analyze_sentiment_batch(texts, sentiment_model=sentiment_model)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        analyze_sentiment_batch(texts, sentiment_model=sentiment_model)
+    elapsed = time.perf_counter() - start
+
+    return len(texts) * repeat / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS))
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    reference = analyze_sentiment_batch(
+        PARITY_CORPUS,
+        sentiment_model=load_sentiment_model("torch")
+    )
+
+    failed = False
+    baseline_rate = None
+
+    for backend in args.backends:
+        sentiment_model = load_sentiment_model(backend)
+        results = analyze_sentiment_batch(
+            PARITY_CORPUS, sentiment_model=sentiment_model
+        )
+
+        parity = check_parity(reference, results)
+        rate = benchmark(sentiment_model, PARITY_CORPUS, args.repeat)
+        if backend == "torch":
+            baseline_rate = rate
+
+        speedup = f"{rate / baseline_rate:.2f}x" if baseline_rate else "-"
+        status = "OK" if parity["passed"] else "FAIL"
+
+        print(f"[{status}] {backend}")
+        print(f"  label agreement:   {parity['label_agreement']}")
+        print(f"  max compound diff: {parity['max_compound_diff']}")
+        print(f"  throughput:        {rate:.1f} texts/sec ({speedup} vs torch)")
+
+        failed = failed or not parity["passed"]
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
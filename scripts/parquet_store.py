@@ -0,0 +1,56 @@
+"""
+Moves the pipeline's data between MongoDB and the local Parquet store.
+
+export copies preprocessed posts into <path>/posts (partitioned by
+subreddit and day); run the pipeline with STORAGE_BACKEND=parquet and
+STORAGE_PATH=<path>; import writes its results back onto the posts.
+
+    python -m scripts.parquet_store export --path post_store
+    python -m scripts.parquet_store import --path post_store
+"""
+
+import argparse
+
+from config.database import db
+from config.settings import settings
+from database.storage import POST_QUERY, export_posts, import_results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("--path", default=settings.storage_path)
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        help="Export every post, not only the ones the pipeline processes"
+    )
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        exported = export_posts(
+            db["posts"],
+            args.path,
+            query=None if args.all else POST_QUERY,
+            batch_size=args.batch_size
+        )
+        print(f"Exported {exported} posts to {args.path}/posts")
+        return
+
+    report = import_results(
+        args.path,
+        db["posts"],
+        batch_size=settings.write_batch_size,
+        max_retries=settings.write_max_retries
+    )
+    print(
+        f"Imported results: {report['written']} written, "
+        f"{report['failed']} failed in {report['batches']} batches"
+    )
+    for error in report["errors"]:
+        print(f"⚠️ Write error {error['code']}: {error['message']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+Creates the indexes behind every query the pipeline, preprocessor and
+API run, then explain()s each of those queries and fails if any of them
+still falls back to a collection scan.
+
+Index creation is idempotent: an index that already exists with the same
+name and spec is left alone. One that exists with a different spec is
+reported, and replaced only with --rebuild.
+
+    python -m scripts.setup_db
+    python -m scripts.setup_db --check-only
+    python -m scripts.setup_db --rebuild
+"""
+
+import argparse
+import sys
+from datetime import datetime
+from typing import List, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from config.database import db
+from database.pipeline_state import after_position
+from database.storage import POST_QUERY, TOPICS_COLLECTION
+from nlp_engine.instrumentation import RUNS_COLLECTION
+from nlp_engine.opportunity_snapshots import SNAPSHOTS_COLLECTION, OpportunitySnapshots
+from nlp_engine.trend_counters import (
+    COUNTERS_COLLECTION,
+    JOURNAL_COLLECTION,
+    TopicTrendCounters
+)
+from pipeline_jobs import JOBS_COLLECTION
+
+
+# Existing index with the same name but another key pattern / options
+INDEX_CONFLICT_CODES = (85, 86)
+DUPLICATE_KEY_CODE = 11000
+
+
+# -----------------------------------------------------
+# Indexes
+# -----------------------------------------------------
+
+INDEXES = {
+    "posts": [
+        # One document per Reddit post; posts without post_id are not indexed
+        IndexModel(
+            [("post_id", ASCENDING)],
+            name="post_id_unique",
+            unique=True,
+            partialFilterExpression={"post_id": {"$exists": True}}
+        ),
+        # Full pipeline scan (equality prefix, then the _id sort); the
+        # preprocessor's preprocessed != True uses the same prefix
+        IndexModel(
+            [("preprocessed", ASCENDING), ("is_candidate", ASCENDING), ("_id", ASCENDING)],
+            name="pipeline_scan"
+        ),
+        # Incremental scan in (preprocessed_at, _id) order, candidates only
+        IndexModel(
+            [("preprocessed_at", ASCENDING), ("_id", ASCENDING)],
+            name="pipeline_incremental",
+            partialFilterExpression={"preprocessed": True, "is_candidate": True}
+        ),
+        # Written-back results: aggregation of incremental runs
+        IndexModel(
+            [
+                ("pipeline_version", ASCENDING),
+                ("topic_model_version", ASCENDING),
+                ("is_duplicate", ASCENDING)
+            ],
+            name="pipeline_results",
+            partialFilterExpression={"pipeline_version": {"$exists": True}}
+        ),
+        # API filters
+        IndexModel(
+            [("subreddit", ASCENDING), ("created_utc", DESCENDING)],
+            name="subreddit_recent"
+        ),
+        IndexModel(
+            [("category", ASCENDING), ("created_utc", DESCENDING)],
+            name="category_recent"
+        ),
+        IndexModel(
+            [("is_pain_point", ASCENDING), ("created_utc", DESCENDING)],
+            name="pain_point_recent"
+        ),
+        # Unfiltered GET /posts, newest first
+        IndexModel([("created_utc", DESCENDING)], name="recent")
+    ],
+    "pain_points": [
+        IndexModel(
+            [("category", ASCENDING), ("score", DESCENDING)],
+            name="category_score"
+        ),
+        IndexModel([("score", DESCENDING)], name="score")
+    ],
+    # Topic-level trend / score, one document per (version, topic)
+    TOPICS_COLLECTION: [
+        IndexModel(
+            [("topic_model_version", ASCENDING), ("topic_id", ASCENDING)],
+            name="version_topic"
+        )
+    ],
+    JOBS_COLLECTION: [
+        IndexModel([("created_at", DESCENDING)], name="created_at")
+    ],
+    RUNS_COLLECTION: [
+        IndexModel([("started_at", DESCENDING)], name="started_at")
+    ]
+}
+
+# Indexes no query uses any more, dropped when found
+RETIRED_INDEXES = {
+    "posts": ["category_score"]
+}
+
+
+def create_indexes(rebuild: bool = False) -> bool:
+    ok = True
+
+    for name, index_names in RETIRED_INDEXES.items():
+        collection = db[name]
+        for index_name in set(index_names) & set(collection.index_information()):
+            collection.drop_index(index_name)
+            print(f"🗑️ {name}.{index_name} dropped")
+
+    for name, models in INDEXES.items():
+        collection = db[name]
+        for model in models:
+            try:
+                collection.create_indexes([model])
+            except OperationFailure as e:
+                ok &= _handle_failure(collection, model, e, rebuild)
+        print(f"✅ {name}: {len(models)} indexes")
+
+    # Collections whose owner declares its own indexes
+    OpportunitySnapshots(db[SNAPSHOTS_COLLECTION]).ensure_indexes()
+    TopicTrendCounters(
+        db[COUNTERS_COLLECTION], journal=db[JOURNAL_COLLECTION]
+    ).ensure_indexes()
+    print(
+        f"✅ {SNAPSHOTS_COLLECTION}, {COUNTERS_COLLECTION}, {JOURNAL_COLLECTION}: "
+        f"owner indexes"
+    )
+
+    return ok
+
+
+def _handle_failure(collection, model: IndexModel, error: OperationFailure, rebuild: bool) -> bool:
+    index_name = model.document["name"]
+
+    if error.code == DUPLICATE_KEY_CODE:
+        key = model.document["key"]
+        field = next(iter(key))
+        duplicates = list(collection.aggregate([
+            {"$match": {field: {"$exists": True}}},
+            {"$group": {"_id": f"${field}", "n": {"$sum": 1}}},
+            {"$match": {"n": {"$gt": 1}}},
+            {"$limit": 5}
+        ]))
+        print(
+            f"❌ {collection.name}.{index_name}: duplicate {field} values "
+            f"(e.g. {[d['_id'] for d in duplicates]}); remove them first"
+        )
+        return False
+
+    if error.code in INDEX_CONFLICT_CODES:
+        if not rebuild:
+            print(
+                f"❌ {collection.name}.{index_name} exists with a different spec; "
+                f"rerun with --rebuild to replace it"
+            )
+            return False
+
+        # Same name with other keys, or same keys under another name
+        key = list(model.document["key"].items())
+        for name, info in collection.index_information().items():
+            if name == index_name or info["key"] == key:
+                collection.drop_index(name)
+        collection.create_indexes([model])
+        print(f"🔁 {collection.name}.{index_name} rebuilt")
+        return True
+
+    raise error
+
+
+# -----------------------------------------------------
+# Query Plans
+# -----------------------------------------------------
+
+_POSITION = {"preprocessed_at": datetime(2026, 1, 1), "_id": "000000000000000000000000"}
+
+# (description, collection, filter, sort) of every query that must use an index
+QUERIES: List[Tuple[str, str, dict, list]] = [
+    ("pipeline chunks", "posts", POST_QUERY, [("_id", 1)]),
+    (
+        "pipeline chunks (incremental)",
+        "posts",
+        {"$and": [
+            POST_QUERY,
+            {"$or": [
+                {"preprocessed_at": None},
+                {"preprocessed_at": {"$lte": datetime(2026, 2, 1)}}
+            ]},
+            after_position(_POSITION)
+        ]},
+        [("preprocessed_at", 1), ("_id", 1)]
+    ),
+    ("preprocessor backlog", "posts", {"preprocessed": {"$ne": True}}, []),
+    (
+        "stored results",
+        "posts",
+        {"pipeline_version": "v1", "topic_model_version": "v", "is_duplicate": False},
+        []
+    ),
+    ("topic results", TOPICS_COLLECTION, {"topic_model_version": "v"}, [("topic_id", 1)]),
+    ("post by Reddit id", "posts", {"post_id": "abc123"}, []),
+    # As database.operations.get_posts builds them
+    ("recent posts", "posts", {}, [("created_utc", -1)]),
+    ("posts by subreddit", "posts", {"subreddit": "india"}, [("created_utc", -1)]),
+    ("posts by category", "posts", {"category": "Career"}, [("created_utc", -1)]),
+    ("pain point posts", "posts", {"is_pain_point": True}, [("created_utc", -1)]),
+    (
+        "pain points by category",
+        "pain_points",
+        {"category": "Career", "score": {"$gte": 10}},
+        [("score", -1)]
+    ),
+    ("top pain points", "pain_points", {"score": {"$gte": 0}}, [("score", -1)]),
+    ("latest snapshot", SNAPSHOTS_COLLECTION, {}, [("snapshot_id", -1)]),
+    (
+        "snapshot top n",
+        SNAPSHOTS_COLLECTION,
+        {"snapshot_id": "s20260101-000000"},
+        [("snapshot_id", -1), ("score", -1)]
+    ),
+    (
+        "trend counters",
+        COUNTERS_COLLECTION,
+        {"topic_model_version": "v", "bucket": "week", "count": {"$gt": 0}},
+        [("ordinal", -1)]
+    ),
+    ("open trend journal entries", JOURNAL_COLLECTION, {"source": "posts"}, []),
+    ("recent jobs", JOBS_COLLECTION, {}, [("created_at", -1)]),
+    ("recent runs", RUNS_COLLECTION, {}, [("started_at", -1)])
+]
+
+
+def plan_values(plan, key: str) -> List[str]:
+    """Every `key` in an explain() plan (classic or slot-based format)."""
+    values = []
+    if isinstance(plan, dict):
+        if key in plan:
+            values.append(plan[key])
+        for value in plan.values():
+            values.extend(plan_values(value, key))
+    elif isinstance(plan, list):
+        for item in plan:
+            values.extend(plan_values(item, key))
+    return values
+
+
+def check_queries() -> bool:
+    ok = True
+
+    for description, collection, query, sort in QUERIES:
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+
+        winning = cursor.explain()["queryPlanner"]["winningPlan"]
+        stages = plan_values(winning, "stage")
+
+        if "COLLSCAN" in stages:
+            print(f"❌ {description} ({collection}): COLLSCAN")
+            ok = False
+        else:
+            indexes = sorted(set(plan_values(winning, "indexName")))
+            print(f"✅ {description} ({collection}): {', '.join(indexes) or stages[0]}")
+
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--check-only", action="store_true", help="Only verify query plans")
+    parser.add_argument("--rebuild", action="store_true", help="Replace conflicting indexes")
+    args = parser.parse_args()
+
+    ok = True
+    if not args.check_only:
+        print("Creating indexes...")
+        ok = create_indexes(rebuild=args.rebuild)
+
+    print("\nChecking query plans...")
+    ok = check_queries() and ok
+
+    if not ok:
+        sys.exit(1)
+    print("\nAll registered queries use an index")
+
+
+if __name__ == "__main__":
+    main()
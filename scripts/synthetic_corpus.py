@@ -0,0 +1,168 @@
+"""
+Synthetic Reddit corpus shaped like the scraper's output.
+
+Posts draw their words from the real category, pain point and
+opportunity lexicons, with long-tailed body lengths, Zipf-distributed
+subreddits, and timestamps that follow a daily cycle, per-category
+growth and occasional bursts. Everything is seeded, so a given
+(size, seed) always produces the same corpus.
+
+    python -m scripts.synthetic_corpus --size 100000 --mongo-uri mongodb://localhost:27017
+"""
+
+import argparse
+from datetime import datetime, timedelta
+from typing import Iterator, List
+
+import numpy as np
+
+from scraper.keywords import (
+    OPPORTUNITY_KEYWORDS,
+    PAIN_CATEGORIES,
+    PAIN_POINT_KEYWORDS,
+    TARGET_SUBREDDITS
+)
+
+
+FILLER = (
+    "i the a to and of it is in that my for this have but with was so "
+    "on just not be are do me you at like what can get about they "
+    "been how if all or now one really would because any there still "
+    "even know think want need people time work make go day year"
+).split()
+
+CATEGORIES = sorted(PAIN_CATEGORIES)
+
+# Median body of ~60 words with a long tail, like real self posts
+BODY_WORDS_MEDIAN = 60
+BODY_WORDS_SIGMA = 1.0
+BODY_WORDS_MAX = 2000
+LINK_POST_SHARE = 0.15
+
+
+def generate_posts(
+    size: int,
+    seed: int = 0,
+    days: int = 180,
+    end: datetime = datetime(2026, 1, 1),
+    batch_size: int = 10000
+) -> Iterator[List[dict]]:
+    """Yields the corpus in batches of raw (not yet preprocessed) posts."""
+    rng = np.random.default_rng(seed)
+
+    subreddit_weights = 1.0 / np.arange(1, len(TARGET_SUBREDDITS) + 1) ** 1.1
+    subreddit_weights /= subreddit_weights.sum()
+
+    # Some categories grow, some fade; a few get a short burst
+    growth = rng.normal(0, 1.5, len(CATEGORIES))
+    bursts = {
+        c: (rng.uniform(0.3, 0.95) * days, rng.uniform(0.5, 3))
+        for c in rng.choice(len(CATEGORIES), 3, replace=False).tolist()
+    }
+
+    start = end - timedelta(days=days)
+    made = 0
+
+    while made < size:
+        n = min(batch_size, size - made)
+
+        categories = rng.integers(0, len(CATEGORIES), n)
+        subreddits = rng.choice(len(TARGET_SUBREDDITS), n, p=subreddit_weights)
+        offsets = _offsets(rng, categories, growth, bursts, days)
+        body_lengths = np.minimum(
+            rng.lognormal(np.log(BODY_WORDS_MEDIAN), BODY_WORDS_SIGMA, n),
+            BODY_WORDS_MAX
+        ).astype(int)
+        body_lengths[rng.random(n) < LINK_POST_SHARE] = 0
+        scores = np.floor(rng.pareto(1.2, n) * 5).astype(int)
+
+        batch = []
+        for i in range(n):
+            category = CATEGORIES[categories[i]]
+            words = PAIN_CATEGORIES[category]
+            post_number = made + i
+
+            batch.append({
+                "post_id": f"syn{seed}_{post_number}",
+                "subreddit": TARGET_SUBREDDITS[subreddits[i]],
+                "title": _sentence(rng, words, int(rng.integers(5, 16))),
+                "content": _sentence(rng, words, int(body_lengths[i])),
+                "author": "AutoModerator" if rng.random() < 0.01 else f"user{rng.integers(0, size)}",
+                "score": int(scores[i]),
+                "upvote_ratio": round(float(rng.uniform(0.5, 1.0)), 2),
+                "num_comments": int(scores[i] * rng.uniform(0.1, 1.5)),
+                "created_utc": start + timedelta(seconds=float(offsets[i])),
+                "url": f"https://www.reddit.com/r/synthetic/comments/{post_number}",
+                "scraped_at": end,
+                "source": "synthetic",
+                "category": category
+            })
+
+        made += n
+        yield batch
+
+
+def _offsets(rng, categories, growth, bursts, days) -> np.ndarray:
+    """Seconds since the corpus start for each post."""
+    span = days * 86400
+
+    # Growth g tilts the density towards the end (g > 0) or start
+    u = rng.random(len(categories))
+    g = growth[categories]
+    tilted = np.where(
+        np.abs(g) < 1e-6,
+        u,
+        np.log1p(u * np.expm1(g)) / np.where(np.abs(g) < 1e-6, 1, g)
+    )
+    offsets = tilted * span
+
+    for category, (center_day, width_days) in bursts.items():
+        members = np.flatnonzero(categories == category)
+        chosen = members[rng.random(len(members)) < 0.2]
+        offsets[chosen] = rng.normal(center_day, width_days, len(chosen)) * 86400
+
+    # Daily cycle: shift towards the evening (UTC+5:30 audience)
+    hour_shift = rng.normal(15, 4, len(categories)) % 24
+    offsets = (offsets // 86400) * 86400 + hour_shift * 3600
+    return np.clip(offsets, 0, span - 1)
+
+
+def _sentence(rng, topic_words: List[str], length: int) -> str:
+    if length <= 0:
+        return ""
+
+    kinds = rng.random(length)
+    words = []
+    for kind in kinds:
+        if kind < 0.2:
+            words.append(topic_words[rng.integers(0, len(topic_words))])
+        elif kind < 0.24:
+            words.append(PAIN_POINT_KEYWORDS[rng.integers(0, len(PAIN_POINT_KEYWORDS))])
+        elif kind < 0.26:
+            words.append(OPPORTUNITY_KEYWORDS[rng.integers(0, len(OPPORTUNITY_KEYWORDS))])
+        else:
+            words.append(FILLER[rng.integers(0, len(FILLER))])
+    return " ".join(words)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017")
+    parser.add_argument("--database", default="reddit_pain_points_bench")
+    args = parser.parse_args()
+
+    from pymongo import MongoClient
+
+    collection = MongoClient(args.mongo_uri)[args.database]["posts"]
+    inserted = 0
+    for batch in generate_posts(args.size, args.seed, args.days):
+        collection.insert_many(batch, ordered=False)
+        inserted += len(batch)
+    print(f"Inserted {inserted} synthetic posts into {args.database}.posts")
+
+
+if __name__ == "__main__":
+    main()
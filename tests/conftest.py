@@ -0,0 +1,21 @@
+import os
+
+import pytest
+
+# Settings require these; tests never reach Reddit or a real cluster
+os.environ.setdefault("REDDIT_CLIENT_ID", "test")
+os.environ.setdefault("REDDIT_CLIENT_SECRET", "test")
+os.environ.setdefault("REDDIT_USER_AGENT", "test")
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGODB_DATABASE", "test_reddit_pain_points")
+
+
+@pytest.fixture
+def mongo_db(monkeypatch):
+    """In-memory database behind config.database.db"""
+    mongomock = pytest.importorskip("mongomock")
+    from config.database import Database
+
+    database = mongomock.MongoClient()["test_reddit_pain_points"]
+    monkeypatch.setattr(Database, "get_database", classmethod(lambda cls: database))
+    return database
@@ -0,0 +1,107 @@
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def client(mongo_db):
+    from api.main import app
+    return TestClient(app)
+
+
+def test_routes_import():
+    from api.routes import router
+
+    paths = {route.path for route in router.routes}
+    assert {"/posts", "/opportunities", "/opportunities/snapshots"} <= paths
+
+
+def test_posts_and_search(client, mongo_db):
+    mongo_db["posts"].insert_many([
+        {"post_id": "a", "subreddit": "jobs", "title": "No response after applying",
+         "content": "", "score": 3, "num_comments": 1, "created_utc": datetime(2026, 1, 2)},
+        {"post_id": "b", "subreddit": "india", "title": "Rent is too expensive",
+         "content": "", "score": 9, "num_comments": 4, "created_utc": datetime(2026, 1, 3)}
+    ])
+
+    response = client.get("/api/v1/posts", params={"subreddit": "jobs"})
+    assert response.status_code == 200
+    assert [p["post_id"] for p in response.json()["posts"]] == ["a"]
+
+    response = client.get("/api/v1/search", params={"q": "RENT"})
+    assert [p["post_id"] for p in response.json()["results"]] == ["b"]
+
+    stats = client.get("/api/v1/statistics").json()
+    assert stats["total_posts"] == 2
+    assert stats["posts_by_subreddit"] == {"jobs": 1, "india": 1}
+
+
+def test_pain_points_sorted_by_score(client, mongo_db):
+    mongo_db["pain_points"].insert_many([
+        {"post_id": "a", "category": "Career", "score": 5, "num_comments": 10},
+        {"post_id": "b", "category": "Career", "score": 20, "num_comments": 0},
+        {"post_id": "c", "category": "Finance", "score": 50, "num_comments": 0}
+    ])
+
+    response = client.get(
+        "/api/v1/pain-points", params={"category": "Career", "min_score": 1}
+    )
+    assert [p["post_id"] for p in response.json()["pain_points"]] == ["b", "a"]
+
+    top = client.get("/api/v1/pain-points/top", params={"limit": 1}).json()
+    assert top["top_pain_points"][0]["post_id"] == "c"
+
+
+def test_opportunities_from_snapshot(client):
+    from nlp_engine.opportunity_snapshots import SNAPSHOTS_COLLECTION, OpportunitySnapshots
+    from config.database import db
+
+    assert client.get("/api/v1/opportunities").status_code == 404
+
+    snapshot_id = OpportunitySnapshots(db[SNAPSHOTS_COLLECTION]).save(
+        [
+            {"topic": 1, "score": 0.9, "volume": 12, "trend": 0.4,
+             "sentiment": "negative", "keywords": [("rent", 0.3)]},
+            {"topic": 2, "score": 0.5, "volume": 4, "trend": 0.0,
+             "sentiment": "neutral", "keywords": []}
+        ],
+        topic_model_version="v1"
+    )
+
+    response = client.get("/api/v1/opportunities", params={"limit": 1})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == 1
+    assert body["opportunities"][0]["topic"] == 1
+
+    listed = client.get("/api/v1/opportunities/snapshots").json()
+    assert listed["latest"] == snapshot_id
+
+
+def test_assign_rejects_versions_outside_the_registry(client, tmp_path, monkeypatch):
+    import json
+
+    import numpy as np
+
+    from api import routes
+    from nlp_engine.topic_registry import TopicModelRegistry
+
+    monkeypatch.setattr(routes, "_topic_registry", TopicModelRegistry(str(tmp_path / "registry")))
+
+    # A loadable model directory next to the registry, not in it
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    (outside / "manifest.json").write_text(json.dumps(
+        {"version": "outside", "topic_ids": [], "keywords": {}}
+    ))
+    np.save(outside / "centroids.npy", np.zeros((0, 2), np.float32))
+
+    for version in ("../outside", str(outside), "v20260101-000000"):
+        response = client.post(
+            "/api/v1/topics/assign", json={"texts": ["rent"], "version": version}
+        )
+        assert response.status_code == 404
@@ -0,0 +1,95 @@
+import pytest
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import AutoReconnect, BulkWriteError, OperationFailure
+
+from database.bulk_writer import BulkWriter
+
+
+class FlakyCollection:
+    """Raises the queued errors on successive bulk_write calls, then succeeds."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = []
+
+    def bulk_write(self, ops, ordered=True):
+        self.calls.append(list(ops))
+        if self.errors:
+            raise self.errors.pop(0)
+
+
+def write_errors(*errors):
+    return BulkWriteError({
+        "writeErrors": [{"index": i, "code": code, "errmsg": f"code {code}"} for i, code in errors]
+    })
+
+
+def ops(n):
+    return [UpdateOne({"_id": i}, {"$set": {"n": i}}, upsert=True) for i in range(n)]
+
+
+def test_batches_and_writes(mongo_db):
+    with BulkWriter(mongo_db["posts"], batch_size=100) as writer:
+        for op in ops(250):
+            writer.add(op)
+        writer.skip(3)
+
+    assert mongo_db["posts"].count_documents({}) == 250
+    report = writer.report()
+    assert (report["written"], report["failed"], report["skipped"], report["batches"]) == (
+        250, 0, 3, 3
+    )
+
+
+def test_connection_failure_retries_the_batch():
+    collection = FlakyCollection(AutoReconnect("primary gone"))
+    writer = BulkWriter(collection, batch_size=10, backoff=0)
+
+    with writer:
+        for op in ops(4):
+            writer.add(op)
+
+    assert collection.calls == [ops(4), ops(4)]
+    assert (writer.written, writer.failed, writer.retries) == (4, 0, 1)
+
+
+def test_partial_failure_retries_only_transient_errors():
+    batch = ops(5)
+    collection = FlakyCollection(write_errors((1, 91), (3, 11000)))
+    writer = BulkWriter(collection, backoff=0)
+
+    with writer:
+        for op in batch:
+            writer.add(op)
+
+    assert collection.calls == [batch, [batch[1]]]
+    assert (writer.written, writer.failed, writer.retries) == (4, 1, 1)
+    assert writer.errors == [{"code": 11000, "message": "code 11000"}]
+
+
+def test_gives_up_after_max_retries():
+    collection = FlakyCollection(*[write_errors((0, 189))] * 5)
+    writer = BulkWriter(collection, max_retries=2, backoff=0)
+
+    with writer:
+        writer.add(InsertOne({"_id": 1}))
+
+    assert len(collection.calls) == 3
+    assert (writer.written, writer.failed, writer.retries) == (0, 1, 2)
+
+
+@pytest.mark.parametrize("error, retried", [
+    (OperationFailure("stepped down", code=189), True),
+    (OperationFailure("bad update", code=9), False),
+    (ValueError("not a driver error"), False)
+])
+def test_only_transient_exceptions_are_retried(error, retried):
+    collection = FlakyCollection(error)
+    writer = BulkWriter(collection, backoff=0)
+
+    with writer:
+        for op in ops(3):
+            writer.add(op)
+
+    assert len(collection.calls) == (2 if retried else 1)
+    assert (writer.written, writer.failed) == ((3, 0) if retried else (0, 3))
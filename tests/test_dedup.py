@@ -0,0 +1,77 @@
+import random
+from datetime import datetime, timezone
+
+import numpy as np
+
+from nlp_engine.dedup import MinHashDeduplicator, StreamingDeduplicator, shingle_hashes
+
+WORDS = (
+    "salary late again manager ignores leave requests rent deposit landlord "
+    "refund interview ghosted recruiter offer notice period commute traffic "
+    "metro office hybrid appraisal bonus layoffs visa loan emi"
+).split()
+
+
+def text(seed: int, length: int = 40) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choices(WORDS, k=length))
+
+
+def edit(source: str, position: int) -> str:
+    """One word swapped: Jaccard about 0.85 over 40 words, above the 0.8 threshold."""
+    words = source.split()
+    words[position] = "typo"
+    return " ".join(words)
+
+
+def test_signature_agreement_estimates_jaccard():
+    dedup = MinHashDeduplicator(num_perm=256, bands=16)
+    a, b = text(1), edit(edit(text(1), 5), 25)
+
+    sa, sb = set(shingle_hashes(a)), set(shingle_hashes(b))
+    jaccard = len(sa & sb) / len(sa | sb)
+    estimate = np.mean(dedup.signature(a) == dedup.signature(b))
+
+    assert abs(estimate - jaccard) < 0.1
+
+
+def test_groups_near_duplicates_and_keeps_distinct_texts_apart():
+    texts = [text(1), text(2), edit(text(1), 10), "", "", edit(text(2), 30), text(3)]
+
+    canonical = MinHashDeduplicator().canonical_indices(texts)
+
+    assert canonical == [0, 1, 0, 3, 4, 1, 6]
+
+
+def test_canonical_is_the_earliest_post():
+    texts = [text(1), edit(text(1), 3), edit(text(1), 20), text(2)]
+    order = [
+        datetime(2026, 3, 2),
+        1767225600.0,                                   # 2026-01-01 UTC
+        datetime(2026, 2, 1, tzinfo=timezone.utc),
+        None
+    ]
+
+    canonical = MinHashDeduplicator().canonical_indices(texts, order)
+
+    assert canonical == [1, 1, 1, 3]
+
+
+def test_streaming_matches_earlier_chunks():
+    dedup = StreamingDeduplicator()
+
+    canonical, earlier, rows = dedup.add(["a", "b", "c"], [text(1), edit(text(1), 7), text(2)])
+    assert canonical == [0, 0, 2]
+    assert earlier == {}
+    assert rows == {0: 0, 2: 1}
+    dedup.record(rows, topics={0: 4, 2: 9}, compounds={0: -0.5, 2: 0.25})
+
+    canonical, earlier, rows = dedup.add(
+        ["d", "e", "f", "g"],
+        [edit(text(2), 12), text(3), edit(text(2), 12), ""]
+    )
+    assert canonical == [0, 1, 0, 3]
+    assert earlier == {0: 1, 2: 1}
+    assert rows == {1: 2}
+    assert dedup.result(earlier[0]) == ("c", 9, 0.25)
+    assert dedup.ids == ["a", "c", "e"]
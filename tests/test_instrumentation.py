@@ -0,0 +1,40 @@
+import tracemalloc
+
+import pytest
+
+from nlp_engine.instrumentation import PipelineMetrics
+
+
+@pytest.fixture
+def metrics():
+    tracing = tracemalloc.is_tracing()
+    yield PipelineMetrics(memory="tracemalloc")
+    if not tracing:
+        tracemalloc.stop()
+
+
+def test_tracemalloc_peak_is_per_stage(metrics):
+    with metrics.stage("big", items=1):
+        block = bytearray(40 * 2 ** 20)
+        del block
+    with metrics.stage("small", items=1):
+        block = bytearray(2 ** 20)
+
+    stages = metrics.stage_totals()
+    assert stages["big"]["max_alloc_peak_mb"] >= 40
+    assert 1 <= stages["small"]["max_alloc_peak_mb"] < 5
+    assert 0.9 <= metrics.chunks[-1]["alloc_delta_mb"] < 5
+
+    # The run-wide peak still covers the biggest stage
+    assert metrics.report()["alloc_peak_mb"] >= 40
+
+
+def test_stage_totals_accumulate_chunks(metrics):
+    for chunk in range(3):
+        with metrics.stage("sentiment", items=10) as call:
+            call["items"] = 20 if chunk == 2 else 10
+
+    totals = metrics.stage_totals()["sentiment"]
+    assert totals["calls"] == 3
+    assert totals["items"] == 40
+    assert [c["chunk"] for c in metrics.chunks] == [0, 1, 2]
@@ -0,0 +1,63 @@
+import random
+import re
+
+from nlp_engine.keyword_matcher import KeywordMatcher
+from nlp_engine.sentiment import NEGATIVE_KEYWORDS, POSITIVE_KEYWORDS
+from scraper.keywords import PAIN_CATEGORIES
+
+
+def corpus(keywords, n=300, seed=0):
+    """Texts stitched from keywords, keyword fragments and filler words."""
+    rng = random.Random(seed)
+    keywords = sorted(keywords)
+    pieces = keywords + [k[:len(k) // 2] for k in keywords] + [
+        "the", "flag", "a", "so", "bad", "x", "-", "...", "MONEY"
+    ]
+    return [
+        rng.choice(["", " "]).join(rng.choices(pieces, k=rng.randint(0, 30)))
+        for _ in range(n)
+    ]
+
+
+def test_substring_mode_matches_str_count():
+    # The loop nlp_engine.sentiment used before the matcher
+    matcher = KeywordMatcher({"negative": NEGATIVE_KEYWORDS}, word_boundary=False)
+
+    for text in corpus(NEGATIVE_KEYWORDS):
+        lowered = text.lower()
+        assert matcher.count(text)["negative"] == sum(lowered.count(k) for k in NEGATIVE_KEYWORDS)
+        assert matcher.contains(text, "negative") == any(k in lowered for k in NEGATIVE_KEYWORDS)
+
+
+def test_word_boundary_mode_matches_per_keyword_regex():
+    lexicons = {"negative": NEGATIVE_KEYWORDS, "positive": POSITIVE_KEYWORDS}
+    lexicons.update(PAIN_CATEGORIES)
+    matcher = KeywordMatcher(lexicons)
+    patterns = {
+        lexicon: [
+            re.compile(r"(?<!\w)" + re.escape(k.lower()) + r"(?!\w)")
+            for k in set(k.lower() for k in words)
+        ]
+        for lexicon, words in lexicons.items()
+    }
+
+    keywords = {k for words in lexicons.values() for k in words}
+    for text in corpus(keywords, seed=1):
+        lowered = text.lower()
+        expected = {
+            lexicon: sum(len(p.findall(lowered)) for p in compiled)
+            for lexicon, compiled in patterns.items()
+        }
+        assert matcher.count(text) == expected
+
+
+def test_find_offsets_index_original_text():
+    matcher = KeywordMatcher({"pain": ["rent", "rent hike"], "money": ["hike"]})
+    text = "İ hate the RENT HIKE, not the flag"
+
+    matches = matcher.find(text)
+
+    assert [(m.lexicon, text[m.start:m.end]) for m in matches] == [
+        ("pain", "RENT"), ("pain", "RENT HIKE"), ("money", "HIKE")
+    ]
+    assert not matcher.contains("apparent hikers", "pain")
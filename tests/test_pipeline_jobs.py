@@ -0,0 +1,113 @@
+import sys
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from database.pipeline_state import STATE_COLLECTION
+from pipeline_jobs import JOBS_COLLECTION, PipelineJobs, run_job
+
+
+@pytest.fixture
+def jobs(mongo_db):
+    return PipelineJobs(mongo_db[JOBS_COLLECTION], mongo_db[STATE_COLLECTION], stale_seconds=60)
+
+
+def test_active_job_is_returned_instead_of_a_second_run(jobs):
+    first, created = jobs.submit({"limit": 0, "unknown": 1})
+    assert created
+    assert first["params"] == {"limit": 0}
+
+    again, created = jobs.submit({"limit": 10})
+    assert not created
+    assert again["_id"] == first["_id"]
+    assert jobs.jobs.count_documents({}) == 1
+
+    jobs.start(first["_id"])
+    jobs.finish(first["_id"], "completed")
+
+    second, created = jobs.submit({})
+    assert created and second["_id"] != first["_id"]
+
+
+def test_concurrent_submits_start_one_job(jobs):
+    results = []
+    barrier = threading.Barrier(8)
+
+    def submit():
+        barrier.wait()
+        results.append(jobs.submit({}))
+
+    threads = [threading.Thread(target=submit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(created for _, created in results) == 1
+    assert len({job["_id"] for job, _ in results}) == 1
+    assert jobs.jobs.count_documents({}) == 1
+
+
+def test_stale_job_is_taken_over(jobs):
+    stale, _ = jobs.submit({})
+    jobs.start(stale["_id"])
+    jobs.jobs.update_one(
+        {"_id": stale["_id"]},
+        {"$set": {"heartbeat_at": datetime.utcnow() - timedelta(seconds=120)}}
+    )
+
+    job, created = jobs.submit({})
+
+    assert created and job["_id"] != stale["_id"]
+    abandoned = jobs.get(stale["_id"])
+    assert abandoned["status"] == "failed"
+    assert "stopped reporting" in abandoned["error"]
+
+    # The abandoned worker finishing late does not free the new job's lock
+    jobs.finish(stale["_id"], "completed")
+    assert not jobs.submit({})[1]
+
+
+def test_cancel(jobs):
+    queued, _ = jobs.submit({})
+    assert jobs.cancel(queued["_id"])["status"] == "cancelled"
+    assert jobs.start(queued["_id"]) is None
+
+    running, created = jobs.submit({})
+    assert created
+    jobs.start(running["_id"])
+    progress = {"run_id": "r1", "processed": 10, "chunks": 1, "stages": {}}
+    assert not jobs.report_progress(running["_id"], progress)
+
+    job = jobs.cancel(running["_id"])
+    assert job["status"] == "running" and job["cancel_requested"]
+    assert jobs.report_progress(running["_id"], progress)
+    assert not jobs.submit({})[1]
+
+
+def test_job_never_started_is_taken_over_early(jobs):
+    jobs.queued_stale_seconds = 5
+    orphan, _ = jobs.submit({})
+
+    assert not jobs.submit({})[1]
+
+    jobs.jobs.update_one(
+        {"_id": orphan["_id"]},
+        {"$set": {"heartbeat_at": datetime.utcnow() - timedelta(seconds=10)}}
+    )
+    job, created = jobs.submit({})
+
+    assert created and job["_id"] != orphan["_id"]
+    assert jobs.get(orphan["_id"])["error"] == "Worker never started the job"
+
+
+def test_worker_import_error_fails_the_job(jobs, monkeypatch):
+    job, _ = jobs.submit({})
+    monkeypatch.setitem(sys.modules, "run_pipeline", None)
+
+    with pytest.raises(ImportError):
+        run_job(job["_id"])
+
+    assert jobs.get(job["_id"])["status"] == "failed"
+    assert jobs.submit({})[1]
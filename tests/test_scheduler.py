@@ -0,0 +1,100 @@
+import random
+import threading
+import time
+
+import pytest
+
+from nlp_engine.scheduler import StageScheduler
+
+
+def jitter(seed):
+    time.sleep(random.Random(seed).random() * 0.005)
+
+
+def build(concurrent, log):
+    scheduler = StageScheduler(queue_size=2, concurrent=concurrent)
+
+    def dedup(chunk):
+        jitter(chunk["n"])
+        chunk["dedup"] = True
+
+    def sentiment(chunk):
+        assert chunk["dedup"]
+        jitter(chunk["n"] + 1)
+        chunk["sentiment"] = chunk["n"] * 10
+
+    def embedding(chunk):
+        assert chunk["dedup"]
+        jitter(chunk["n"] + 2)
+        chunk["embedding"] = -chunk["n"]
+
+    def topics(chunk):
+        assert "sentiment" in chunk and "embedding" in chunk
+        log.append((chunk["n"], threading.current_thread() is threading.main_thread()))
+
+    scheduler.add("dedup", dedup)
+    scheduler.add("sentiment", sentiment, after=["dedup"])
+    scheduler.add("embedding", embedding, after=["dedup"])
+    scheduler.add("topics", topics, after=["embedding"], main_thread=True)
+    return scheduler
+
+
+@pytest.mark.parametrize("concurrent", [True, False])
+def test_chunks_come_out_in_source_order(concurrent):
+    log = []
+    scheduler = build(concurrent, log)
+
+    chunks = list(scheduler.run({"n": n} for n in range(30)))
+
+    assert [c["n"] for c in chunks] == list(range(30))
+    assert all(c["sentiment"] == c["n"] * 10 and c["embedding"] == -c["n"] for c in chunks)
+    assert log == [(n, True) for n in range(30)]
+    assert set(scheduler.stats()) == {"source", "dedup", "sentiment", "embedding", "topics"}
+
+
+@pytest.mark.parametrize("concurrent", [True, False])
+def test_stage_errors_reach_the_caller(concurrent):
+    scheduler = build(concurrent, [])
+
+    def fail(chunk):
+        if chunk["n"] == 3:
+            raise KeyError("missing field")
+
+    scheduler.add("write", fail, after=["sentiment"])
+
+    seen = []
+    with pytest.raises(KeyError, match="missing field"):
+        for chunk in scheduler.run({"n": n} for n in range(100)):
+            seen.append(chunk["n"])
+    assert seen == [0, 1, 2]
+
+
+@pytest.mark.parametrize("concurrent", [True, False])
+def test_source_errors_reach_the_caller(concurrent):
+    def source():
+        yield {"n": 0}
+        raise ConnectionError("cursor lost")
+
+    with pytest.raises(ConnectionError):
+        list(build(concurrent, []).run(source()))
+
+
+def test_closing_early_stops_the_threads():
+    scheduler = build(True, [])
+    before = threading.active_count()
+
+    chunks = scheduler.run({"n": n} for n in range(1000))
+    assert next(chunks)["n"] == 0
+    chunks.close()
+
+    assert threading.active_count() == before
+
+
+def test_rejects_bad_dependencies():
+    scheduler = StageScheduler()
+    scheduler.add("topics", lambda chunk: None, main_thread=True)
+
+    with pytest.raises(ValueError, match="Unknown stage"):
+        scheduler.add("write", lambda chunk: None, after=["sentiment"])
+    with pytest.raises(ValueError, match="main-thread"):
+        scheduler.add("write", lambda chunk: None, after=["topics"])
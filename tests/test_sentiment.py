@@ -0,0 +1,64 @@
+import random
+
+import numpy as np
+
+from nlp_engine.sentiment import (
+    SentimentModel,
+    _length_buckets,
+    analyze_sentiment_batch
+)
+
+
+def test_length_buckets_partition_sorted_within_limits():
+    rng = random.Random(0)
+    lengths = [rng.randint(1, 300) for _ in range(500)]
+
+    batches = _length_buckets(lengths, batch_size=16, max_tokens=2048)
+
+    flat = [i for batch in batches for i in batch]
+    assert sorted(flat) == list(range(len(lengths)))
+    assert [lengths[i] for i in flat] == sorted(lengths)
+    for batch in batches:
+        assert len(batch) <= 16
+        assert max(lengths[i] for i in batch) * len(batch) <= 2048
+
+
+def test_length_buckets_oversized_row_gets_its_own_batch():
+    batches = _length_buckets([5, 5000, 5], batch_size=8, max_tokens=100)
+
+    assert batches == [[0, 2], [1]]
+
+
+class WordTokenizer:
+    """Token ids are word lengths; pads with zeros like an HF tokenizer."""
+
+    def __call__(self, texts, **kwargs):
+        return {"input_ids": [[len(w) for w in t.split()] or [0] for t in texts]}
+
+    def pad(self, encoded, **kwargs):
+        width = max(len(e["input_ids"]) for e in encoded)
+        ids = np.zeros((len(encoded), width))
+        for row, e in enumerate(encoded):
+            ids[row, :len(e["input_ids"])] = e["input_ids"]
+        return {"input_ids": ids}
+
+
+def predict(inputs):
+    # Padding must not change a row's score: zeros add nothing to the sum
+    negative = (inputs["input_ids"].sum(axis=1) % 10) / 10
+    return np.stack([negative, 1 - negative], axis=1)
+
+
+def test_batches_return_results_in_input_order():
+    model = SentimentModel(WordTokenizer(), predict, "test")
+    rng = random.Random(1)
+    words = ["salary", "late", "again", "no", "interview", "calls", "rent", "up"]
+    texts = [" ".join(rng.choices(words, k=rng.randint(1, 40))) for _ in range(200)]
+
+    batched = analyze_sentiment_batch(texts, batch_size=8, max_tokens=64, sentiment_model=model)
+    single = [
+        analyze_sentiment_batch([text], sentiment_model=model)[0]
+        for text in texts
+    ]
+
+    assert batched == single
@@ -0,0 +1,75 @@
+import math
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from nlp_engine.trend_analysis import analyze_trends, bucket_keys, to_datetime64
+
+
+def reference_trends(topics, timestamps):
+    """The per-topic loop analyze_trends replaced."""
+    topic_time_count = defaultdict(lambda: defaultdict(int))
+    for topic, ts in zip(topics, timestamps):
+        if topic == -1 or not isinstance(ts, datetime):
+            continue
+        topic_time_count[topic][ts.strftime("%Y-%W")] += 1
+
+    trend_scores = {}
+    for topic, weeks in topic_time_count.items():
+        log_counts = [math.log(max(1, c)) for _, c in sorted(weeks.items())]
+        n = len(log_counts)
+        if n < 2:
+            continue
+        mean_x = (n - 1) / 2
+        mean_y = sum(log_counts) / n
+        numerator = sum((x - mean_x) * (y - mean_y) for x, y in enumerate(log_counts))
+        denominator = sum((x - mean_x) ** 2 for x in range(n))
+        trend_scores[topic] = round(numerator / denominator, 3)
+    return trend_scores
+
+
+def test_week_keys_match_strftime():
+    days = [datetime(2019, 12, 20) + timedelta(days=d, hours=d % 24) for d in range(800)]
+
+    keys, _ = bucket_keys(to_datetime64(days), "week")
+
+    assert [f"{k // 100}-{k % 100:02d}" for k in keys.tolist()] == [
+        d.strftime("%Y-%W") for d in days
+    ]
+
+
+def test_matches_reference_implementation():
+    rng = random.Random(0)
+    start = datetime(2025, 10, 1)
+    topics, timestamps = [], []
+    for _ in range(5000):
+        topic = rng.randint(-1, 15)
+        # Later topics grow faster; some posts have no usable timestamp
+        offset = rng.triangular(0, 150, 150 * min(1.0, topic / 10 + 0.3))
+        ts = start + timedelta(days=offset)
+        if rng.random() < 0.02:
+            ts = None
+        elif rng.random() < 0.1:
+            ts = ts.replace(tzinfo=timezone(timedelta(hours=5, minutes=30)))
+        topics.append(topic)
+        timestamps.append(ts)
+    topics += [42, 43, 43]   # one bucket only / two posts in the same bucket
+    timestamps += [start, start, start + timedelta(hours=1)]
+
+    trends = analyze_trends(topics, timestamps)
+    assert trends == reference_trends(topics, timestamps)
+    assert len(trends) == 16 and 42 not in trends
+
+
+def test_window_keeps_recent_buckets():
+    start = datetime(2026, 1, 5)
+    topics = [1] * 6 + [1] * 2
+    timestamps = [start] * 6 + [start + timedelta(weeks=8)] * 2
+    timestamps[0] = start + timedelta(weeks=7)
+
+    assert analyze_trends(topics, timestamps, window=4) == {
+        1: round(float(np.log(2)), 3)
+    }
+    assert analyze_trends(topics, timestamps, bucket="day", window=1) == {}
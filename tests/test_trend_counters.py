@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from nlp_engine.trend_analysis import analyze_trends
+from nlp_engine.trend_counters import (
+    COUNTERS_COLLECTION,
+    JOURNAL_COLLECTION,
+    TopicTrendCounters
+)
+
+START = datetime(2026, 1, 5)
+
+
+@pytest.fixture
+def counters(mongo_db):
+    return TopicTrendCounters(
+        mongo_db[COUNTERS_COLLECTION], "week", journal=mongo_db[JOURNAL_COLLECTION]
+    )
+
+
+def count(counters, post_ids, topics, timestamps, markers):
+    """One pipeline chunk: journal, store the markers, apply."""
+    current = counters.counter_keys(topics, timestamps, "v1")
+    previous = [markers.get(post_id) for post_id in post_ids]
+    entry = counters.journal(post_ids, previous, current)
+    markers.update(zip(post_ids, current))
+    counters.apply(entry)
+    return entry
+
+
+def totals(counters):
+    topic_ids, keys, _, counts = counters.load("v1")
+    return dict(zip(zip(topic_ids.tolist(), keys.tolist()), counts.tolist()))
+
+
+def corpus():
+    post_ids = [f"p{i}" for i in range(60)]
+    topics = [i % 3 if i % 7 else -1 for i in range(60)]
+    timestamps = [START + timedelta(days=i * (1 + i % 3)) for i in range(60)]
+    timestamps[5] = None
+    return post_ids, topics, timestamps
+
+
+def test_recounting_the_same_posts_is_a_noop(counters):
+    post_ids, topics, timestamps = corpus()
+    markers = {}
+
+    count(counters, post_ids, topics, timestamps, markers)
+    before = totals(counters)
+    assert count(counters, post_ids, topics, timestamps, markers) is None
+
+    assert totals(counters) == before
+    assert counters.trends("v1") == analyze_trends(topics, timestamps)
+
+
+def test_moved_posts_are_moved_not_recounted(counters):
+    post_ids, topics, timestamps = corpus()
+    markers = {}
+    count(counters, post_ids, topics, timestamps, markers)
+
+    reassigned = [2 if t == 0 else t for t in topics]
+    count(counters, post_ids, reassigned, timestamps, markers)
+
+    assert counters.trends("v1") == analyze_trends(reassigned, timestamps)
+    assert sum(totals(counters).values()) == sum(
+        1 for t, ts in zip(topics, timestamps) if t != -1 and ts is not None
+    )
+
+
+def test_reapplying_an_entry_does_not_count_twice(counters, monkeypatch):
+    post_ids, topics, timestamps = corpus()
+    markers = {}
+    current = counters.counter_keys(topics, timestamps, "v1")
+    entry = counters.journal(post_ids, [None] * len(post_ids), current)
+    markers.update(zip(post_ids, current))
+
+    def crash(*args, **kwargs):
+        raise RuntimeError("crash")
+
+    # Crash after the counters moved, before the entry was closed
+    monkeypatch.setattr(counters.journal_collection, "delete_one", crash)
+    with pytest.raises(RuntimeError):
+        counters.apply(entry)
+    monkeypatch.undo()
+    applied = totals(counters)
+
+    assert counters.recover(lambda ids: {i: markers[i] for i in ids}) == 1
+    assert totals(counters) == applied
+    assert counters.apply(entry) == 0
+    assert totals(counters) == applied
+    assert counters.trends("v1") == analyze_trends(topics, timestamps)
+
+
+def test_recover_counts_only_markers_that_were_written(counters):
+    post_ids, topics, timestamps = corpus()
+    current = counters.counter_keys(topics, timestamps, "v1")
+    counters.journal(post_ids, [None] * len(post_ids), current)
+
+    # Only the first half of the chunk's marker writes landed
+    written = dict(zip(post_ids[:30], current[:30]))
+    assert counters.recover(lambda ids: {i: written.get(i) for i in ids}) == 1
+
+    assert counters.trends("v1") == analyze_trends(topics[:30], timestamps[:30])
+    assert counters.recover(lambda ids: {}) == 0